@@ -4,6 +4,7 @@ import { Badge } from '@/components/ui/badge';
 import { Button } from '@/components/ui/button';
 import { Alert, AlertDescription } from '@/components/ui/alert';
 import { Bell, BellRing, X, AlertTriangle, AlertCircle, Info, CheckCircle } from 'lucide-react';
+import { useRealtimeFeed } from '@/hooks/use-realtime-feed';
 
 const AlertSystem = () => {
   const [alerts, setAlerts] = useState([]);
@@ -11,129 +12,59 @@ const AlertSystem = () => {
   const [lastCheck, setLastCheck] = useState(null);
   const [unreadCount, setUnreadCount] = useState(0);
 
+  // Alertas e previsões chegam pelo feed do servidor (um snapshot por tick)
+  const feed = useRealtimeFeed(isEnabled);
+
   const API_BASE_URL = 'http://localhost:5001/api';
 
-  const fetchAlerts = async () => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/alerts`);
-      if (response.ok) {
-        const data = await response.json();
-        setAlerts(data.alerts || []);
-        setLastCheck(new Date());
-        
-        // Contar alertas não lidos
-        const unread = data.alerts.filter(alert => !alert.read).length;
-        setUnreadCount(unread);
-      }
-    } catch (error) {
-      console.error('Erro ao buscar alertas:', error);
-    }
+  // Alertas (telemetria e ML) vêm do motor de alertas do servidor; não lidos = status 'open'
+  const processAlerts = (data) => {
+    setAlerts(data.alerts || []);
+    setLastCheck(new Date());
+    setUnreadCount((data.alerts || []).filter(alert => alert.status === 'open').length);
   };
 
-  const fetchMLPredictions = async () => {
+  useEffect(() => {
+    if (!isEnabled || !feed.state) return;
+
+    if (feed.state.alerts) processAlerts(feed.state.alerts);
+  }, [feed.state, isEnabled]);
+
+  const postAlertAction = async (alertId, action) => {
     try {
-      const response = await fetch(`${API_BASE_URL}/ml/predict/all`);
-      if (response.ok) {
-        const data = await response.json();
-        
-        // Gerar alertas baseados nas previsões ML
-        const mlAlerts = [];
-        
-        data.predictions.forEach(prediction => {
-          if (prediction.failure_probability > 0.7) {
-            mlAlerts.push({
-              id: `ml_critical_${prediction.turbine_id}_${Date.now()}`,
-              type: 'critical',
-              source: 'ml_prediction',
-              turbine_id: prediction.turbine_id,
-              title: `Falha Iminente Detectada - ${prediction.turbine_id}`,
-              message: `Probabilidade de falha: ${(prediction.failure_probability * 100).toFixed(1)}%. Ação imediata necessária.`,
-              timestamp: new Date().toISOString(),
-              priority: 'critical',
-              read: false,
-              actions: ['immediate_maintenance']
-            });
-          } else if (prediction.failure_probability > 0.4) {
-            mlAlerts.push({
-              id: `ml_warning_${prediction.turbine_id}_${Date.now()}`,
-              type: 'warning',
-              source: 'ml_prediction',
-              turbine_id: prediction.turbine_id,
-              title: `Risco Elevado - ${prediction.turbine_id}`,
-              message: `Probabilidade de falha: ${(prediction.failure_probability * 100).toFixed(1)}%. Agendar manutenção preventiva.`,
-              timestamp: new Date().toISOString(),
-              priority: 'high',
-              read: false,
-              actions: ['schedule_maintenance']
-            });
-          }
-          
-          if (prediction.anomaly_detected) {
-            mlAlerts.push({
-              id: `ml_anomaly_${prediction.turbine_id}_${Date.now()}`,
-              type: 'anomaly',
-              source: 'ml_prediction',
-              turbine_id: prediction.turbine_id,
-              title: `Anomalia Detectada - ${prediction.turbine_id}`,
-              message: `Comportamento anômalo identificado pelo sistema de ML. Investigação recomendada.`,
-              timestamp: new Date().toISOString(),
-              priority: 'medium',
-              read: false,
-              actions: ['investigate']
-            });
-          }
-        });
-        
-        // Adicionar alertas ML aos alertas existentes
-        if (mlAlerts.length > 0) {
-          setAlerts(prev => {
-            const existingIds = new Set(prev.map(a => a.id));
-            const newAlerts = mlAlerts.filter(a => !existingIds.has(a.id));
-            return [...prev, ...newAlerts];
-          });
-          
-          setUnreadCount(prev => prev + mlAlerts.length);
-        }
+      const response = await fetch(`${API_BASE_URL}/alerts/${alertId}/${action}`, { method: 'POST' });
+      if (!response.ok) {
+        console.error(`Erro ao atualizar alerta ${alertId}:`, response.status);
       }
     } catch (error) {
-      console.error('Erro ao buscar previsões ML:', error);
+      console.error(`Erro ao atualizar alerta ${alertId}:`, error);
     }
   };
 
-  useEffect(() => {
-    if (isEnabled) {
-      // Buscar alertas iniciais
-      fetchAlerts();
-      fetchMLPredictions();
-
-      // Configurar verificação periódica
-      const interval = setInterval(() => {
-        fetchAlerts();
-        fetchMLPredictions();
-      }, 60000); // Verificar a cada minuto
-
-      return () => clearInterval(interval);
-    }
-  }, [isEnabled]);
-
   const markAsRead = (alertId) => {
-    setAlerts(prev => 
-      prev.map(alert => 
-        alert.id === alertId ? { ...alert, read: true } : alert
+    const alert = alerts.find(a => a.id === alertId);
+    setAlerts(prev =>
+      prev.map(a =>
+        a.id === alertId ? { ...a, read: true, status: 'acknowledged' } : a
       )
     );
-    setUnreadCount(prev => Math.max(0, prev - 1));
+    if (alert && alert.status === 'open') {
+      setUnreadCount(prev => Math.max(0, prev - 1));
+    }
+    postAlertAction(alertId, 'acknowledge');
   };
 
   const dismissAlert = (alertId) => {
-    setAlerts(prev => prev.filter(alert => alert.id !== alertId));
-    setUnreadCount(prev => {
-      const alert = alerts.find(a => a.id === alertId);
-      return alert && !alert.read ? Math.max(0, prev - 1) : prev;
-    });
+    const alert = alerts.find(a => a.id === alertId);
+    setAlerts(prev => prev.filter(a => a.id !== alertId));
+    if (alert && alert.status === 'open') {
+      setUnreadCount(prev => Math.max(0, prev - 1));
+    }
+    postAlertAction(alertId, 'clear');
   };
 
   const clearAllAlerts = () => {
+    alerts.forEach(alert => postAlertAction(alert.id, 'clear'));
     setAlerts([]);
     setUnreadCount(0);
   };
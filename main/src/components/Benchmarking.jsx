@@ -1,12 +1,48 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
 import { Progress } from '@/components/ui/progress';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
-import { turbineData } from '../data/turbineData';
+import { turbineData as staticTurbineData } from '../data/turbineData';
 import { TrendingUp, TrendingDown, Minus } from 'lucide-react';
 
+const API_BASE_URL = 'http://localhost:5001/api';
+
+// Combina os KPIs históricos da API (lidos dos rollups) com os dados estáticos
+const mergeKpis = (apiTurbines) => staticTurbineData.map(turbine => {
+  const kpi = apiTurbines.find(t => t.turbine_id === turbine.id);
+  if (!kpi || !kpi.samples) return turbine;
+  return {
+    ...turbine,
+    falhas: kpi.failures,
+    duracaoTotal: kpi.downtime_hours,
+    disponibilidade: kpi.availability ?? turbine.disponibilidade,
+    mtbf: kpi.mtbf ?? turbine.mtbf,
+    mttr: kpi.mttr ?? turbine.mttr
+  };
+});
+
 const Benchmarking = () => {
+  const [turbineData, setTurbineData] = useState(staticTurbineData);
+
+  useEffect(() => {
+    const fetchKpis = async () => {
+      try {
+        const response = await fetch(`${API_BASE_URL}/kpis?resolution=1d`);
+        if (response.ok) {
+          const data = await response.json();
+          if (data.turbines && data.turbines.length > 0) {
+            setTurbineData(mergeKpis(data.turbines));
+          }
+        }
+      } catch (error) {
+        console.error('Erro ao buscar KPIs históricos:', error);
+      }
+    };
+
+    fetchKpis();
+  }, []);
+
   // Ordenar turbinas por disponibilidade
   const turbinesByAvailability = [...turbineData].sort((a, b) => b.disponibilidade - a.disponibilidade);
   
@@ -1,9 +1,41 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, PieChart, Pie, Cell, LineChart, Line } from 'recharts';
 import { kpisGerais, tendenciasMensais, classificacoes } from '../data/turbineData';
 
+const API_BASE_URL = 'http://localhost:5001/api';
+
+// Soma a tendência diária da API (rollup de 1 dia) em totais mensais
+const monthlyFromTrend = (trend) => {
+  const months = {};
+  trend.forEach(point => {
+    const mes = point.timestamp.substring(0, 7);
+    months[mes] = (months[mes] || 0) + point.failures;
+  });
+  return Object.entries(months).map(([mes, falhas]) => ({ mes, falhas }));
+};
+
 const Dashboard = () => {
+  const [tendencias, setTendencias] = useState(tendenciasMensais);
+
+  useEffect(() => {
+    const fetchTrend = async () => {
+      try {
+        const response = await fetch(`${API_BASE_URL}/kpis?resolution=1d`);
+        if (response.ok) {
+          const data = await response.json();
+          if (data.trend && data.trend.length > 0) {
+            setTendencias(monthlyFromTrend(data.trend));
+          }
+        }
+      } catch (error) {
+        console.error('Erro ao buscar tendência de falhas:', error);
+      }
+    };
+
+    fetchTrend();
+  }, []);
+
   // Dados para o gráfico de pizza das classificações
   const classificacaoData = Object.entries(kpisGerais.eventosPorClassificacao).map(([key, value]) => ({
     name: classificacoes[key],
@@ -15,7 +47,7 @@ const Dashboard = () => {
   const COLORS = ['#ef4444', '#10b981', '#3b82f6', '#f59e0b', '#8b5cf6'];
 
   // Dados para o gráfico de tendências mensais
-  const tendenciasData = tendenciasMensais.map(item => ({
+  const tendenciasData = tendencias.map(item => ({
     mes: item.mes.substring(5), // Pega apenas MM
     falhas: item.falhas
   }));
@@ -107,7 +107,9 @@ const MLInsights = ({ predictions }) => {
                     <div className="flex justify-between">
                       <span>Dias p/ Falha:</span>
                       <span className="font-medium">
-                        {turbine.estimated_days_to_failure} dias
+                        {turbine.estimated_days_to_failure != null
+                          ? `${turbine.estimated_days_to_failure} dias`
+                          : `> ${predictions.forecast_horizon_days} dias`}
                       </span>
                     </div>
                     <div className="flex justify-between">
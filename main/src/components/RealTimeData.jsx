@@ -3,6 +3,7 @@ import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
 import { Button } from '@/components/ui/button';
 import { RefreshCw, Wifi, WifiOff, Activity } from 'lucide-react';
+import { useRealtimeFeed } from '@/hooks/use-realtime-feed';
 
 const RealTimeData = ({ onDataUpdate }) => {
   const [isConnected, setIsConnected] = useState(false);
@@ -11,6 +12,9 @@ const RealTimeData = ({ onDataUpdate }) => {
   const [isLoading, setIsLoading] = useState(false);
   const [autoRefresh, setAutoRefresh] = useState(true);
 
+  // Com Auto ON, os dados chegam pelo feed do servidor em vez de polling
+  const feed = useRealtimeFeed(autoRefresh);
+
   const API_BASE_URL = 'http://localhost:5001/api';
 
   const fetchRealtimeData = async () => {
@@ -39,19 +43,26 @@ const RealTimeData = ({ onDataUpdate }) => {
   };
 
   useEffect(() => {
-    // Buscar dados iniciais
+    // Buscar dados iniciais (o feed pode demorar a conectar)
     fetchRealtimeData();
+  }, []);
 
-    // Configurar atualização automática
-    let interval;
-    if (autoRefresh) {
-      interval = setInterval(fetchRealtimeData, 30000); // Atualizar a cada 30 segundos
-    }
+  useEffect(() => {
+    if (autoRefresh) setIsConnected(feed.isConnected);
+  }, [feed.isConnected, autoRefresh]);
 
-    return () => {
-      if (interval) clearInterval(interval);
-    };
-  }, [autoRefresh]);
+  useEffect(() => {
+    const data = feed.state && feed.state.realtime;
+    if (!data) return;
+
+    setRealtimeData(data);
+    setLastUpdate(feed.lastUpdate);
+
+    // Notificar componente pai sobre os novos dados
+    if (onDataUpdate) {
+      onDataUpdate(data);
+    }
+  }, [feed.state]);
 
   const formatTime = (date) => {
     if (!date) return 'Nunca';
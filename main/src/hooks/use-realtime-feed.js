@@ -0,0 +1,78 @@
+import * as React from "react"
+
+const API_BASE_URL = 'http://localhost:5001/api'
+
+// Chave de cada item nas seções com listas do feed
+const COLLECTIONS = {
+  realtime: ['turbines', 'id'],
+  alerts: ['alerts', 'id'],
+  predictions: ['predictions', 'turbine_id'],
+}
+
+// Aplica um delta do servidor a uma seção do estado
+function applySectionDelta(name, section, delta) {
+  if ('reset' in delta) return delta.reset
+  if (!section) return section
+
+  const { changed = [], removed = [], ...fields } = delta
+  const next = { ...section, ...fields }
+  const collection = COLLECTIONS[name]
+  if (collection) {
+    const [itemsField, key] = collection
+    const changedByKey = new Map(changed.map(item => [item[key], item]))
+    const removedKeys = new Set(removed)
+    const items = (section[itemsField] || [])
+      .filter(item => !removedKeys.has(item[key]))
+      .map(item => changedByKey.get(item[key]) || item)
+    const existing = new Set(items.map(item => item[key]))
+    changed.forEach(item => {
+      if (!existing.has(item[key])) items.push(item)
+    })
+    next[itemsField] = items
+  }
+  return next
+}
+
+// Estado da frota enviado por /api/realtime/stream (Server-Sent Events)
+export function useRealtimeFeed(enabled = true) {
+  const [state, setState] = React.useState(null)
+  const [isConnected, setIsConnected] = React.useState(false)
+  const [lastUpdate, setLastUpdate] = React.useState(null)
+
+  React.useEffect(() => {
+    if (!enabled) return
+
+    const source = new EventSource(`${API_BASE_URL}/realtime/stream`)
+
+    source.addEventListener('snapshot', (event) => {
+      const { seq, ...snapshot } = JSON.parse(event.data)
+      setState(snapshot)
+      setLastUpdate(new Date())
+      setIsConnected(true)
+    })
+
+    source.addEventListener('delta', (event) => {
+      const { seq, timestamp, ...delta } = JSON.parse(event.data)
+      setState(prev => {
+        if (!prev) return prev
+        const next = { ...prev }
+        Object.entries(delta).forEach(([name, sectionDelta]) => {
+          next[name] = applySectionDelta(name, prev[name], sectionDelta)
+        })
+        return next
+      })
+      setLastUpdate(new Date(timestamp))
+    })
+
+    source.onopen = () => setIsConnected(true)
+    // O EventSource reconecta sozinho e recebe um novo snapshot
+    source.onerror = () => setIsConnected(false)
+
+    return () => {
+      source.close()
+      setIsConnected(false)
+    }
+  }, [enabled])
+
+  return { state, isConnected, lastUpdate }
+}
@@ -0,0 +1,68 @@
+"""Compara o backend sklearn com o ensemble compilado (tree_engine)
+
+Uso, a partir de teb-api/:
+
+    python benchmarks/bench_inference.py [--repeat 50] [--sizes 1,8,64,500]
+
+Usa a versão ativa do registro de modelos; se não houver, treina um modelo
+em memória com os dados sintéticos padrão.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ml_models.predictive_model import TurbinePredictiveModel  # noqa: E402
+from src.ml_models.tree_engine import CompiledEnsemble  # noqa: E402
+
+
+def timeit(fn, repeat):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples = np.array(samples) * 1e3
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--sizes', default='1,8,64,500')
+    args = parser.parse_args()
+
+    model = TurbinePredictiveModel()
+    if not model.load_model():
+        print("Nenhum modelo publicado; treinando um modelo em memória...")
+        model.train_models()
+
+    engine = CompiledEnsemble.from_estimators(model.failure_model, model.availability_model, model.anomaly_detector)
+    rng = np.random.default_rng(0)
+
+    check = rng.normal(size=(256, engine.n_features))
+    print(f"Erro máximo contra o sklearn: {engine.max_abs_error(model.failure_model, model.availability_model, model.anomaly_detector, check)}")
+    print(f"Árvores: {len(engine.roots)}, nós: {len(engine.feature)}, profundidade máxima: {engine.max_depth}")
+    print()
+    print(f"{'linhas':>8} {'sklearn p50':>12} {'p95':>8} {'compilado p50':>14} {'p95':>8} {'speedup':>8}  (ms)")
+
+    for size in (int(s) for s in args.sizes.split(',')):
+        X = rng.normal(size=(size, engine.n_features))
+
+        def run_sklearn():
+            model.failure_model.predict(X)
+            model.availability_model.predict(X)
+            model.anomaly_detector.decision_function(X)
+
+        sk_p50, sk_p95 = timeit(run_sklearn, args.repeat)
+        co_p50, co_p95 = timeit(lambda: engine.predict(X), args.repeat)
+        print(f"{size:>8} {sk_p50:>12.3f} {sk_p95:>8.3f} {co_p50:>14.3f} {co_p95:>8.3f} {sk_p50 / co_p50:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
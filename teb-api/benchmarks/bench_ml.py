@@ -0,0 +1,153 @@
+"""Microbenchmarks do caminho de ML (geração de dados, features, previsão, forecast e carga)
+
+Uso, a partir de teb-api/:
+
+    python benchmarks/bench_ml.py [--repeat 30] [--quick] [--output arquivo.json]
+
+Roda offline: treina um modelo em memória com os dados sintéticos padrão e
+o publica num registro temporário para medir a carga. Os resultados (p50,
+p95, p99 em ms, linhas/s e memória) vão para benchmarks/results/ em JSON,
+para comparar entre commits com benchmarks/compare.py.
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from common import measure, rss_mb, write_results
+
+from src.ml_models.predictive_model import TurbinePredictiveModel, WARMUP_SAMPLE  # noqa: E402
+from src.ml_models.model_registry import ModelRegistry  # noqa: E402
+from src.ml_models.forecasting import FORECAST_HORIZON_DAYS  # noqa: E402
+
+
+def sample_records(n, seed=0):
+    """n amostras de entrada no formato de /ml/predict (lista de dicts)"""
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(1.0, 0.1, size=(n, len(WARMUP_SAMPLE)))
+    return [
+        {name: float(value * noise[i, j]) for j, (name, value) in enumerate(WARMUP_SAMPLE.items())}
+        for i in range(n)
+    ]
+
+
+def bench_generate_training_data(model, repeat, quick):
+    cases = [
+        ('8x181d', {}),
+        ('8x30d_10min', {'start': '2025-01-01', 'end': '2025-01-31', 'freq': '10min'})
+    ]
+    if not quick:
+        cases.append(('100x365d', {'n_turbines': 100, 'start': '2025-01-01', 'end': '2025-12-31'}))
+
+    results = {}
+    for name, options in cases:
+        rows = len(model.generate_training_data(**options))
+        stats = measure(lambda: model.generate_training_data(**options), max(3, repeat // 5))
+        results[name] = {**stats, 'rows': rows, 'rows_per_s': round(rows / (stats['p50_ms'] / 1e3))}
+    return results
+
+
+def bench_prepare_features(model, repeat, quick):
+    results = {}
+    for size in (1, 100, 10_000) if not quick else (1, 100, 1000):
+        records = sample_records(size)
+        columns = {name: np.array([r[name] for r in records]) for name in WARMUP_SAMPLE}
+        for fmt, data in (('records', records), ('columns', columns), ('dataframe', pd.DataFrame(columns))):
+            stats = measure(lambda: model.prepare_features(data), repeat)
+            results[f'{fmt}_{size}'] = {**stats, 'rows_per_s': round(size / (stats['p50_ms'] / 1e3))}
+    return results
+
+
+def bench_predict(model, repeat, quick):
+    """Uma chamada por turbina (como /ml/predict/<id>) contra um lote único"""
+    results = {}
+    for size in (1, 8, 64, 500) if not quick else (1, 8, 64):
+        records = sample_records(size)
+        single = measure(lambda: [model.predict_batch([record]) for record in records], max(3, repeat // 3))
+        batch = measure(lambda: model.predict_batch(records), repeat)
+        results[f'single_{size}'] = single
+        results[f'batch_{size}'] = batch
+        results[f'batch_speedup_{size}'] = round(single['p50_ms'] / batch['p50_ms'], 2)
+    return results
+
+
+def bench_forecast(model, repeat, quick):
+    """Forecast numa passada por todas as árvores contra uma previsão por dia do horizonte"""
+    results = {}
+    for size in (1, 8, 64, 500) if not quick else (1, 8):
+        records = sample_records(size)
+
+        def per_day():
+            for day in range(FORECAST_HORIZON_DAYS):
+                model.predict_batch([
+                    {**record, 'turbine_age': record['turbine_age'] + day,
+                     'days_since_maintenance': record['days_since_maintenance'] + day}
+                    for record in records
+                ])
+
+        single_pass = measure(lambda: model.forecast(records), max(3, repeat // 3))
+        per_day_calls = measure(per_day, 3)
+        results[f'forecast_{size}'] = single_pass
+        results[f'per_day_predict_{size}'] = per_day_calls
+        results[f'forecast_speedup_{size}'] = round(per_day_calls['p50_ms'] / single_pass['p50_ms'], 2)
+    return results
+
+
+def bench_model_load(model, repeat):
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.save_model(registry)
+
+        def load():
+            TurbinePredictiveModel().load_model(registry)
+
+        def load_and_warm_up():
+            loaded = TurbinePredictiveModel()
+            loaded.load_model(registry)
+            loaded.warm_up()
+
+        return {
+            'load': measure(load, max(3, repeat // 3)),
+            'load_and_warm_up': measure(load_and_warm_up, max(3, repeat // 3))
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--quick', action='store_true', help='Casos menores, para conferência rápida')
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: benchmarks/results/)')
+    args = parser.parse_args()
+
+    model = TurbinePredictiveModel()
+    print("Treinando um modelo em memória com os dados sintéticos padrão...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.train_models()
+    model.warm_up()
+
+    results = {}
+    for name, run in (
+        ('generate_training_data', lambda: bench_generate_training_data(model, args.repeat, args.quick)),
+        ('prepare_features', lambda: bench_prepare_features(model, args.repeat, args.quick)),
+        ('predict', lambda: bench_predict(model, args.repeat, args.quick)),
+        ('forecast', lambda: bench_forecast(model, args.repeat, args.quick)),
+        ('model_load', lambda: bench_model_load(model, args.repeat))
+    ):
+        print(f"{name}...")
+        results[name] = run()
+        for case, stats in results[name].items():
+            if isinstance(stats, dict):
+                print(f"  {case:<24} p50 {stats['p50_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms  p99 {stats['p99_ms']:>10.3f} ms")
+            else:
+                print(f"  {case:<24} {stats}x")
+    results['memory'] = rss_mb()
+
+    print(f"\nResultados gravados em {write_results('bench_ml', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Funções comuns dos benchmarks: medição, percentis, memória e saída em JSON"""
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+API_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+
+def summarize(samples):
+    """Resumo de uma lista de durações em segundos (valores em milissegundos)"""
+    ms = np.asarray(samples, dtype=float) * 1e3
+    if len(ms) == 0:
+        return {'n': 0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        'n': int(len(ms)),
+        'mean_ms': round(float(ms.mean()), 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'min_ms': round(float(ms.min()), 4),
+        'max_ms': round(float(ms.max()), 4)
+    }
+
+
+def measure(fn, repeat, warmup=1):
+    """Executa fn warmup + repeat vezes e resume as durações das repetições"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def rss_mb():
+    """Memória residente atual e o pico do processo, em MB"""
+    current = None
+    try:
+        with open('/proc/self/statm') as statm:
+            current = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        peak = peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+    except ImportError:
+        peak = None
+    return {
+        'rss_mb': round(current, 1) if current is not None else None,
+        'peak_rss_mb': round(peak, 1) if peak is not None else None
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=API_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    import sklearn
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def write_results(name, results, output=None):
+    """Grava {environment, results} em JSON; retorna o caminho do arquivo
+
+    Sem output, grava em benchmarks/results/<name>-<commit>-<data>.json.
+    """
+    env = environment()
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{name}-{env['commit'] or 'nogit'}-{stamp}.json")
+    with open(output, 'w') as f:
+        json.dump({'benchmark': name, 'environment': env, 'results': results}, f, indent=2)
+        f.write('\n')
+    return output
@@ -0,0 +1,77 @@
+"""Compara dois resultados JSON dos benchmarks (ex.: antes e depois de um commit)
+
+Uso, a partir de teb-api/:
+
+    python benchmarks/compare.py base.json novo.json [--threshold 10] [--metric p50_ms]
+
+Lista a variação percentual de cada caso presente nos dois arquivos e marca
+como regressão o que piorou mais que --threshold por cento: tempos (*_ms)
+maiores ou vazões (req_per_s, rows_per_s) menores. Sai com código 1 se
+houver regressão, para uso em scripts.
+"""
+import argparse
+import json
+import sys
+
+THROUGHPUT_METRICS = ('req_per_s', 'rows_per_s')
+
+
+def flatten(results, prefix=''):
+    """{'a': {'b': {'p50_ms': 1}}} -> {'a/b': {'p50_ms': 1}} (só folhas com métricas)"""
+    cases = {}
+    for name, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        path = f'{prefix}/{name}' if prefix else name
+        metrics = {key: v for key, v in value.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+        if any(key.endswith('_ms') or key in THROUGHPUT_METRICS for key in metrics):
+            cases[path] = metrics
+        cases.update(flatten(value, path))
+    return cases
+
+
+def compare(base, new, metric, threshold):
+    """Linhas (caso, métrica, base, novo, variação %, regressão) dos casos em comum"""
+    base_cases = flatten(base['results'])
+    new_cases = flatten(new['results'])
+    rows = []
+    for case in sorted(base_cases.keys() & new_cases.keys()):
+        for name in (metric, *THROUGHPUT_METRICS):
+            before = base_cases[case].get(name)
+            after = new_cases[case].get(name)
+            if before is None or after is None or before == 0:
+                continue
+            delta = (after - before) / before * 100
+            worse = -delta if name in THROUGHPUT_METRICS else delta
+            rows.append((case, name, before, after, delta, worse > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Piora percentual considerada regressão')
+    parser.add_argument('--metric', default='p50_ms', help='Métrica de tempo comparada (p50_ms, p95_ms, p99_ms...)')
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    if base.get('benchmark') != new.get('benchmark'):
+        sys.exit(f"Benchmarks diferentes: {base.get('benchmark')} x {new.get('benchmark')}")
+
+    print(f"{base['benchmark']}: {base['environment'].get('commit')} -> {new['environment'].get('commit')}")
+    rows = compare(base, new, args.metric, args.threshold)
+    for case, name, before, after, delta, regression in rows:
+        flag = '  REGRESSÃO' if regression else ''
+        print(f"  {case:<40} {name:<10} {before:>12.3f} -> {after:>12.3f}  {delta:>+8.1f}%{flag}")
+
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"\n{len(rows)} comparações, {regressions} regressões acima de {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
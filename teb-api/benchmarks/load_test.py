@@ -0,0 +1,166 @@
+"""Gerador de carga local para os endpoints mais usados do painel
+
+Uso, a partir de teb-api/:
+
+    python benchmarks/load_test.py [--concurrency 8] [--duration 10] [--requests N]
+    python benchmarks/load_test.py --url http://127.0.0.1:5000
+
+Sem --url, a aplicação roda no próprio processo pelo test client do Flask,
+com um banco SQLite e um registro de modelos temporários (um modelo pequeno
+é treinado e publicado antes de importar src.main), então nada do ambiente
+de desenvolvimento é alterado; --use-local-data usa o banco e o registro
+padrão. Com --url, os pedidos vão a um servidor já em execução.
+
+Cada endpoint recebe carga com concorrência fixa (uma thread por conexão)
+por --duration segundos ou até --requests pedidos. O resultado (p50, p95,
+p99 em ms, req/s, erros e memória) vai para benchmarks/results/ em JSON,
+para comparar entre commits com benchmarks/compare.py.
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from common import rss_mb, summarize, write_results
+
+ENDPOINTS = ('/api/turbines/realtime', '/api/alerts', '/api/ml/predict/all')
+
+
+def prepare_local_app(use_local_data):
+    """Importa src.main com banco e registro temporários; retorna o app Flask"""
+    if not use_local_data:
+        workdir = tempfile.mkdtemp(prefix='teb-load-')
+        os.environ['TEB_DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'app.db')}"
+        os.environ['TEB_MODEL_REGISTRY'] = os.path.join(workdir, 'registry')
+
+        from src.ml_models.predictive_model import TurbinePredictiveModel  # noqa: E402
+        print("Treinando e publicando um modelo pequeno no registro temporário...")
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = TurbinePredictiveModel()
+            model.train_models(start='2025-01-01', end='2025-03-31')
+            model.save_model()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from src.main import app  # noqa: E402
+    return app
+
+
+def local_requester(app):
+    """Um test client por thread; retorna (status, bytes lidos)"""
+    local = threading.local()
+
+    def send(path):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        response = client.get(path)
+        try:
+            return response.status_code, len(response.get_data())
+        finally:
+            response.close()
+
+    return send
+
+
+def http_requester(base_url, timeout):
+    def send(path):
+        try:
+            with urllib.request.urlopen(base_url.rstrip('/') + path, timeout=timeout) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, 0
+
+    return send
+
+
+def run_endpoint(send, path, concurrency, duration, max_requests):
+    """Carga com concorrência fixa num endpoint; retorna o resumo das medidas"""
+    latencies = []
+    statuses = {}
+    failures = []
+    lock = threading.Lock()
+    issued = [0]
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        while time.perf_counter() < deadline:
+            with lock:
+                if max_requests is not None and issued[0] >= max_requests:
+                    return
+                issued[0] += 1
+            started = time.perf_counter()
+            try:
+                status, _ = send(path)
+            except Exception as e:
+                with lock:
+                    failures.append(type(e).__name__)
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    errors = len(failures) + sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        **summarize(latencies),
+        'req_per_s': round(len(latencies) / wall, 2) if wall > 0 else None,
+        'wall_s': round(wall, 3),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'exceptions': sorted(set(failures))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Servidor em execução (ex.: http://127.0.0.1:5000); sem ele usa o test client')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='Segundos de carga por endpoint')
+    parser.add_argument('--requests', type=int, help='Máximo de pedidos por endpoint')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+    parser.add_argument('--warmup', type=int, default=5, help='Pedidos de aquecimento por endpoint')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--use-local-data', action='store_true',
+                        help='Usa o banco e o registro de modelos padrão em vez dos temporários')
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: benchmarks/results/)')
+    args = parser.parse_args()
+
+    if args.url:
+        send = http_requester(args.url, args.timeout)
+    else:
+        send = local_requester(prepare_local_app(args.use_local_data))
+
+    results = {'config': {
+        'target': args.url or 'test_client',
+        'concurrency': args.concurrency,
+        'duration_s': args.duration,
+        'max_requests': args.requests
+    }}
+    for path in args.endpoints.split(','):
+        for _ in range(args.warmup):
+            send(path)
+        results[path] = stats = run_endpoint(send, path, args.concurrency, args.duration, args.requests)
+        print(f"{path:<26} {stats['req_per_s']:>9.1f} req/s  p50 {stats.get('p50_ms', 0):>9.2f} ms  "
+              f"p95 {stats.get('p95_ms', 0):>9.2f} ms  p99 {stats.get('p99_ms', 0):>9.2f} ms  "
+              f"erros {stats['errors']}")
+    # Com --url, a memória medida é a do gerador de carga, não a do servidor
+    results['memory'] = rss_mb()
+
+    print(f"\nResultados gravados em {write_results('load_test', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
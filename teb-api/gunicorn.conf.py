@@ -0,0 +1,89 @@
+"""Configuração do gunicorn para servir a API em produção
+
+Uso, a partir de teb-api/:
+
+    gunicorn -c gunicorn.conf.py
+
+O processo mestre importa src.main uma única vez (preload_app): banco,
+cadastro de turbinas, alertas e o modelo ativo já carregado e aquecido.
+Depois cria os workers com fork, que herdam essa memória em copy-on-write:
+os nós das florestas do sklearn carregadas pelo mestre não são escritos
+depois, então as páginas continuam compartilhadas (gc.freeze evita que o
+coletor as toque). Um worker que recarrega outra versão (watcher ou
+/api/ml/reload) passa a ter a sua própria cópia das florestas do sklearn;
+só os arrays .npy do motor compilado (TEB_INFERENCE_BACKEND=compiled) são
+mapeados com mmap e seguem compartilhados pelo page cache depois de uma
+recarga. Conexões do banco e threads de serviço são recriados em cada
+worker (os.register_at_fork nos serviços e em main.py).
+
+O estado compartilhado entre os workers fica no banco: última telemetria
+de cada turbina (telemetry_latest), alertas e níveis da histerese, com uma
+revisão que cada worker relê quando muda (alert_engine), o diário de lotes
+que alimenta o detector de anomalias de cada worker (anomaly_stream), os
+jobs de treinamento e o cadastro de turbinas. O snapshot da frota é
+simulado de forma determinística por janela, então cada worker monta o
+mesmo, e /api/metrics junta as métricas de todos (TEB_METRICS_DIR). Ficam
+por processo só caches (previsões, snapshots) e o buffer de ingestão, que
+grava no banco a cada flush.
+
+Variáveis de ambiente:
+    TEB_BIND              endereço (padrão 0.0.0.0:5000)
+    TEB_WORKERS           processos (padrão: número de CPUs)
+    TEB_THREADS           threads por processo, incluindo os streams SSE (padrão 32)
+    TEB_TIMEOUT           segundos sem resposta antes de reiniciar um worker (padrão 60)
+    TEB_GRACEFUL_TIMEOUT  segundos para terminar os pedidos ao reiniciar (padrão 30)
+    TEB_KEEPALIVE         segundos de keep-alive das conexões (padrão 5)
+    TEB_MAX_REQUESTS      reinicia cada worker depois de N pedidos; 0 desliga (padrão 0)
+    TEB_METRICS_DIR       diretório das métricas dos workers (padrão: temporário, removido ao sair)
+"""
+import gc
+import os
+import shutil
+import tempfile
+
+# Bibliotecas nativas (BLAS/OpenMP) com um thread por pedido, para os
+# threads do worker não disputarem os mesmos núcleos
+for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(variable, '1')
+
+# Métricas de todos os workers juntas em /api/metrics: cada worker grava as
+# suas num diretório compartilhado, novo a cada início do mestre (removido ao sair)
+_metrics_dir = None
+if not os.environ.get('TEB_METRICS_DIR'):
+    _metrics_dir = os.environ['TEB_METRICS_DIR'] = tempfile.mkdtemp(prefix='teb-metrics-')
+
+# /api/ml/train e /api/ml/reload atingem um único worker; o watcher faz
+# todos seguirem a versão ativa do registro de modelos
+os.environ.setdefault('TEB_MODEL_WATCH_INTERVAL', '10')
+
+wsgi_app = 'src.main:app'
+preload_app = True
+
+bind = os.environ.get('TEB_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('TEB_WORKERS', os.cpu_count() or 1))
+# gthread: cada conexão ocupa um thread enquanto está aberta. Um cliente de
+# /api/realtime/stream segura o seu até desconectar, e cada aba do painel abre
+# dois streams (RealTimeData e AlertSystem); o padrão deixa ~12 abas e ainda
+# threads livres para os demais pedidos. Aumente com o número de painéis abertos.
+worker_class = 'gthread'
+threads = int(os.environ.get('TEB_THREADS', '32'))
+timeout = int(os.environ.get('TEB_TIMEOUT', '60'))
+graceful_timeout = int(os.environ.get('TEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('TEB_KEEPALIVE', '5'))
+max_requests = int(os.environ.get('TEB_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    # Objetos já carregados (app, modelo) saem da coleta cíclica: o coletor não
+    # escreve mais nos cabeçalhos deles, e as páginas continuam compartilhadas
+    gc.freeze()
+    server.log.info(f"Aplicação carregada; {workers} workers x {threads} threads em {bind}")
+
+
+def on_exit(server):
+    if _metrics_dir is not None:
+        shutil.rmtree(_metrics_dir, ignore_errors=True)
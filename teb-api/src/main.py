@@ -3,11 +3,15 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+import functools
+
+import click
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
 from src.routes.turbine_data import turbine_bp
+from src.services.telemetry_store import seed_demo_telemetry, telemetry_store
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -16,17 +20,69 @@ app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 CORS(app)
 
 from src.routes.ml_predictions import ml_bp
+from src.ml_models.predictive_model import warm_up_model
+from src.ml_models.model_watcher import model_watcher
+from src.routes.telemetry import telemetry_bp
+from src.ml_models.anomaly_stream import anomaly_stream
+from src.ml_models.training_jobs import training_jobs
+from src.services.telemetry_ingest import telemetry_ingest
+from src.routes.realtime import realtime_bp, realtime_feed
+from src.services.alert_engine import alert_engine
+from src.services.turbine_registry import turbine_registry
+from src.services.metrics import metrics
+from src.routes.metrics import metrics_bp
 
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(turbine_bp, url_prefix='/api')
 app.register_blueprint(ml_bp, url_prefix='/api')
+app.register_blueprint(telemetry_bp, url_prefix='/api')
+app.register_blueprint(realtime_bp, url_prefix='/api')
+app.register_blueprint(metrics_bp, url_prefix='/api')
+
+# Latência, pedidos em andamento e erros por rota (exportados em /api/metrics)
+metrics.init_app(app)
 
 # uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'TEB_DATABASE_URL',
+    f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
+# Ligar o buffer de ingestão ao banco (ativa WAL no SQLite) antes de criar as tabelas
+telemetry_ingest.init_app(app)
+realtime_feed.init_app(app)
 with app.app_context():
     db.create_all()
+    # Em servidores com fork (gunicorn --preload), cada worker abre as próprias conexões
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=functools.partial(db.engine.dispose, close=False))
+# Carregar o cadastro de turbinas e recarregar os alertas ativos do banco
+turbine_registry.init_app(app)
+alert_engine.init_app(app)
+# Jobs de treinamento ficam no banco, visíveis para todos os workers
+training_jobs.init_app(app)
+
+# Carregar e aquecer o modelo antes de atender requisições
+warm_up_model()
+# Refazer o estado do detector contínuo a partir do diário de telemetria (antes do fork)
+anomaly_stream.init_app(app)
+model_watcher.start()
+
+@app.cli.command('seed-telemetry')
+@click.option('--days', default=30, help='Dias de histórico a gerar')
+@click.option('--freq', default='10min', help='Intervalo entre amostras (ex.: 10min, 1h)')
+@click.option('--turbines', default=None, type=int, help='Quantidade de turbinas')
+def seed_telemetry(days, freq, turbines):
+    """Popula a tabela de telemetria com histórico sintético"""
+    total = seed_demo_telemetry(days=days, freq=freq, n_turbines=turbines)
+    print(f"{total} amostras de telemetria inseridas.")
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups():
+    """Recalcula os rollups de telemetria a partir da tabela bruta"""
+    total = telemetry_store.rebuild_rollups()
+    print(f"{total} baldes de rollup recalculados.")
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -46,5 +102,6 @@ def serve(path):
 
 
 if __name__ == '__main__':
+    # Servidor de desenvolvimento; em produção use gunicorn -c gunicorn.conf.py
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -0,0 +1,462 @@
+import collections
+import datetime
+import functools
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.ml_models.features import BASE_FEATURES, FEATURE_NAMES, DEFAULT_TURBINE_AGE, feature_pipeline
+from src.ml_models.predictive_model import predictive_model
+from src.models.user import db
+from src.services.alert_engine import alert_engine
+from src.services.metrics import metrics
+from src.services.telemetry_ingest import telemetry_ingest
+from src.services.telemetry_store import COLUMNS, telemetry_store
+
+# Janela deslizante por turbina (amostras) usada no z-score
+ANOMALY_WINDOW = int(os.environ.get('TEB_ANOMALY_WINDOW', '300'))
+# Amostras de aquecimento antes de um detector poder sinalizar
+ANOMALY_MIN_SAMPLES = int(os.environ.get('TEB_ANOMALY_MIN_SAMPLES', '30'))
+# Desvio (em desvios padrão) a partir do qual z-score e EWMA sinalizam
+ANOMALY_Z_THRESHOLD = float(os.environ.get('TEB_ANOMALY_Z', '4.0'))
+# Peso da amostra nova nas médias exponenciais (EWMA e score do modelo)
+ANOMALY_EWMA_ALPHA = float(os.environ.get('TEB_ANOMALY_EWMA_ALPHA', '0.1'))
+# Score médio do IsolationForest abaixo do qual o modelo sinaliza (0 = limiar do treino)
+ANOMALY_MODEL_THRESHOLD = float(os.environ.get('TEB_ANOMALY_MODEL_THRESHOLD', '0.0'))
+# Amostras sinalizadas seguidas para entrar em anomalia e normais seguidas para sair
+ANOMALY_TRIGGER_SAMPLES = int(os.environ.get('TEB_ANOMALY_TRIGGER_SAMPLES', '2'))
+ANOMALY_CLEAR_SAMPLES = int(os.environ.get('TEB_ANOMALY_CLEAR_SAMPLES', '10'))
+# Eventos de mudança de estado mantidos em memória para consulta
+MAX_ANOMALY_EVENTS = 1000
+
+# Colunas de telemetria que entram na matriz do modelo (todas as brutas menos a idade)
+STREAM_FEATURES = tuple(name for name in BASE_FEATURES if name != 'turbine_age')
+# Canais com z-score e EWMA próprios
+CHANNELS = ('vibration_level', 'power_efficiency')
+# Detectores, na ordem dos bits de _reasons
+DETECTORS = ('model',) + tuple(f'{channel}_{kind}' for kind in ('zscore', 'ewma') for channel in CHANNELS)
+
+_COLUMN_INDEX = [COLUMNS.index(name) for name in STREAM_FEATURES]
+_STREAM_INDEX = [BASE_FEATURES.index(name) for name in STREAM_FEATURES]
+_AGE_INDEX = BASE_FEATURES.index('turbine_age')
+_CHANNEL_INDEX = [FEATURE_NAMES.index(channel) for channel in CHANNELS]
+
+
+class StreamingAnomalyDetector:
+    """Detecção contínua de anomalias sobre a telemetria recebida
+
+    Cada flush da ingestão é um micro-lote: todas as amostras são pontuadas
+    de uma vez pelo detector de anomalias do modelo, e cada turbina tem, em
+    arrays pré-alocados (uma linha por turbina), uma janela circular dos
+    canais de CHANNELS para o z-score, médias e variâncias exponenciais
+    (EWMA) e a média exponencial do score do modelo. Nada é alocado por
+    amostra: as amostras do lote são processadas em rodadas vetorizadas, uma
+    por posição de chegada dentro da turbina (em geral uma ou duas rodadas).
+
+    Uma turbina entra em anomalia depois de trigger_samples amostras seguidas
+    sinalizadas por algum detector e sai depois de clear_samples normais
+    seguidas. Só essas mudanças de estado geram eventos, repassados aos
+    listeners registrados com add_event_listener.
+
+    Com init_app, cada lote gravado vai também para o diário de telemetria
+    (telemetry_journal), e o detector reaplica, em ordem de seq, os lotes
+    gravados por outros processos antes do próprio lote e antes de cada
+    leitura. Assim todos os workers do gunicorn têm o mesmo estado, e só o
+    worker que gravou o lote repassa os eventos dele.
+    """
+
+    def __init__(self, model, window=ANOMALY_WINDOW, min_samples=ANOMALY_MIN_SAMPLES,
+                 z_threshold=ANOMALY_Z_THRESHOLD, alpha=ANOMALY_EWMA_ALPHA,
+                 model_threshold=ANOMALY_MODEL_THRESHOLD, trigger_samples=ANOMALY_TRIGGER_SAMPLES,
+                 clear_samples=ANOMALY_CLEAR_SAMPLES, capacity=64):
+        self.model = model
+        self.window = window
+        self.min_samples = min_samples
+        self.z_threshold = z_threshold
+        self.alpha = alpha
+        self.model_threshold = model_threshold
+        self.trigger_samples = trigger_samples
+        self.clear_samples = clear_samples
+        self.engine = None
+        self._lock = threading.Lock()
+        # Ordem dos lotes: tomado do diário até o fim do flush (ou da leitura)
+        self._sync_lock = threading.RLock()
+        self._cursor = 0
+        self._listeners = []
+        self._events = collections.deque(maxlen=MAX_ANOMALY_EVENTS)
+        self._slots = {}
+        self._ids = []
+        self._allocate(capacity)
+        self._stats = {
+            'samples': 0,
+            'batches': 0,
+            'events': 0,
+            'unscored_samples': 0,
+            'last_batch_rows': 0,
+            'last_batch_ms': None,
+            'max_batch_ms': None,
+            'replayed_batches': 0,
+            'resets': 0
+        }
+
+    def init_app(self, app):
+        """Liga o detector ao banco e reaplica o diário de telemetria retido"""
+        with app.app_context():
+            self.engine = db.engine
+        self.sync()
+
+    def add_event_listener(self, listener):
+        """Registra listener(connection, events), chamado na transação de cada flush com eventos
+
+        Como os listeners de flush, pode retornar finish(committed), chamado
+        depois do commit (True) ou do rollback (False) do flush.
+        """
+        self._listeners.append(listener)
+
+    def observe_rows(self, connection, rows):
+        """Listener de flush da ingestão: processa o lote dentro da transação do flush
+
+        O lote entra no diário e, depois dos lotes de outros processos ainda
+        não vistos, nas janelas, médias e contadores. Se o flush for desfeito
+        (as linhas voltam ao buffer), o estado das turbinas do lote, os
+        eventos e os contadores voltam ao que eram, então nenhuma amostra é
+        contada duas vezes.
+        """
+        self._sync_lock.acquire()
+        checkpoint = None
+        finishers = []
+        try:
+            seq = telemetry_store.append_journal(connection, rows) if self.engine is not None else None
+            self.sync(connection, before=seq)
+            checkpoint = self._checkpoint(rows)
+            events = self.process(rows)
+            if events:
+                for listener in self._listeners:
+                    finish = listener(connection, events)
+                    if finish is not None:
+                        finishers.append(finish)
+        except Exception:
+            self._finish(None, checkpoint, finishers, False)
+            raise
+        return functools.partial(self._finish, seq, checkpoint, finishers)
+
+    def sync(self, connection=None, before=None):
+        """Processa os lotes do diário ainda não vistos (gravados por outros processos)
+
+        Sem connection, lê numa transação de leitura própria. Eventos desses
+        lotes não são repassados: o processo que gravou o lote já os repassou.
+        Se lotes ainda não vistos já foram descartados do diário, o estado é
+        zerado e refeito com os lotes retidos.
+        """
+        if self.engine is None:
+            return
+        with self._sync_lock:
+            own = connection is None
+            if own:
+                connection = self.engine.raw_connection()
+            try:
+                if own:
+                    cursor = connection.cursor()
+                    cursor.execute('BEGIN')
+                    cursor.close()
+                oldest, batches = telemetry_store.read_journal(connection, self._cursor, before)
+            finally:
+                if own:
+                    connection.rollback()
+                    connection.close()
+            if batches and oldest > self._cursor + 1 and self._ids:
+                self._reset()
+            for seq, rows in batches:
+                self.process(rows, count=False)
+                self._cursor = seq
+                with self._lock:
+                    self._stats['replayed_batches'] += 1
+
+    def process(self, rows, count=True):
+        """Processa amostras (tuplas na ordem de COLUMNS); retorna os eventos gerados
+
+        Com count=False (lotes de outros processos), o estado e os eventos
+        mudam mas os contadores não, para que somados entre os processos
+        contem cada amostra uma vez.
+        """
+        if not rows:
+            return []
+        started = time.perf_counter()
+        columns = list(zip(*rows))
+        ts = np.asarray(columns[1], dtype=np.int64)
+        # None (campo ausente na amostra) vira NaN e é preenchido com o último valor da turbina
+        raw = np.array([columns[i] for i in _COLUMN_INDEX], dtype=np.float64).T
+
+        with self._lock:
+            slots = np.fromiter((self._slot(turbine_id) for turbine_id in columns[0]), np.int64, len(rows))
+            rounds = _arrival_rounds(slots, ts)
+
+            values = np.empty_like(raw)
+            for selected in rounds:
+                k = slots[selected]
+                filled = np.where(np.isnan(raw[selected]), self._last[k], raw[selected])
+                self._last[k] = filled
+                values[selected] = filled
+
+            features = np.empty((len(rows), len(BASE_FEATURES)))
+            features[:, _STREAM_INDEX] = values
+            features[:, _AGE_INDEX] = DEFAULT_TURBINE_AGE
+            X = feature_pipeline.transform(features)
+            scores = self._score(X)
+            channels = X[:, _CHANNEL_INDEX]
+
+            events = []
+            for selected in rounds:
+                events.extend(self._update(slots[selected], ts[selected], channels[selected], scores[selected]))
+
+            elapsed = time.perf_counter() - started
+            self._events.extend(events)
+            if not count:
+                return events
+            self._stats['unscored_samples'] += int(np.count_nonzero(np.isnan(scores)))
+            self._stats['samples'] += len(rows)
+            self._stats['batches'] += 1
+            self._stats['events'] += len(events)
+            self._stats['last_batch_rows'] = len(rows)
+            self._stats['last_batch_ms'] = round(elapsed * 1e3, 3)
+            self._stats['max_batch_ms'] = max(self._stats['max_batch_ms'] or 0.0, self._stats['last_batch_ms'])
+        metrics.observe_span('ml.anomaly_stream', elapsed)
+        return events
+
+    def state(self, turbine_id):
+        """Estado atual de uma turbina (dict), ou None se ela ainda não enviou telemetria"""
+        self.sync()
+        with self._lock:
+            slot = self._slots.get(turbine_id)
+            return self._describe(slot) if slot is not None else None
+
+    def summary(self, turbine_id=None, limit=100):
+        """Turbinas em anomalia e os eventos mais recentes (do mais novo para o mais antigo)
+
+        Os eventos são os repassados por este processo, mais os dos lotes de
+        outros processos reaplicados desde que ele começou.
+        """
+        self.sync()
+        with self._lock:
+            slots = np.flatnonzero(self._anomalous[:len(self._ids)])
+            anomalous = [self._describe(slot) for slot in slots]
+            events = list(self._events)
+        if turbine_id is not None:
+            anomalous = [a for a in anomalous if a['turbine_id'] == turbine_id]
+            events = [e for e in events if e['turbine_id'] == turbine_id]
+        return {
+            'anomalous': anomalous,
+            'events': events[::-1][:limit],
+            'stats': self.stats()
+        }
+
+    def stats(self):
+        self.sync()
+        with self._lock:
+            return {
+                **self._stats,
+                'turbines': len(self._ids),
+                'anomalous': int(self._anomalous[:len(self._ids)].sum())
+            }
+
+    def _finish(self, seq, checkpoint, finishers, committed):
+        try:
+            if committed and seq is not None:
+                self._cursor = seq
+            elif not committed and checkpoint is not None:
+                self._restore(checkpoint)
+            for finish in finishers:
+                finish(committed)
+        finally:
+            self._sync_lock.release()
+
+    def _checkpoint(self, rows):
+        """Cópia do estado das turbinas de rows (criando as que faltam), dos eventos e contadores"""
+        with self._lock:
+            n_ids = len(self._ids)
+            slots = np.unique([self._slot(row[0]) for row in rows])
+            return {
+                'n_ids': n_ids,
+                'slots': slots,
+                'arrays': {name: getattr(self, name)[slots].copy() for name in self._arrays},
+                'events': list(self._events),
+                'stats': dict(self._stats)
+            }
+
+    def _restore(self, checkpoint):
+        with self._lock:
+            for name, saved in checkpoint['arrays'].items():
+                getattr(self, name)[checkpoint['slots']] = saved
+            for turbine_id in self._ids[checkpoint['n_ids']:]:
+                del self._slots[turbine_id]
+            del self._ids[checkpoint['n_ids']:]
+            self._events = collections.deque(checkpoint['events'], maxlen=MAX_ANOMALY_EVENTS)
+            self._stats = checkpoint['stats']
+
+    def _reset(self):
+        """Zera o estado das turbinas e os eventos (os contadores são mantidos)"""
+        with self._lock:
+            capacity = len(self._head)
+            for name in self._arrays:
+                delattr(self, name)
+            self._slots = {}
+            self._ids = []
+            self._events.clear()
+            self._allocate(capacity)
+            self._stats['resets'] += 1
+
+    def _score(self, X):
+        """Score de anomalia do modelo por amostra (NaN sem modelo ou com campos ausentes)"""
+        scores = np.full(len(X), np.nan)
+        complete = ~np.isnan(X).any(axis=1)
+        if self.model.is_trained and complete.any():
+            scores[complete] = self.model.detect_anomalies(X[complete, :len(BASE_FEATURES)])['anomaly_score']
+        return scores
+
+    def _update(self, k, ts, channels, scores):
+        """Uma rodada: no máximo uma amostra por turbina, todas tratadas de uma vez"""
+        reasons = np.zeros(len(k), dtype=np.uint8)
+
+        # Modelo: média exponencial do score, para um ponto isolado não bastar
+        scored = ~np.isnan(scores)
+        previous = self._model_score[k]
+        smoothed = np.where(np.isnan(previous), scores, previous + self.alpha * (scores - previous))
+        smoothed = np.where(scored, smoothed, previous)
+        self._model_score[k] = smoothed
+        self._model_seen[k] += scored
+        reasons |= (self._model_seen[k] >= self.min_samples) & (smoothed < self.model_threshold)
+
+        observed = ~np.isnan(channels).any(axis=1)
+        k_obs = k[observed]
+        c = channels[observed]
+        ready = self._count[k_obs] >= self.min_samples
+
+        # z-score contra a janela anterior à amostra (posições vazias são zero)
+        window = self._windows[k_obs]
+        n = np.maximum(self._count[k_obs], 1)[:, None]
+        mean = window.sum(axis=1) / n
+        var = np.maximum((window * window).sum(axis=1) / n - mean * mean, 1e-12)
+        z = np.abs(c - mean) / np.sqrt(var)
+
+        # EWMA: desvio contra a média e a variância exponenciais anteriores
+        ewma = self._ewma[k_obs]
+        deviation = c - ewma
+        ez = np.abs(deviation) / np.sqrt(np.maximum(self._ewvar[k_obs], 1e-12))
+        first = self._count[k_obs] == 0
+        self._ewma[k_obs] = np.where(first[:, None], c, ewma + self.alpha * deviation)
+        self._ewvar[k_obs] = np.where(
+            first[:, None], 0.0, (1 - self.alpha) * (self._ewvar[k_obs] + self.alpha * deviation * deviation)
+        )
+
+        flags = np.concatenate([z, ez], axis=1) > self.z_threshold
+        bits = (flags & ready[:, None]).astype(np.uint8) << np.arange(1, len(DETECTORS), dtype=np.uint8)
+        reasons[observed] |= np.bitwise_or.reduce(bits, axis=1)
+
+        # Inserção na janela circular
+        head = self._head[k_obs]
+        self._windows[k_obs, head] = c
+        self._head[k_obs] = (head + 1) % self.window
+        self._count[k_obs] = np.minimum(self._count[k_obs] + 1, self.window)
+
+        # Estado com histerese: só as mudanças viram eventos
+        flagged = reasons != 0
+        self._flag_streak[k] = np.where(flagged, self._flag_streak[k] + 1, 0)
+        self._normal_streak[k] = np.where(flagged, 0, self._normal_streak[k] + 1)
+        self._reasons[k] = np.where(self._anomalous[k], self._reasons[k] | reasons, reasons)
+        enter = ~self._anomalous[k] & (self._flag_streak[k] >= self.trigger_samples)
+        leave = self._anomalous[k] & (self._normal_streak[k] >= self.clear_samples)
+        changed = np.flatnonzero(enter | leave)
+        if len(changed) == 0:
+            return []
+
+        events = []
+        for i in changed:
+            slot = k[i]
+            self._anomalous[slot] = enter[i]
+            if enter[i]:
+                self._since[slot] = ts[i]
+            event = {
+                **self._describe(slot),
+                'state': 'anomalous' if enter[i] else 'normal',
+                'timestamp': _format_ts(ts[i])
+            }
+            if leave[i]:
+                self._reasons[slot] = 0
+            events.append(event)
+        return events
+
+    def _describe(self, slot):
+        anomalous = bool(self._anomalous[slot])
+        score = self._model_score[slot]
+        return {
+            'turbine_id': self._ids[slot],
+            'anomalous': anomalous,
+            'since': _format_ts(self._since[slot]) if anomalous else None,
+            'detectors': [name for bit, name in enumerate(DETECTORS) if self._reasons[slot] >> bit & 1],
+            'anomaly_score': None if np.isnan(score) else round(float(score), 4),
+            'ewma': {channel: round(float(self._ewma[slot, i]), 4) for i, channel in enumerate(CHANNELS)},
+            'samples': int(self._count[slot])
+        }
+
+    def _slot(self, turbine_id):
+        slot = self._slots.get(turbine_id)
+        if slot is None:
+            slot = self._slots[turbine_id] = len(self._ids)
+            self._ids.append(turbine_id)
+            if slot >= len(self._head):
+                self._allocate(2 * len(self._head))
+        return slot
+
+    def _allocate(self, capacity):
+        """Aloca (ou dobra, preservando o estado) os arrays por turbina"""
+        n_channels = len(CHANNELS)
+        arrays = {
+            '_windows': np.zeros((capacity, self.window, n_channels)),
+            '_head': np.zeros(capacity, dtype=np.int64),
+            '_count': np.zeros(capacity, dtype=np.int64),
+            '_ewma': np.zeros((capacity, n_channels)),
+            '_ewvar': np.zeros((capacity, n_channels)),
+            '_last': np.full((capacity, len(STREAM_FEATURES)), np.nan),
+            '_model_score': np.full(capacity, np.nan),
+            '_model_seen': np.zeros(capacity, dtype=np.int64),
+            '_anomalous': np.zeros(capacity, dtype=bool),
+            '_flag_streak': np.zeros(capacity, dtype=np.int64),
+            '_normal_streak': np.zeros(capacity, dtype=np.int64),
+            '_reasons': np.zeros(capacity, dtype=np.uint8),
+            '_since': np.zeros(capacity, dtype=np.int64)
+        }
+        for name, array in arrays.items():
+            current = getattr(self, name, None)
+            if current is not None:
+                array[:len(current)] = current
+            setattr(self, name, array)
+        self._arrays = tuple(arrays)
+
+
+def _arrival_rounds(slots, ts):
+    """Índices das amostras agrupados por posição de chegada dentro da turbina
+
+    A rodada r tem a r-ésima amostra (em ordem de ts) de cada turbina, então
+    numa mesma rodada cada turbina aparece no máximo uma vez.
+    """
+    order = np.lexsort((ts, slots))
+    sorted_slots = slots[order]
+    positions = np.arange(len(order))
+    run_start = np.r_[True, sorted_slots[1:] != sorted_slots[:-1]]
+    rank = positions - np.maximum.accumulate(np.where(run_start, positions, 0))
+    return [order[rank == r] for r in range(int(rank.max()) + 1)]
+
+
+def _format_ts(ts):
+    return datetime.datetime.fromtimestamp(int(ts)).isoformat()
+
+
+# Instância global do detector contínuo, alimentada a cada flush da ingestão
+anomaly_stream = StreamingAnomalyDetector(predictive_model)
+telemetry_ingest.add_flush_listener(anomaly_stream.observe_rows)
+anomaly_stream.add_event_listener(lambda connection, events: alert_engine.stage_many(
+    {event['turbine_id']: {'stream_anomaly': 1.0 if event['anomalous'] else 0.0} for event in events},
+    connection
+))
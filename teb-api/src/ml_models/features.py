@@ -0,0 +1,111 @@
+import numpy as np
+
+# Colunas brutas esperadas na entrada, na ordem da matriz do modelo
+BASE_FEATURES = (
+    'wind_speed', 'temperature', 'humidity', 'operating_hours',
+    'power_output', 'vibration_level', 'turbine_age', 'days_since_maintenance'
+)
+
+# Features derivadas, calculadas a partir das colunas brutas
+DERIVED_FEATURES = ('wind_temp_interaction', 'power_efficiency', 'maintenance_urgency')
+
+FEATURE_NAMES = BASE_FEATURES + DERIVED_FEATURES
+
+# Idade (dias desde o início do ano) usada quando a entrada não traz turbine_age:
+# nas previsões com dados simulados e na telemetria, que não tem a idade
+DEFAULT_TURBINE_AGE = 150.0
+
+_BASE_INDEX = {name: i for i, name in enumerate(BASE_FEATURES)}
+
+
+class FeaturePipeline:
+    """Monta a matriz de features do modelo a partir de um único esquema
+
+    Aceita DataFrame, dict de colunas, lista/iterável de dicts (um por
+    amostra), um dict único ou um array NumPy com as colunas de BASE_FEATURES
+    (2D na ordem do esquema, ou estruturado com campos nomeados). A saída é
+    escrita numa matriz pré-alocada, sem alterar nem copiar a entrada.
+    """
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.feature_names = list(FEATURE_NAMES)
+        self.n_features = len(FEATURE_NAMES)
+
+    def transform(self, data, out=None):
+        """Retorna a matriz (n_amostras, n_features) para data"""
+        if isinstance(data, np.ndarray) and data.dtype.names is None:
+            return self._from_matrix(data, out)
+
+        if isinstance(data, dict) and not any(np.ndim(v) for v in data.values()):
+            data = [data]
+
+        if isinstance(data, (list, tuple)) or not hasattr(data, '__getitem__'):
+            return self.transform_records(data, out=out)
+
+        # DataFrame, dict de colunas ou array estruturado: acesso por nome de coluna
+        missing = [name for name in BASE_FEATURES if not self._has_column(data, name)]
+        if missing:
+            raise ValueError(f"Colunas ausentes para as features: {', '.join(missing)}")
+
+        n_samples = len(data[BASE_FEATURES[0]])
+        out = self._allocate(n_samples, out)
+        for i, name in enumerate(BASE_FEATURES):
+            out[:, i] = np.asarray(data[name])
+        return self._add_derived(out)
+
+    def transform_records(self, records, out=None):
+        """Matriz de features para uma sequência ou stream de dicts"""
+        if not isinstance(records, (list, tuple)):
+            records = list(records)
+
+        out = self._allocate(len(records), out)
+        base = out[:, :len(BASE_FEATURES)]
+        try:
+            for i, record in enumerate(records):
+                base[i] = [record[name] for name in BASE_FEATURES]
+        except KeyError as e:
+            raise ValueError(f"Coluna ausente para as features: {e.args[0]}") from None
+        return self._add_derived(out)
+
+    def _from_matrix(self, data, out):
+        if data.ndim != 2 or data.shape[1] != len(BASE_FEATURES):
+            raise ValueError(
+                f"Esperado array (n, {len(BASE_FEATURES)}) com as colunas {', '.join(BASE_FEATURES)}; "
+                f"recebido {data.shape}"
+            )
+        out = self._allocate(data.shape[0], out)
+        out[:, :len(BASE_FEATURES)] = data
+        return self._add_derived(out)
+
+    def _allocate(self, n_samples, out):
+        if out is None:
+            return np.empty((n_samples, self.n_features), dtype=self.dtype)
+        if out.shape != (n_samples, self.n_features):
+            raise ValueError(f"out deve ter formato {(n_samples, self.n_features)}; recebido {out.shape}")
+        return out
+
+    @staticmethod
+    def _has_column(data, name):
+        names = getattr(getattr(data, 'dtype', None), 'names', None)
+        if names is not None:
+            return name in names
+        return name in data
+
+    @staticmethod
+    def _add_derived(out):
+        """Preenche as colunas derivadas in-place a partir das colunas brutas"""
+        wind_speed = out[:, _BASE_INDEX['wind_speed']]
+        n_base = len(BASE_FEATURES)
+
+        # wind_temp_interaction = wind_speed * temperature
+        np.multiply(wind_speed, out[:, _BASE_INDEX['temperature']], out=out[:, n_base])
+        # power_efficiency = power_output / (wind_speed + 0.1)
+        np.divide(out[:, _BASE_INDEX['power_output']], wind_speed + 0.1, out=out[:, n_base + 1])
+        # maintenance_urgency = log1p(days_since_maintenance)
+        np.log1p(out[:, _BASE_INDEX['days_since_maintenance']], out=out[:, n_base + 2])
+        return out
+
+
+# Pipeline padrão usado por treinamento, inferência e importância das features
+feature_pipeline = FeaturePipeline()
@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+
+from src.ml_models.features import FEATURE_NAMES
+
+# Dias à frente avaliados por padrão e o máximo aceito pelas rotas
+FORECAST_HORIZON_DAYS = int(os.environ.get('TEB_FORECAST_HORIZON_DAYS', '90'))
+MAX_FORECAST_HORIZON_DAYS = 365
+# Limiares de "tempo até o limiar": os mesmos dos alertas de falha crítica e de disponibilidade
+FAILURE_THRESHOLD = float(os.environ.get('TEB_FORECAST_FAILURE_THRESHOLD', '0.7'))
+AVAILABILITY_THRESHOLD = float(os.environ.get('TEB_FORECAST_AVAILABILITY_THRESHOLD', '95.0'))
+# Quantis reportados (intervalo de 80% e mediana)
+QUANTILES = (0.1, 0.5, 0.9)
+# Fração de failure_probability que vira falha por dia: os dados de treinamento
+# sorteiam uma falha com failure_probability / 10 a cada dia
+DAILY_FAILURE_RATE = 0.1
+# Limites de prioridade das rotas (monitor_closely, schedule_maintenance, immediate_maintenance)
+PRIORITY_THRESHOLDS = (0.2, 0.4, 0.7)
+# Linhas por chamada de apply, para limitar a matriz (linhas x árvores) em memória
+FORECAST_CHUNK_ROWS = 16384
+
+_AGE_INDEX = FEATURE_NAMES.index('turbine_age')
+_MAINTENANCE_INDEX = FEATURE_NAMES.index('days_since_maintenance')
+_URGENCY_INDEX = FEATURE_NAMES.index('maintenance_urgency')
+
+
+def rollout(X, horizon_days):
+    """Repete cada linha de X para os dias 0..horizon_days-1 à frente
+
+    turbine_age e days_since_maintenance avançam um por dia (sem manutenção
+    no período) e maintenance_urgency é recalculada; as demais features ficam
+    nos valores atuais. Retorna (n * horizon_days, n_features), com os dias
+    de cada turbina em linhas consecutivas.
+    """
+    days = np.arange(horizon_days, dtype=X.dtype)
+    rolled = np.repeat(X[:, np.newaxis, :], horizon_days, axis=1)
+    rolled[:, :, _AGE_INDEX] += days
+    rolled[:, :, _MAINTENANCE_INDEX] += days
+    np.log1p(rolled[:, :, _MAINTENANCE_INDEX], out=rolled[:, :, _URGENCY_INDEX])
+    return rolled.reshape(-1, X.shape[1])
+
+
+def tree_predictions(forest, X_scaled, chunk_rows=FORECAST_CHUNK_ROWS):
+    """Saída de cada árvore de uma floresta de regressão: (n_amostras, n_árvores)
+
+    Uma chamada de apply por bloco de linhas devolve a folha de cada amostra
+    em todas as árvores; os valores saem de uma única indexação nos valores
+    das folhas de todas as árvores concatenados. Igual a chamar predict de
+    cada árvore, sem uma passada por árvore.
+    """
+    leaf_values = [estimator.tree_.value[:, 0, 0] for estimator in forest.estimators_]
+    offsets = np.cumsum([0] + [len(values) for values in leaf_values[:-1]])
+    leaf_values = np.concatenate(leaf_values)
+
+    out = np.empty((len(X_scaled), len(offsets)))
+    for start in range(0, len(X_scaled), chunk_rows):
+        leaves = forest.apply(X_scaled[start:start + chunk_rows])
+        out[start:start + chunk_rows] = leaf_values[leaves + offsets]
+    return out
+
+
+def tree_quantiles(per_tree, quantiles=QUANTILES):
+    """Quantis entre as árvores (último eixo); o eixo dos quantis vai para o fim"""
+    return np.moveaxis(np.quantile(per_tree, quantiles, axis=-1), 0, -1)
+
+
+def days_to_failure(failure_paths, quantiles=QUANTILES, daily_rate=DAILY_FAILURE_RATE):
+    """Quantis dos dias até a próxima falha, a partir das trajetórias de cada árvore
+
+    failure_paths tem formato (n, dias, árvores). Cada árvore dá uma taxa
+    diária de falha (daily_rate * probabilidade) e uma curva de sobrevivência;
+    a distribuição prevista é a média das curvas das árvores, então o
+    intervalo inclui tanto a incerteza do modelo quanto a do próprio evento.
+    Retorna (n, quantis) em dias (1 = falha no dia de hoje), NaN quando o
+    quantil fica além do horizonte, e a probabilidade de falha dentro dele.
+    """
+    survival = np.cumprod(1 - daily_rate * failure_paths, axis=1).mean(axis=2)
+    failure_cdf = 1 - survival
+    result = np.full((len(failure_paths), len(quantiles)), np.nan)
+    for j, q in enumerate(quantiles):
+        reached = failure_cdf >= q
+        first = reached.argmax(axis=1)
+        hit = reached[np.arange(len(first)), first]
+        result[hit, j] = first[hit] + 1
+    return result, failure_cdf[:, -1]
+
+
+def point_days_to_failure(failure_probability, horizon_days=FORECAST_HORIZON_DAYS, quantiles=QUANTILES,
+                          daily_rate=DAILY_FAILURE_RATE):
+    """Quantis dos dias até a próxima falha mantendo a probabilidade de hoje constante
+
+    Forma fechada da taxa diária daily_rate * probabilidade (distribuição
+    geométrica): sem projetar as entradas nem avaliar as árvores, então custa
+    o mesmo para qualquer horizonte. Mesmas unidades de days_to_failure
+    (1 = falha no dia de hoje); NaN além de horizon_days. Retorna (n, quantis).
+    """
+    rate = np.clip(daily_rate * np.asarray(failure_probability, dtype=np.float64), 0, 1)[:, np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days = np.ceil(np.log1p(-np.asarray(quantiles)) / np.log1p(-rate))
+    days = np.where(rate >= 1, 1.0, np.maximum(days, 1.0))
+    days[~(days <= horizon_days)] = np.nan
+    return days
+
+
+def days_to_threshold(paths, crossed, quantiles=QUANTILES):
+    """Quantis, entre as árvores, do primeiro dia em que cada trajetória cruza o limiar
+
+    paths tem formato (n, dias, árvores) e crossed(paths) diz, elemento a
+    elemento, se o limiar foi atingido. O quantil é uma das árvores (sem
+    interpolação); NaN quando ela não cruza dentro do horizonte (0 = hoje).
+    """
+    reached = crossed(paths)
+    first = np.where(reached.any(axis=1), reached.argmax(axis=1), np.inf)
+    result = np.quantile(first, quantiles, axis=-1, method='inverted_cdf').T
+    result[np.isinf(result)] = np.nan
+    return result
+
+
+def priority_agreement(per_tree, point):
+    """Fração das árvores na mesma faixa de prioridade que a previsão pontual"""
+    tree_bands = np.digitize(per_tree, PRIORITY_THRESHOLDS, right=True)
+    point_bands = np.digitize(point, PRIORITY_THRESHOLDS, right=True)
+    return (tree_bands == point_bands[:, np.newaxis]).mean(axis=1)
@@ -0,0 +1,219 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+
+import joblib
+import numpy as np
+
+# Diretório padrão do registro de modelos (pode ser trocado por TEB_MODEL_REGISTRY)
+REGISTRY_DIR = os.environ.get(
+    'TEB_MODEL_REGISTRY',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'registry')
+)
+
+MANIFEST_FILE = 'manifest.json'
+BUNDLE_FILE = 'model.joblib'
+ARRAYS_DIR = 'arrays'
+CURRENT_FILE = 'CURRENT'
+FORMAT_VERSION = 1
+
+_VERSION_RE = re.compile(r'^v(\d+)$')
+
+
+class ModelRegistry:
+    """Registro versionado de artefatos do modelo
+
+    Cada versão fica em <root>/vNNNN/ com um manifest.json (versão, data de
+    treinamento, métricas, features e hash dos artefatos), o bundle salvo
+    com joblib e, opcionalmente, as florestas achatadas em arrays/*.npy. Só
+    esses .npy são carregados com mmap_mode='r' e compartilhados pelo page
+    cache entre processos: ao desserializar, as árvores do sklearn copiam os
+    nós para memória própria do processo. O arquivo CURRENT aponta para a
+    versão ativa e é trocado de forma atômica.
+    """
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def list_versions(self):
+        """Lista as versões publicadas, da mais antiga para a mais nova"""
+        if not os.path.isdir(self.root):
+            return []
+        versions = [name for name in os.listdir(self.root)
+                    if _VERSION_RE.match(name) and os.path.isdir(os.path.join(self.root, name))]
+        return sorted(versions, key=lambda name: int(_VERSION_RE.match(name).group(1)))
+
+    def current_version(self):
+        """Retorna a versão ativa, ou None se nada foi publicado"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def version_path(self, version):
+        return os.path.join(self.root, version)
+
+    def load_manifest(self, version=None):
+        """Lê o manifest de uma versão (padrão: a ativa), ou None se não existir"""
+        version = version or self.current_version()
+        if version is None:
+            return None
+        try:
+            with open(os.path.join(self.version_path(version), MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def publish(self, bundle, metrics=None, feature_names=None, trained_at=None, arrays=None):
+        """Grava uma nova versão e a torna ativa; retorna o manifest
+
+        arrays (nome -> ndarray), se informado, é salvo como arquivos .npy
+        separados em arrays/, que load_arrays mapeia em memória.
+        """
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+
+            existing = self.list_versions()
+            next_number = int(_VERSION_RE.match(existing[-1]).group(1)) + 1 if existing else 1
+            version = f'v{next_number:04d}'
+
+            # Montar a versão num diretório temporário e renomear no final
+            tmp_dir = os.path.join(self.root, f'.tmp-{uuid.uuid4().hex}')
+            os.makedirs(tmp_dir)
+            try:
+                bundle_path = os.path.join(tmp_dir, BUNDLE_FILE)
+                joblib.dump(bundle, bundle_path)
+
+                if arrays:
+                    os.makedirs(os.path.join(tmp_dir, ARRAYS_DIR))
+                    for name, array in arrays.items():
+                        np.save(os.path.join(tmp_dir, ARRAYS_DIR, f'{name}.npy'), np.ascontiguousarray(array))
+
+                manifest = {
+                    'format_version': FORMAT_VERSION,
+                    'version': version,
+                    'trained_at': trained_at or datetime.datetime.now().isoformat(),
+                    'published_at': datetime.datetime.now().isoformat(),
+                    'metrics': _to_builtin(metrics or {}),
+                    'feature_names': list(feature_names or []),
+                    'arrays': sorted(arrays) if arrays else [],
+                    'artifacts': {
+                        BUNDLE_FILE: {
+                            'sha256': _sha256(bundle_path),
+                            'size_bytes': os.path.getsize(bundle_path)
+                        }
+                    }
+                }
+                with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+                    json.dump(manifest, f, indent=2)
+
+                os.rename(tmp_dir, self.version_path(version))
+            except Exception:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+
+            self._set_current(version)
+            return manifest
+
+    def artifact_info(self, version):
+        """Caminho, mtime, tamanho e sha256 (do manifest) do bundle de uma versão"""
+        path = os.path.join(self.version_path(version), BUNDLE_FILE)
+        stat = os.stat(path)
+        manifest = self.load_manifest(version) or {}
+        return {
+            'path': path,
+            'mtime': datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            'size_bytes': stat.st_size,
+            'sha256': manifest.get('artifacts', {}).get(BUNDLE_FILE, {}).get('sha256')
+        }
+
+    def current_pointer_mtime(self):
+        """mtime do arquivo CURRENT (um único stat), ou None se não existir"""
+        try:
+            return os.stat(os.path.join(self.root, CURRENT_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self, version=None):
+        """Carrega (bundle, manifest) de uma versão (padrão: a ativa)
+
+        Retorna (None, None) se não houver versão publicada.
+        """
+        version = version or self.current_version()
+        if version is None:
+            return None, None
+
+        manifest = self.load_manifest(version)
+        if manifest is None:
+            return None, None
+
+        bundle = joblib.load(os.path.join(self.version_path(version), BUNDLE_FILE))
+        return bundle, manifest
+
+    def load_arrays(self, version=None, mmap_mode='r'):
+        """Carrega os arrays .npy de uma versão, ou None se ela não tiver arrays"""
+        manifest = self.load_manifest(version)
+        if manifest is None or not manifest.get('arrays'):
+            return None
+
+        arrays_dir = os.path.join(self.version_path(manifest['version']), ARRAYS_DIR)
+        return {
+            name: np.load(os.path.join(arrays_dir, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in manifest['arrays']
+        }
+
+    def activate(self, version):
+        """Torna uma versão já publicada a versão ativa (rollback)"""
+        if version not in self.list_versions():
+            raise ValueError(f'Versão {version} não encontrada')
+        with self._lock:
+            self._set_current(version)
+
+    def prune(self, keep=5):
+        """Remove as versões mais antigas, mantendo as keep mais novas e a ativa"""
+        with self._lock:
+            current = self.current_version()
+            versions = self.list_versions()
+            removed = []
+            for version in versions[:max(0, len(versions) - keep)]:
+                if version != current:
+                    shutil.rmtree(self.version_path(version), ignore_errors=True)
+                    removed.append(version)
+            return removed
+
+    def _set_current(self, version):
+        tmp_path = os.path.join(self.root, f'.{CURRENT_FILE}.{uuid.uuid4().hex}')
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(self.root, CURRENT_FILE))
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _to_builtin(value):
+    """Converte escalares NumPy em tipos nativos para o JSON do manifest"""
+    if isinstance(value, dict):
+        return {k: _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+# Instância global do registro
+model_registry = ModelRegistry()
@@ -0,0 +1,69 @@
+import os
+import threading
+
+from src.ml_models.model_registry import model_registry
+from src.ml_models.predictive_model import predictive_model
+
+# Intervalo (segundos) entre verificações do ponteiro CURRENT; 0 desliga o watcher
+WATCH_INTERVAL = float(os.environ.get('TEB_MODEL_WATCH_INTERVAL', '0'))
+
+
+class ModelWatcher:
+    """Recarrega o modelo quando a versão ativa do registro muda
+
+    Cada verificação é um único stat() no arquivo CURRENT; o carregamento só
+    acontece quando o mtime muda e a versão apontada difere da carregada.
+    Útil quando outro processo publica modelos no mesmo registro.
+    """
+
+    def __init__(self, model, registry, interval):
+        self.model = model
+        self.registry = registry
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_mtime = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return False
+        self._last_mtime = self.registry.current_pointer_mtime()
+        self._thread = threading.Thread(target=self._loop, name='model-watcher', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _after_fork(self):
+        # O thread não sobrevive ao fork: cada worker (gunicorn --preload) vigia o registro
+        running = self._thread is not None and not self._stop.is_set()
+        self._thread = None
+        self._stop = threading.Event()
+        if running:
+            self.start()
+
+    def check(self):
+        """Recarrega se o ponteiro mudou; retorna True se houve recarga"""
+        mtime = self.registry.current_pointer_mtime()
+        if mtime is None or mtime == self._last_mtime:
+            return False
+        self._last_mtime = mtime
+
+        if self.registry.current_version() == self.model.version:
+            return False
+        return self.model.reload(self.registry)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.check():
+                    print(f"Modelo recarregado: versão {self.model.version}")
+            except Exception as e:
+                print(f"Falha ao recarregar o modelo: {e}")
+
+
+# Instância global do watcher (iniciada em main.py se TEB_MODEL_WATCH_INTERVAL > 0)
+model_watcher = ModelWatcher(predictive_model, model_registry, WATCH_INTERVAL)
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Limites do cache de previsões (podem ser ajustados por variáveis de ambiente)
+CACHE_MAX_ENTRIES = int(os.environ.get('TEB_PREDICTION_CACHE_ENTRIES', '4096'))
+CACHE_MAX_BYTES = int(float(os.environ.get('TEB_PREDICTION_CACHE_MB', '8')) * 1024 * 1024)
+CACHE_TTL = float(os.environ.get('TEB_PREDICTION_CACHE_TTL', '300'))
+
+OUTPUTS = ('failure_probability', 'predicted_availability', 'anomaly_score', 'is_anomaly')
+
+
+class PredictionCache:
+    """Cache LRU das saídas do modelo por (versão do modelo, turbina, features)
+
+    A chave inclui um hash da linha da matriz de features, então uma
+    entrada nunca devolve a previsão de outra entrada; o que muda com nova
+    telemetria ou troca de modelo é só a chave. Mesmo assim as entradas da
+    turbina são descartadas a cada gravação de telemetria e o cache inteiro é
+    limpo a cada troca de modelo, para não ocupar memória com chaves mortas.
+    A memória é limitada por max_entries e por uma estimativa de max_bytes;
+    entradas mais antigas que ttl segundos contam como falta. Cada entrada
+    guarda também a saída de cada árvore de falha (failure_trees), em float32.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    def predict(self, model, turbine_ids, records):
+        """Previsões (dict de arrays, como predict_batch) usando o cache por linha
+
+        Só as linhas sem entrada válida passam pelo modelo, numa única chamada.
+        """
+        X = model.prepare_features(records)
+        version = model.cache_key()
+        keys = [(version, turbine_id, _row_digest(row)) for turbine_id, row in zip(turbine_ids, X)]
+
+        results = {
+            'failure_probability': np.empty(len(X)),
+            'predicted_availability': np.empty(len(X)),
+            'anomaly_score': np.empty(len(X)),
+            'is_anomaly': np.empty(len(X), dtype=bool)
+        }
+        trees = [None] * len(X)
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None or now - entry[0] > self.ttl:
+                    missing.append(i)
+                    continue
+                self._entries.move_to_end(key)
+                for name, value in zip(OUTPUTS, entry[1]):
+                    results[name][i] = value
+                trees[i] = entry[2]
+            self._stats['hits'] += len(X) - len(missing)
+            self._stats['misses'] += len(missing)
+
+        if missing:
+            batch = model.predict_matrix(X[missing])
+            for name in OUTPUTS:
+                results[name][missing] = batch[name]
+            for j, i in enumerate(missing):
+                trees[i] = batch['failure_trees'][j]
+            # Não guardar se o modelo foi trocado durante a previsão
+            if model.cache_key() == version:
+                self._store([keys[i] for i in missing], batch, now)
+        results['failure_trees'] = np.vstack(trees) if trees else np.empty((0, 0))
+        return results
+
+    def invalidate_turbines(self, turbine_ids):
+        """Descarta as entradas das turbinas informadas (ex.: chegou telemetria nova)"""
+        turbine_ids = set(turbine_ids)
+        with self._lock:
+            stale = [key for key in self._entries if key[1] in turbine_ids]
+            for key in stale:
+                self._remove(key)
+            self._stats['invalidations'] += len(stale)
+
+    def clear(self, *_):
+        with self._lock:
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_ratio': round(self._stats['hits'] / lookups, 4) if lookups else None,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl
+            }
+
+    def _store(self, keys, batch, now):
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = tuple(batch[name][i].item() for name in OUTPUTS)
+                trees = batch['failure_trees'][i].astype(np.float32)
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = (now, value, trees)
+                self._bytes += _entry_size(key, value, trees)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def _remove(self, key):
+        _, value, trees = self._entries.pop(key)
+        self._bytes -= _entry_size(key, value, trees)
+
+
+def _row_digest(row):
+    return hashlib.blake2b(np.ascontiguousarray(row).tobytes(), digest_size=16).digest()
+
+
+def _entry_size(key, value, trees):
+    """Estimativa do tamanho de uma entrada em bytes (chave, valores, árvores e nó do OrderedDict)"""
+    return (
+        sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+        + sys.getsizeof(value) + sum(sys.getsizeof(part) for part in value)
+        + sys.getsizeof(trees)
+        + 100
+    )
+
+
+# Instância global do cache de previsões
+prediction_cache = PredictionCache()
@@ -5,9 +5,52 @@ from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
+import copy
 import datetime
-import pickle
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ml_models.model_registry import model_registry
+from src.ml_models.tree_engine import CompiledEnsemble
+from src.ml_models.features import feature_pipeline, DEFAULT_TURBINE_AGE
+from src.ml_models.forecasting import (
+    FORECAST_HORIZON_DAYS, FAILURE_THRESHOLD, AVAILABILITY_THRESHOLD, QUANTILES,
+    rollout, tree_predictions, tree_quantiles, days_to_failure, days_to_threshold, priority_agreement
+)
+from src.services.turbine_registry import turbine_registry
+from src.services.metrics import metrics
+
+# Treinamento paralelo: os três estimadores ao mesmo tempo, cada floresta
+# usando TEB_TRAIN_N_JOBS núcleos (-1 = todos)
+TRAIN_PARALLEL = os.environ.get('TEB_TRAIN_PARALLEL', '0').lower() in ('1', 'true', 'yes')
+TRAIN_N_JOBS = int(os.environ.get('TEB_TRAIN_N_JOBS', '-1'))
+
+# Janela padrão dos dados sintéticos de treinamento (mesmos padrões de generate_training_data)
+TRAINING_DATA_DEFAULTS = {'n_turbines': None, 'start': '2025-01-01', 'end': '2025-06-30', 'freq': 'D', 'seed': 42}
+
+# Retreino incremental: árvores novas por floresta a cada rodada, limite de
+# árvores por floresta (as mais antigas saem) e tamanho padrão da janela nova
+INCREMENTAL_TREES = int(os.environ.get('TEB_INCREMENTAL_TREES', '20'))
+MAX_TREES = int(os.environ.get('TEB_MAX_TREES', '200'))
+INCREMENTAL_WINDOW_DAYS = int(os.environ.get('TEB_INCREMENTAL_WINDOW_DAYS', '30'))
+
+# Backend de inferência: 'sklearn' (padrão) ou 'compiled' (florestas achatadas
+# em arrays NumPy, ver tree_engine.py). O backend compilado só é usado em lotes
+# de até COMPILED_MAX_BATCH linhas; lotes maiores ficam mais rápidos no sklearn.
+INFERENCE_BACKEND = os.environ.get('TEB_INFERENCE_BACKEND', 'sklearn')
+COMPILED_MAX_BATCH = int(os.environ.get('TEB_COMPILED_MAX_BATCH', '32'))
+COMPILED_TOLERANCE = 1e-6
+
+# Entrada usada na previsão de aquecimento após o carregamento
+WARMUP_SAMPLE = {
+    'wind_speed': 12.0, 'temperature': 25.0, 'humidity': 60.0, 'operating_hours': 20.0,
+    'power_output': 2.0, 'vibration_level': 2.0, 'turbine_age': DEFAULT_TURBINE_AGE, 'days_since_maintenance': 30.0
+}
+
+# Amostras por bloco de geração; cada bloco tem seu próprio gerador aleatório
+SAMPLES_PER_BLOCK = 65536
 
 class TurbinePredictiveModel:
     def __init__(self):
@@ -16,190 +59,593 @@ class TurbinePredictiveModel:
         self.anomaly_detector = None
         self.scaler = StandardScaler()
         self.is_trained = False
+        self.version = None
+        self.trained_at = None
+        self.metrics = None
+        self.feature_names = None
+        self.manifest = None
+        self.ready = False
+        self.load_info = None
+        self.compiled = None
+        self.inference_backend = INFERENCE_BACKEND
+        self.feature_pipeline = feature_pipeline
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._swap_listeners = []
+    
+    def _components(self):
+        """Retorna scaler e estimadores como um conjunto consistente"""
+        with self._lock:
+            return self.scaler, self.failure_model, self.availability_model, self.anomaly_detector, self.compiled
+    
+    def add_swap_listener(self, listener):
+        """Registra listener(model), chamado depois de cada swap_in"""
+        self._swap_listeners.append(listener)
+    
+    def swap_in(self, other):
+        """Substitui atomicamente os estimadores por os de outro modelo treinado"""
+        self._swap(other)
+        for listener in self._swap_listeners:
+            listener(self)
+    
+    def _swap(self, other):
+        with self._lock:
+            self.failure_model = other.failure_model
+            self.availability_model = other.availability_model
+            self.anomaly_detector = other.anomaly_detector
+            self.scaler = other.scaler
+            self.is_trained = other.is_trained
+            self.version = other.version
+            self.trained_at = other.trained_at
+            self.metrics = other.metrics
+            self.feature_names = other.feature_names
+            self.manifest = other.manifest
+            self.ready = other.ready
+            self.load_info = other.load_info
+            self.compiled = other.compiled
+    
+    def iter_training_data(self, n_turbines=None, start='2025-01-01', end='2025-06-30',
+                           freq='D', seed=42, chunk_rows=1_000_000):
+        """Gera dados sintéticos de treinamento em blocos de no máximo chunk_rows linhas
+
+        Cada bloco de SAMPLES_PER_BLOCK amostras de uma turbina usa um gerador
+        próprio derivado de (seed, turbina, bloco), então o resultado é o mesmo
+        para a mesma seed independentemente de chunk_rows.
+        """
+        # Perfis base vindos do cadastro; além da frota cadastrada, turbinas
+        # sintéticas repetem os perfis em ciclo
+        fleet = turbine_registry.index()
+        if n_turbines is None:
+            n_turbines = len(fleet)
         
-    def generate_training_data(self):
-        """Gera dados sintéticos para treinamento baseados nos padrões reais"""
-        np.random.seed(42)
+        turbines = [fleet.ids[i] if i < len(fleet) else f'TEB{i + 1:03d}' for i in range(n_turbines)]
+        rows = np.arange(n_turbines) % len(fleet)
+        profiles = {
+            field: getattr(fleet, field)[rows]
+            for field in ('base_failure_rate', 'base_availability', 'base_mttr')
+        }
         
-        # Dados base das turbinas
-        turbines = ['TEB001', 'TEB002', 'TEB003', 'TEB004', 'TEB005', 'TEB006', 'TEB007', 'TEB008']
+        dates = pd.date_range(start=start, end=end, freq=freq)
+        n_dates = len(dates)
+        start_ts = pd.Timestamp(start)
         
-        # Gerar 6 meses de dados históricos (180 dias)
-        dates = pd.date_range(start='2025-01-01', end='2025-06-30', freq='D')
+        # Fatores dependentes só da data, calculados uma vez para toda a frota
+        day_of_year = dates.dayofyear.to_numpy()
+        seasonal_wave = np.sin(2 * np.pi * day_of_year / 365)
+        turbine_age = ((dates - start_ts) // pd.Timedelta(days=1)).to_numpy()
         
-        data = []
+        chunk_rows = max(chunk_rows, 1)
+        blocks = [(t, b) for t in range(n_turbines) for b in range(0, n_dates, SAMPLES_PER_BLOCK)]
         
-        for turbine in turbines:
-            base_failure_rate = {
-                'TEB001': 0.8, 'TEB002': 0.4, 'TEB003': 0.3, 'TEB004': 0.5,
-                'TEB005': 0.3, 'TEB006': 0.3, 'TEB007': 0.3, 'TEB008': 0.3
-            }[turbine]
-            
-            base_availability = {
-                'TEB001': 26.24, 'TEB002': 97.07, 'TEB003': 98.52, 'TEB004': 92.88,
-                'TEB005': 96.88, 'TEB006': 98.19, 'TEB007': 97.96, 'TEB008': 97.97
-            }[turbine]
+        pending = []
+        pending_rows = 0
+        for t, b in blocks:
+            block_len = min(SAMPLES_PER_BLOCK, n_dates - b)
+            pending.append((t, b, block_len))
+            pending_rows += block_len
+            if pending_rows >= chunk_rows:
+                yield self._generate_blocks(pending, turbines, profiles, dates, seasonal_wave, turbine_age, seed)
+                pending = []
+                pending_rows = 0
+        
+        if pending:
+            yield self._generate_blocks(pending, turbines, profiles, dates, seasonal_wave, turbine_age, seed)
+    
+    def _generate_blocks(self, blocks, turbines, profiles, dates, seasonal_wave, turbine_age, seed):
+        """Gera um DataFrame com os blocos (turbina, início, tamanho) informados"""
+        n = sum(block_len for _, _, block_len in blocks)
+        
+        turbine_idx = np.empty(n, dtype=np.int64)
+        date_idx = np.empty(n, dtype=np.int64)
+        columns = {name: np.empty(n) for name in (
+            'wind_speed', 'temperature', 'humidity', 'operating_hours', 'power_output',
+            'vibration_level', 'days_since_maintenance', 'has_failure_draw'
+        )}
+        
+        pos = 0
+        for t, b, block_len in blocks:
+            rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(t, b)))
+            sl = slice(pos, pos + block_len)
             
-            for date in dates:
-                # Fatores ambientais
-                day_of_year = date.timetuple().tm_yday
-                seasonal_factor = 1 + 0.3 * np.sin(2 * np.pi * day_of_year / 365)
-                
-                wind_speed = np.random.normal(12, 3)
-                wind_speed = max(0, min(25, wind_speed))
-                
-                temperature = 25 + 10 * np.sin(2 * np.pi * day_of_year / 365) + np.random.normal(0, 5)
-                temperature = max(-10, min(45, temperature))
-                
-                humidity = np.random.normal(60, 15)
-                humidity = max(0, min(100, humidity))
-                
-                # Fatores operacionais
-                operating_hours = np.random.normal(20, 4)
-                operating_hours = max(0, min(24, operating_hours))
-                
-                power_output = min(2.5, max(0, wind_speed * 0.15 + np.random.normal(0, 0.2)))
-                
-                vibration_level = np.random.normal(2, 0.5) * (1 + 0.1 * (wind_speed - 12))
-                vibration_level = max(0, vibration_level)
-                
-                # Idade da turbina (em dias desde início do ano)
-                turbine_age = (date - pd.Timestamp('2025-01-01')).days
-                
-                # Manutenção recente (simulada)
-                days_since_maintenance = np.random.exponential(30)
-                
-                # Calcular probabilidade de falha
-                failure_prob = base_failure_rate * seasonal_factor
-                failure_prob *= (1 + 0.01 * turbine_age)  # Degradação com o tempo
-                failure_prob *= (1 + max(0, (wind_speed - 15) * 0.05))  # Vento alto
-                failure_prob *= (1 + max(0, (temperature - 35) * 0.02))  # Temperatura alta
-                failure_prob *= (1 + max(0, (vibration_level - 3) * 0.1))  # Vibração alta
-                failure_prob *= (1 + max(0, (days_since_maintenance - 60) * 0.005))  # Manutenção atrasada
-                
-                # Normalizar probabilidade
-                failure_prob = min(1.0, max(0.0, failure_prob))
-                
-                # Calcular disponibilidade
-                availability = base_availability
-                availability *= (1 - 0.1 * failure_prob)  # Redução por falhas
-                availability *= (1 - max(0, (wind_speed - 20) * 0.01))  # Vento extremo
-                availability = min(100, max(0, availability))
-                
-                # Simular falha real
-                has_failure = np.random.random() < failure_prob / 10  # Reduzir frequência
-                
-                data.append({
-                    'turbine_id': turbine,
-                    'date': date,
-                    'wind_speed': wind_speed,
-                    'temperature': temperature,
-                    'humidity': humidity,
-                    'operating_hours': operating_hours,
-                    'power_output': power_output,
-                    'vibration_level': vibration_level,
-                    'turbine_age': turbine_age,
-                    'days_since_maintenance': days_since_maintenance,
-                    'failure_probability': failure_prob,
-                    'availability': availability,
-                    'has_failure': has_failure
-                })
-        
-        return pd.DataFrame(data)
-    
-    def prepare_features(self, df):
-        """Prepara features para o modelo"""
-        features = [
-            'wind_speed', 'temperature', 'humidity', 'operating_hours',
-            'power_output', 'vibration_level', 'turbine_age', 'days_since_maintenance'
-        ]
-        
-        # Adicionar features derivadas
-        df['wind_temp_interaction'] = df['wind_speed'] * df['temperature']
-        df['power_efficiency'] = df['power_output'] / (df['wind_speed'] + 0.1)
-        df['maintenance_urgency'] = np.log1p(df['days_since_maintenance'])
-        
-        features.extend(['wind_temp_interaction', 'power_efficiency', 'maintenance_urgency'])
-        
-        return df[features]
-    
-    def train_models(self):
-        """Treina os modelos preditivos"""
+            turbine_idx[sl] = t
+            date_idx[sl] = np.arange(b, b + block_len)
+            columns['wind_speed'][sl] = rng.normal(12, 3, block_len)
+            columns['temperature'][sl] = rng.normal(0, 5, block_len)
+            columns['humidity'][sl] = rng.normal(60, 15, block_len)
+            columns['operating_hours'][sl] = rng.normal(20, 4, block_len)
+            columns['power_output'][sl] = rng.normal(0, 0.2, block_len)
+            columns['vibration_level'][sl] = rng.normal(2, 0.5, block_len)
+            columns['days_since_maintenance'][sl] = rng.exponential(30, block_len)
+            columns['has_failure_draw'][sl] = rng.random(block_len)
+            pos += block_len
+        
+        base_failure_rate = profiles['base_failure_rate'][turbine_idx]
+        base_availability = profiles['base_availability'][turbine_idx]
+        base_mttr = profiles['base_mttr'][turbine_idx]
+        wave = seasonal_wave[date_idx]
+        age = turbine_age[date_idx]
+        
+        # Fatores ambientais
+        wind_speed = np.clip(columns['wind_speed'], 0, 25)
+        temperature = np.clip(25 + 10 * wave + columns['temperature'], -10, 45)
+        humidity = np.clip(columns['humidity'], 0, 100)
+        
+        # Fatores operacionais
+        operating_hours = np.clip(columns['operating_hours'], 0, 24)
+        power_output = np.clip(wind_speed * 0.15 + columns['power_output'], 0, 2.5)
+        vibration_level = np.maximum(0, columns['vibration_level'] * (1 + 0.1 * (wind_speed - 12)))
+        days_since_maintenance = columns['days_since_maintenance']
+        
+        # Calcular probabilidade de falha
+        failure_prob = base_failure_rate * (1 + 0.3 * wave)
+        failure_prob *= 1 + 0.01 * age  # Degradação com o tempo
+        failure_prob *= 1 + np.maximum(0, (wind_speed - 15) * 0.05)  # Vento alto
+        failure_prob *= 1 + np.maximum(0, (temperature - 35) * 0.02)  # Temperatura alta
+        failure_prob *= 1 + np.maximum(0, (vibration_level - 3) * 0.1)  # Vibração alta
+        failure_prob *= 1 + np.maximum(0, (days_since_maintenance - 60) * 0.005)  # Manutenção atrasada
+        failure_prob = np.clip(failure_prob, 0.0, 1.0)
+        
+        # Calcular disponibilidade
+        availability = base_availability * (1 - 0.1 * failure_prob)  # Redução por falhas
+        availability *= 1 - np.maximum(0, (wind_speed - 20) * 0.01)  # Vento extremo
+        availability = np.clip(availability, 0, 100)
+        
+        # Simular falha real
+        has_failure = columns['has_failure_draw'] < failure_prob / 10  # Reduzir frequência
+        
+        return pd.DataFrame({
+            'turbine_id': pd.Categorical.from_codes(turbine_idx, categories=turbines),
+            'date': dates[date_idx],
+            'wind_speed': wind_speed,
+            'temperature': temperature,
+            'humidity': humidity,
+            'operating_hours': operating_hours,
+            'power_output': power_output,
+            'vibration_level': vibration_level,
+            'turbine_age': age,
+            'days_since_maintenance': days_since_maintenance,
+            'failure_probability': failure_prob,
+            'availability': availability,
+            'has_failure': has_failure,
+            'downtime_hours': np.where(has_failure, base_mttr, 0.0)  # Parada estimada pelo MTTR da turbina
+        })
+    
+    def generate_training_data(self, n_turbines=None, start='2025-01-01', end='2025-06-30',
+                               freq='D', seed=42):
+        """Gera dados sintéticos para treinamento baseados nos padrões reais"""
+        chunks = list(self.iter_training_data(n_turbines=n_turbines, start=start, end=end,
+                                              freq=freq, seed=seed))
+        if len(chunks) == 1:
+            return chunks[0]
+        return pd.concat(chunks, ignore_index=True)
+    
+    def prepare_features(self, data, out=None):
+        """Prepara a matriz de features para o modelo (sem alterar a entrada)
+
+        Aceita os mesmos formatos de FeaturePipeline.transform: DataFrame,
+        dict de colunas, lista de dicts, dict único ou array NumPy.
+        """
+        with metrics.span('ml.featurize'):
+            return self.feature_pipeline.transform(data, out=out)
+    
+    def train_models(self, progress_callback=None, parallel=None, n_jobs=None, **data_options):
+        """Treina os modelos preditivos
+
+        data_options é repassado a generate_training_data (n_turbines, start,
+        end, freq, seed). progress_callback, se informado, é chamado como
+        progress_callback(fase, progresso) no início de cada fase.
+        
+        Com parallel=True os três estimadores são treinados ao mesmo tempo e
+        cada floresta usa n_jobs núcleos (-1 = todos). Os padrões vêm de
+        TEB_TRAIN_PARALLEL e TEB_TRAIN_N_JOBS.
+        """
+        if parallel is None:
+            parallel = TRAIN_PARALLEL
+        if n_jobs is None:
+            n_jobs = TRAIN_N_JOBS if parallel else None
+        report = _progress_reporter(progress_callback)
+        
+        report('generate_data', 0.0)
         print("Gerando dados de treinamento...")
-        df = self.generate_training_data()
+        with metrics.span('ml.train.generate_data'):
+            df = self.generate_training_data(**data_options)
         
+        report('prepare_features', 0.2)
         print("Preparando features...")
-        X = self.prepare_features(df)
+        with metrics.span('ml.train.featurize'):
+            X = self.feature_pipeline.transform(df)
         
         # Normalizar features
         X_scaled = self.scaler.fit_transform(X)
         
-        # Treinar modelo de previsão de falhas
-        print("Treinando modelo de previsão de falhas...")
-        y_failure = df['failure_probability']
-        X_train, X_test, y_train, y_test = train_test_split(X_scaled, y_failure, test_size=0.2, random_state=42)
+        # Separar treino/teste (as mesmas linhas para os dois alvos)
+        train_rows, test_rows = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+        y_failure = df['failure_probability'].to_numpy()
+        y_availability = df['availability'].to_numpy()
+        
+        estimators = _new_estimators(n_jobs)
+        fit_jobs = {
+            'failure_model': (estimators['failure_model'], X_scaled[train_rows], y_failure[train_rows]),
+            'availability_model': (estimators['availability_model'], X_scaled[train_rows], y_availability[train_rows]),
+            'anomaly_detector': (estimators['anomaly_detector'], X_scaled, None)
+        }
+        fitted, fit_wall_time = _fit_estimators(fit_jobs, parallel, n_jobs, report)
+        
+        self.failure_model = fitted['failure_model'][0]
+        self.availability_model = fitted['availability_model'][0]
+        self.anomaly_detector = fitted['anomaly_detector'][0]
+        
+        # Avaliar modelos de falhas e de disponibilidade
+        report('evaluate', 0.9)
+        quality = _evaluate(self.failure_model, self.availability_model, X_scaled[test_rows],
+                            y_failure[test_rows], y_availability[test_rows])
+        print(f"Modelo de falhas - MAE: {quality['failure_mae']:.4f}, R²: {quality['failure_r2']:.4f}")
+        print(f"Modelo de disponibilidade - MAE: {quality['availability_mae']:.4f}, R²: {quality['availability_r2']:.4f}")
+        
+        self.is_trained = True
+        self.trained_at = datetime.datetime.now().isoformat()
+        self.feature_names = list(self.feature_pipeline.feature_names)
+        print("Treinamento concluído!")
+        
+        self.metrics = {
+            **quality,
+            'training': {
+                'mode': 'full',
+                'data': {**TRAINING_DATA_DEFAULTS, **data_options},
+                'increments': 0,
+                'parallel': bool(parallel),
+                'n_jobs': n_jobs,
+                'cpu_count': os.cpu_count(),
+                'fit_wall_time': round(fit_wall_time, 4),
+                'model_wall_time': {name: round(elapsed, 4) for name, (_, elapsed) in fitted.items()}
+            }
+        }
+        return self.metrics
+    
+    def train_incremental(self, base, progress_callback=None, new_trees=None, max_trees=None,
+                          baseline=True, parallel=None, n_jobs=None, **data_options):
+        """Retreina a partir de um modelo já treinado usando só a janela recente
+
+        O modelo base não é alterado; o resultado fica nesta instância. Passos:
+        gera só a janela nova (data_options; padrão: INCREMENTAL_WINDOW_DAYS
+        dias depois da janela da base), atualiza o scaler com as estatísticas
+        acumuladas (partial_fit), reescreve os limiares das árvores existentes
+        para o novo espaço normalizado (as decisões não mudam), acrescenta
+        new_trees árvores a cada floresta com warm_start e descarta as mais
+        antigas além de max_trees.
+        
+        Com baseline=True também treina do zero no histórico da base mais a
+        parte de treino da janela nova, avaliado nas mesmas linhas de teste, e
+        informa em metrics['delta'] a diferença de MAE/R² e de tempo.
+        """
+        if not base.is_trained:
+            raise ValueError("Modelo base não foi treinado ainda; faça um treinamento completo antes")
+        if new_trees is None:
+            new_trees = INCREMENTAL_TREES
+        if max_trees is None:
+            max_trees = MAX_TREES
+        if new_trees < 1 or max_trees < 1:
+            raise ValueError("new_trees e max_trees devem ser positivos")
+        if parallel is None:
+            parallel = TRAIN_PARALLEL
+        if n_jobs is None:
+            n_jobs = TRAIN_N_JOBS if parallel else None
+        report = _progress_reporter(progress_callback)
+        
+        base_scaler, base_failure, base_availability, base_anomaly, _ = base._components()
+        base_training = (base.metrics or {}).get('training') or {}
+        history = {**TRAINING_DATA_DEFAULTS, **(base_training.get('data') or {})}
+        increment = base_training.get('increments', 0) + 1
+        window = _incremental_window(history, increment, data_options)
+        
+        report('generate_data', 0.0)
+        print(f"Gerando dados da janela {window['start']} a {window['end']}...")
+        with metrics.span('ml.train.generate_data'):
+            df = self.generate_training_data(**window)
+        
+        report('prepare_features', 0.2)
+        with metrics.span('ml.train.featurize'):
+            X = self.feature_pipeline.transform(df)
+        
+        # Estatísticas acumuladas: média e variância de tudo o que a base já viu mais a janela
+        scaler = copy.deepcopy(base_scaler)
+        scaler.partial_fit(X)
+        X_scaled = scaler.transform(X)
         
-        self.failure_model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.failure_model.fit(X_train, y_train)
+        train_rows, test_rows = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+        y_failure = df['failure_probability'].to_numpy()
+        y_availability = df['availability'].to_numpy()
         
-        # Avaliar modelo de falhas
-        y_pred = self.failure_model.predict(X_test)
-        failure_mae = mean_absolute_error(y_test, y_pred)
-        failure_r2 = r2_score(y_test, y_pred)
-        print(f"Modelo de falhas - MAE: {failure_mae:.4f}, R²: {failure_r2:.4f}")
+        def grow(forest):
+            forest = _rescale_forest(forest, base_scaler, scaler)
+            forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + new_trees,
+                              random_state=42 + increment, n_jobs=n_jobs)
+            return forest
         
-        # Treinar modelo de disponibilidade
-        print("Treinando modelo de disponibilidade...")
-        y_availability = df['availability']
-        X_train, X_test, y_train, y_test = train_test_split(X_scaled, y_availability, test_size=0.2, random_state=42)
+        fit_jobs = {
+            'failure_model': (grow(base_failure), X_scaled[train_rows], y_failure[train_rows]),
+            'availability_model': (grow(base_availability), X_scaled[train_rows], y_availability[train_rows]),
+            'anomaly_detector': (grow(base_anomaly), X_scaled, None)
+        }
+        fitted, fit_wall_time = _fit_estimators(fit_jobs, parallel, n_jobs, report)
         
-        self.availability_model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.availability_model.fit(X_train, y_train)
+        retired = {}
+        for name, (estimator, _) in fitted.items():
+            estimator.set_params(warm_start=False)
+            retired[name] = _retire_oldest(estimator, max_trees)
+        anomaly_detector = fitted['anomaly_detector'][0]
+        if retired['anomaly_detector']:
+            # O limiar de anomalia depende das árvores restantes
+            anomaly_detector.offset_ = np.percentile(
+                anomaly_detector.score_samples(X_scaled), 100.0 * anomaly_detector.contamination
+            )
         
-        # Avaliar modelo de disponibilidade
-        y_pred = self.availability_model.predict(X_test)
-        availability_mae = mean_absolute_error(y_test, y_pred)
-        availability_r2 = r2_score(y_test, y_pred)
-        print(f"Modelo de disponibilidade - MAE: {availability_mae:.4f}, R²: {availability_r2:.4f}")
+        self.scaler = scaler
+        self.failure_model = fitted['failure_model'][0]
+        self.availability_model = fitted['availability_model'][0]
+        self.anomaly_detector = anomaly_detector
         
-        # Treinar detector de anomalias
-        print("Treinando detector de anomalias...")
-        self.anomaly_detector = IsolationForest(contamination=0.1, random_state=42)
-        self.anomaly_detector.fit(X_scaled)
+        report('evaluate', 0.85)
+        quality = _evaluate(self.failure_model, self.availability_model, X_scaled[test_rows],
+                            y_failure[test_rows], y_availability[test_rows])
+        print(f"Incremental - falhas MAE: {quality['failure_mae']:.4f}, "
+              f"disponibilidade MAE: {quality['availability_mae']:.4f}")
         
         self.is_trained = True
-        print("Treinamento concluído!")
+        self.trained_at = datetime.datetime.now().isoformat()
+        self.feature_names = list(self.feature_pipeline.feature_names)
+        self.metrics = {
+            **quality,
+            'training': {
+                'mode': 'incremental',
+                'data': {**history, 'end': window['end']},
+                'window': window,
+                'increments': increment,
+                'base_version': base.version,
+                'new_trees': new_trees,
+                'max_trees': max_trees,
+                'retired_trees': retired,
+                'n_estimators': {name: len(estimator.estimators_) for name, (estimator, _) in fitted.items()},
+                'samples_seen': int(np.max(scaler.n_samples_seen_)),
+                'parallel': bool(parallel),
+                'n_jobs': n_jobs,
+                'cpu_count': os.cpu_count(),
+                'fit_wall_time': round(fit_wall_time, 4),
+                'model_wall_time': {name: round(elapsed, 4) for name, (_, elapsed) in fitted.items()}
+            }
+        }
         
+        if baseline:
+            report('baseline', 0.9)
+            print("Treinando do zero para comparação...")
+            reference = self._fit_baseline(history, X[train_rows], y_failure[train_rows],
+                                           y_availability[train_rows], parallel, n_jobs)
+            reference_quality = _evaluate(
+                reference['failure_model'], reference['availability_model'],
+                _standardize(reference['scaler'], X[test_rows]), y_failure[test_rows], y_availability[test_rows]
+            )
+            self.metrics['baseline'] = {
+                **reference_quality,
+                'train_rows': reference['train_rows'],
+                'fit_wall_time': reference['fit_wall_time']
+            }
+            self.metrics['delta'] = {
+                **{name: value - reference_quality[name] for name, value in quality.items()},
+                'fit_wall_time': round(fit_wall_time - reference['fit_wall_time'], 4),
+                'fit_speedup': round(reference['fit_wall_time'] / fit_wall_time, 2) if fit_wall_time > 0 else None
+            }
+            print(f"Diferença para o treino completo - falhas MAE: {self.metrics['delta']['failure_mae']:+.4f}, "
+                  f"disponibilidade MAE: {self.metrics['delta']['availability_mae']:+.4f}, "
+                  f"ajuste {self.metrics['delta']['fit_speedup']}x mais rápido")
+        
+        print("Treinamento incremental concluído!")
+        return self.metrics
+    
+    def _fit_baseline(self, history, X_window, y_failure, y_availability, parallel, n_jobs):
+        """Treino completo de referência: histórico da base mais a janela nova"""
+        with metrics.span('ml.train.baseline'):
+            df = self.generate_training_data(**history)
+            X = np.vstack([self.feature_pipeline.transform(df), X_window])
+            y_failure = np.concatenate([df['failure_probability'].to_numpy(), y_failure])
+            y_availability = np.concatenate([df['availability'].to_numpy(), y_availability])
+            
+            scaler = StandardScaler()
+            X_scaled = scaler.fit_transform(X)
+            estimators = _new_estimators(n_jobs)
+            fit_jobs = {
+                'failure_model': (estimators['failure_model'], X_scaled, y_failure),
+                'availability_model': (estimators['availability_model'], X_scaled, y_availability),
+                'anomaly_detector': (estimators['anomaly_detector'], X_scaled, None)
+            }
+            fitted, fit_wall_time = _fit_estimators(fit_jobs, parallel, n_jobs, verbose=False)
         return {
-            'failure_mae': failure_mae,
-            'failure_r2': failure_r2,
-            'availability_mae': availability_mae,
-            'availability_r2': availability_r2
+            'failure_model': fitted['failure_model'][0],
+            'availability_model': fitted['availability_model'][0],
+            'scaler': scaler,
+            'train_rows': len(X),
+            'fit_wall_time': round(fit_wall_time, 4)
         }
     
-    def predict_failure_probability(self, turbine_data):
-        """Prediz probabilidade de falha para uma turbina"""
+    def predict_batch(self, records):
+        """Prediz falha, disponibilidade e anomalia para várias turbinas de uma vez
+
+        Aceita qualquer entrada de FeaturePipeline.transform (DataFrame, dict de
+        colunas, lista de dicts ou array NumPy) e monta uma única matriz
+        normalizada, fazendo uma chamada por modelo para todo o lote.
+        """
         if not self.is_trained:
             raise ValueError("Modelo não foi treinado ainda")
         
-        # Preparar dados
-        df = pd.DataFrame([turbine_data])
-        X = self.prepare_features(df)
-        X_scaled = self.scaler.transform(X)
+        return self.predict_matrix(self.prepare_features(records))
+    
+    def predict_matrix(self, X):
+        """Como predict_batch, mas recebe a matriz de features já montada
+
+        Além das previsões, retorna failure_trees: a saída de cada árvore de
+        falha, (n, árvores), de onde saem os intervalos e a confiança.
+        """
+        if not self.is_trained:
+            raise ValueError("Modelo não foi treinado ainda")
         
-        # Fazer previsão
-        failure_prob = self.failure_model.predict(X_scaled)[0]
-        availability = self.availability_model.predict(X_scaled)[0]
+        if len(X) == 0:
+            empty = np.empty(0)
+            return {
+                'failure_probability': empty,
+                'predicted_availability': empty,
+                'anomaly_score': empty,
+                'is_anomaly': np.empty(0, dtype=bool),
+                'failure_trees': np.empty((0, 0))
+            }
         
-        # Detectar anomalia
-        anomaly_score = self.anomaly_detector.decision_function(X_scaled)[0]
-        is_anomaly = self.anomaly_detector.predict(X_scaled)[0] == -1
+        scaler, failure_model, availability_model, anomaly_detector, compiled = self._components()
+        with metrics.span('ml.scale'):
+            X_scaled = _standardize(scaler, X)
+        
+        if compiled is not None and self.inference_backend == 'compiled' and len(X) <= COMPILED_MAX_BATCH:
+            # Caminho de baixa latência: travessia das árvores em NumPy puro
+            with metrics.span('ml.compiled_predict'):
+                failure_trees, availability, anomaly_score = compiled.predict_trees(X_scaled)
+            is_anomaly = anomaly_score < 0
+        else:
+            # Uma chamada por modelo para todo o lote; a floresta de falha
+            # devolve a saída de cada árvore, pelo mesmo custo do predict
+            with metrics.span('ml.forest_predict'):
+                failure_trees = tree_predictions(failure_model, X_scaled)
+                availability = availability_model.predict(X_scaled)
+            
+            with metrics.span('ml.anomaly'):
+                anomaly_score, is_anomaly = score_anomalies(anomaly_detector, X_scaled)
         
         return {
-            'failure_probability': max(0, min(1, failure_prob)),
-            'predicted_availability': max(0, min(100, availability)),
+            'failure_probability': np.clip(failure_trees.mean(axis=1), 0, 1),
+            'predicted_availability': np.clip(availability, 0, 100),
             'anomaly_score': anomaly_score,
-            'is_anomaly': is_anomaly
+            'is_anomaly': is_anomaly,
+            'failure_trees': failure_trees
+        }
+    
+    def detect_anomalies(self, records):
+        """Roda só o estágio de anomalia para um lote de amostras
+
+        Pensado para cada tick de telemetria: não avalia as florestas de falha
+        e disponibilidade. Retorna arrays com um score e um rótulo por amostra.
+        """
+        if not self.is_trained:
+            raise ValueError("Modelo não foi treinado ainda")
+        
+        X = self.prepare_features(records)
+        
+        if len(X) == 0:
+            return {'anomaly_score': np.empty(0), 'is_anomaly': np.empty(0, dtype=bool)}
+        
+        scaler, _, _, anomaly_detector, compiled = self._components()
+        with metrics.span('ml.scale'):
+            X_scaled = _standardize(scaler, X)
+        
+        with metrics.span('ml.anomaly'):
+            if compiled is not None and self.inference_backend == 'compiled' and len(X) <= COMPILED_MAX_BATCH:
+                anomaly_score = compiled.anomaly_scores(X_scaled)
+                is_anomaly = anomaly_score < 0
+            else:
+                anomaly_score, is_anomaly = score_anomalies(anomaly_detector, X_scaled)
+        
+        return {'anomaly_score': anomaly_score, 'is_anomaly': is_anomaly}
+    
+    def forecast(self, records, horizon_days=FORECAST_HORIZON_DAYS, failure_scale=None,
+                 failure_threshold=FAILURE_THRESHOLD, availability_threshold=AVAILABILITY_THRESHOLD,
+                 trajectory=False):
+        """Previsão probabilística de falha para os próximos horizon_days dias
+
+        As entradas são projetadas dia a dia (turbine_age e
+        days_since_maintenance avançando) e todas as árvores das florestas
+        avaliam todas as turbinas e dias numa única passada; os intervalos vêm
+        da dispersão entre as árvores. failure_scale (um fator por amostra)
+        ajusta a probabilidade de cada árvore antes dos cálculos.
+
+        Retorna arrays com uma linha por amostra e uma coluna por quantil de
+        QUANTILES: failure_probability e predicted_availability de hoje,
+        days_to_failure (dias até a próxima falha), days_to_failure_threshold
+        (dias até failure_threshold), failure_within_horizon e confidence
+        (fração das árvores na faixa de prioridade da previsão pontual). Com
+        trajectory, inclui os quantis de cada dia (*_path, formato
+        (n, dias, quantis)) e days_to_availability_threshold. Dias além do
+        horizonte são NaN.
+        """
+        if not self.is_trained:
+            raise ValueError("Modelo não foi treinado ainda")
+        if horizon_days < 1:
+            raise ValueError("horizon_days deve ser pelo menos 1")
+        
+        X = self.prepare_features(records)
+        n = len(X)
+        scaler, failure_model, availability_model, _, _ = self._components()
+        
+        with metrics.span('ml.forecast'):
+            X_rolled = _standardize(scaler, rollout(X, horizon_days))
+            failure = tree_predictions(failure_model, X_rolled).reshape(n, horizon_days, -1)
+            point = failure[:, 0].mean(axis=1)
+            if failure_scale is not None:
+                scale = np.asarray(failure_scale, dtype=np.float64).reshape(-1)
+                failure *= scale[:, np.newaxis, np.newaxis]
+                point *= scale
+            np.clip(failure, 0, 1, out=failure)
+            
+            days, within_horizon = days_to_failure(failure)
+            result = {
+                'horizon_days': horizon_days,
+                'quantiles': QUANTILES,
+                'failure_probability': tree_quantiles(failure[:, 0]),
+                'days_to_failure': days,
+                'failure_within_horizon': within_horizon,
+                'days_to_failure_threshold': days_to_threshold(failure, lambda p: p >= failure_threshold),
+                'confidence': priority_agreement(failure[:, 0], np.clip(point, 0, 1))
+            }
+            
+            if trajectory:
+                availability = tree_predictions(availability_model, X_rolled).reshape(n, horizon_days, -1)
+                np.clip(availability, 0, 100, out=availability)
+                result['predicted_availability'] = tree_quantiles(availability[:, 0])
+                result['failure_probability_path'] = tree_quantiles(failure)
+                result['predicted_availability_path'] = tree_quantiles(availability)
+                result['days_to_availability_threshold'] = days_to_threshold(
+                    availability, lambda a: a < availability_threshold
+                )
+            else:
+                # Só o dia de hoje (a primeira linha de cada turbina)
+                availability = tree_predictions(availability_model, X_rolled[::horizon_days])
+                result['predicted_availability'] = tree_quantiles(np.clip(availability, 0, 100))
+        
+        return result
+    
+    def predict_failure_probability(self, turbine_data):
+        """Prediz probabilidade de falha para uma turbina"""
+        prediction = self.predict_batch(turbine_data)
+        
+        return {
+            'failure_probability': float(prediction['failure_probability'][0]),
+            'predicted_availability': float(prediction['predicted_availability'][0]),
+            'anomaly_score': float(prediction['anomaly_score'][0]),
+            'is_anomaly': bool(prediction['is_anomaly'][0])
         }
     
     def get_feature_importance(self):
@@ -207,48 +653,335 @@ class TurbinePredictiveModel:
         if not self.is_trained:
             return None
         
-        feature_names = [
-            'wind_speed', 'temperature', 'humidity', 'operating_hours',
-            'power_output', 'vibration_level', 'turbine_age', 'days_since_maintenance',
-            'wind_temp_interaction', 'power_efficiency', 'maintenance_urgency'
-        ]
+        _, failure_model, availability_model, _, _ = self._components()
+        
+        feature_names = self.feature_names or self.feature_pipeline.feature_names
         
-        failure_importance = dict(zip(feature_names, self.failure_model.feature_importances_))
-        availability_importance = dict(zip(feature_names, self.availability_model.feature_importances_))
+        failure_importance = dict(zip(feature_names, failure_model.feature_importances_))
+        availability_importance = dict(zip(feature_names, availability_model.feature_importances_))
         
         return {
             'failure_prediction': failure_importance,
             'availability_prediction': availability_importance
         }
     
-    def save_model(self, filepath):
-        """Salva o modelo treinado"""
+    def save_model(self, registry=None):
+        """Publica o modelo treinado no registro como uma nova versão"""
+        registry = registry or model_registry
+        scaler, failure_model, availability_model, anomaly_detector, compiled = self._components()
+        if compiled is None:
+            compiled = CompiledEnsemble.from_estimators(failure_model, availability_model, anomaly_detector)
         model_data = {
-            'failure_model': self.failure_model,
-            'availability_model': self.availability_model,
-            'anomaly_detector': self.anomaly_detector,
-            'scaler': self.scaler,
+            'failure_model': failure_model,
+            'availability_model': availability_model,
+            'anomaly_detector': anomaly_detector,
+            'scaler': scaler,
             'is_trained': self.is_trained
         }
         
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
+        manifest = registry.publish(
+            model_data,
+            metrics=self.metrics,
+            feature_names=self.feature_names,
+            trained_at=self.trained_at,
+            arrays=compiled.to_arrays()
+        )
+        
+        with self._lock:
+            self.compiled = compiled
+            self.version = manifest['version']
+            self.manifest = manifest
+            self.load_info = self._describe_load(registry, manifest['version'], 'training', 0.0)
+        
+        return manifest
     
-    def load_model(self, filepath):
-        """Carrega modelo salvo"""
-        if os.path.exists(filepath):
-            with open(filepath, 'rb') as f:
-                model_data = pickle.load(f)
-            
+    def load_model(self, registry=None, version=None):
+        """Carrega uma versão do registro (padrão: a ativa)"""
+        registry = registry or model_registry
+        started = time.perf_counter()
+        model_data, manifest = registry.load(version)
+        if model_data is None:
+            return False
+        # Arrays das florestas achatadas, mapeados em memória e compartilhados
+        # entre processos pelo page cache (os estimadores do sklearn acima são
+        # cópias do processo; ver gunicorn.conf.py)
+        arrays = registry.load_arrays(manifest['version'])
+        load_seconds = time.perf_counter() - started
+        
+        with self._lock:
             self.failure_model = model_data['failure_model']
             self.availability_model = model_data['availability_model']
             self.anomaly_detector = model_data['anomaly_detector']
             self.scaler = model_data['scaler']
             self.is_trained = model_data['is_trained']
-            
+            self.version = manifest['version']
+            self.trained_at = manifest['trained_at']
+            self.metrics = manifest['metrics']
+            self.feature_names = manifest['feature_names']
+            self.manifest = manifest
+            self.ready = False
+            self.compiled = CompiledEnsemble(arrays) if arrays is not None else None
+            self.load_info = self._describe_load(registry, manifest['version'], 'registry', load_seconds)
+        
+        return True
+    
+    def reload(self, registry=None, version=None):
+        """Carrega uma versão do registro numa instância nova e a troca pela atual
+
+        As previsões continuam usando o modelo anterior até a troca. Retorna
+        False se não houver versão publicada.
+        """
+        model = TurbinePredictiveModel()
+        if not model.load_model(registry, version):
+            return False
+        model.warm_up()
+        self.swap_in(model)
+        return True
+    
+    def _describe_load(self, registry, version, source, load_seconds):
+        memory = {
+            'failure_model': _estimator_nbytes(self.failure_model),
+            'availability_model': _estimator_nbytes(self.availability_model),
+            'anomaly_detector': _estimator_nbytes(self.anomaly_detector),
+            'compiled_engine': sum(a.nbytes for a in self.compiled.to_arrays().values()) if self.compiled else 0
+        }
+        memory['total'] = sum(memory.values())
+        
+        return {
+            'source': source,
+            'loaded_at': datetime.datetime.now().isoformat(),
+            'load_seconds': round(load_seconds, 4),
+            'artifact': registry.artifact_info(version),
+            'memory_bytes': memory
+        }
+    
+    def status(self):
+        """Status do modelo a partir dos metadados em memória, sem acessar o disco"""
+        with self._lock:
+            return {
+                'is_trained': self.is_trained,
+                'ready': self.ready,
+                'inference_backend': self.inference_backend if self.compiled is not None else 'sklearn',
+                'version': self.version,
+                'last_training': self.trained_at,
+                'load': self.load_info
+            }
+    
+    def warm_up(self):
+        """Faz uma previsão descartável para aquecer os caminhos do sklearn
+
+        Com o backend compilado, também confere o ensemble achatado contra o
+        sklearn e volta para o sklearn se a diferença passar da tolerância.
+        """
+        if self.inference_backend == 'compiled':
+            self.verify_compiled()
+        self.predict_batch([WARMUP_SAMPLE])
+        self.ready = True
+    
+    def verify_compiled(self, n_samples=256, tolerance=COMPILED_TOLERANCE):
+        """Compara o ensemble compilado com o sklearn; retorna o maior erro por modelo"""
+        scaler, failure_model, availability_model, anomaly_detector, compiled = self._components()
+        if compiled is None:
+            compiled = CompiledEnsemble.from_estimators(failure_model, availability_model, anomaly_detector)
+        
+        # Amostras no espaço normalizado, onde as florestas operam
+        X = np.random.default_rng(0).normal(size=(n_samples, compiled.n_features))
+        errors = compiled.max_abs_error(failure_model, availability_model, anomaly_detector, X)
+        
+        with self._lock:
+            if max(errors.values()) <= tolerance:
+                self.compiled = compiled
+            else:
+                print(f"Ensemble compilado diverge do sklearn ({errors}); usando sklearn.")
+                self.compiled = None
+        
+        return errors
+    
+    def ensure_loaded(self):
+        """Garante que o modelo ativo esteja carregado e aquecido
+
+        Só um thread carrega do disco; os demais esperam e reaproveitam o
+        resultado. Retorna False se não houver modelo publicado.
+        """
+        if self.ready:
+            return True
+        
+        with self._load_lock:
+            if self.ready:
+                return True
+            if not self.is_trained and not self.load_model():
+                return False
+            self.warm_up()
             return True
-        return False
+    
+    def cache_key(self):
+        """Identifica os estimadores em uso (versão publicada ou horário do treino)"""
+        return self.version or self.trained_at
+    
+    def model_info(self):
+        """Versão e data de treinamento do modelo carregado"""
+        with self._lock:
+            return {
+                'version': self.version,
+                'last_training': self.trained_at
+            }
+
+def _progress_reporter(progress_callback):
+    def report(phase, progress):
+        if progress_callback is not None:
+            progress_callback(phase, progress)
+    return report
+
+def _new_estimators(n_jobs=None):
+    """Estimadores ainda não treinados, com os parâmetros do treinamento completo"""
+    return {
+        'failure_model': RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs),
+        'availability_model': RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs),
+        'anomaly_detector': IsolationForest(contamination=0.1, random_state=42, n_jobs=n_jobs)
+    }
+
+def _fit_estimators(fit_jobs, parallel, n_jobs, report=None, verbose=True):
+    """Treina {nome: (estimador, X, y)}; retorna ({nome: (estimador, segundos)}, tempo total)"""
+    def fit(name):
+        estimator, X_fit, y_fit = fit_jobs[name]
+        started = time.perf_counter()
+        estimator.fit(X_fit, y_fit)
+        # Previsões de poucas linhas ficam mais rápidas sem o despacho do joblib
+        estimator.set_params(n_jobs=None)
+        elapsed = time.perf_counter() - started
+        if verbose:
+            metrics.observe_span(f'ml.train.fit.{name}', elapsed)
+        return estimator, elapsed
+    
+    report = report or _progress_reporter(None)
+    fit_started = time.perf_counter()
+    if parallel:
+        report('fit_models', 0.3)
+        if verbose:
+            print(f"Treinando modelos em paralelo (n_jobs={n_jobs})...")
+        # A construção das árvores libera o GIL, então threads bastam
+        with ThreadPoolExecutor(max_workers=len(fit_jobs)) as executor:
+            futures = {name: executor.submit(fit, name) for name in fit_jobs}
+            fitted = {name: future.result() for name, future in futures.items()}
+    else:
+        fitted = {}
+        progress = {'failure_model': 0.3, 'availability_model': 0.55, 'anomaly_detector': 0.8}
+        messages = {
+            'failure_model': "Treinando modelo de previsão de falhas...",
+            'availability_model': "Treinando modelo de disponibilidade...",
+            'anomaly_detector': "Treinando detector de anomalias..."
+        }
+        for name in fit_jobs:
+            report(name, progress[name])
+            if verbose:
+                print(messages[name])
+            fitted[name] = fit(name)
+    return fitted, time.perf_counter() - fit_started
+
+def _evaluate(failure_model, availability_model, X_test, y_failure, y_availability):
+    """MAE e R² dos dois regressores no conjunto de teste"""
+    failure_pred = failure_model.predict(X_test)
+    availability_pred = availability_model.predict(X_test)
+    return {
+        'failure_mae': float(mean_absolute_error(y_failure, failure_pred)),
+        'failure_r2': float(r2_score(y_failure, failure_pred)),
+        'availability_mae': float(mean_absolute_error(y_availability, availability_pred)),
+        'availability_r2': float(r2_score(y_availability, availability_pred))
+    }
+
+def _incremental_window(history, increment, data_options):
+    """Opções de geração da janela nova: por padrão, logo depois do fim do histórico
+
+    A seed muda a cada rodada para a janela nova não repetir o ruído do histórico.
+    """
+    window = {**history, 'seed': history['seed'] + increment, **data_options}
+    if 'start' not in data_options:
+        window['start'] = (pd.Timestamp(history['end']) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    if 'end' not in data_options:
+        window['end'] = (pd.Timestamp(window['start'])
+                         + pd.Timedelta(days=INCREMENTAL_WINDOW_DAYS - 1)).strftime('%Y-%m-%d')
+    return window
+
+def _rescale_forest(forest, old_scaler, new_scaler):
+    """Cópia rasa do ensemble com os limiares das árvores no espaço do novo scaler
+
+    A normalização é afim e crescente por feature, então cada limiar t vira
+    (t * escala_antiga + média_antiga - média_nova) / escala_nova e as árvores
+    tomam as mesmas decisões com a entrada normalizada pelo novo scaler. O
+    ensemble original (em uso pelas previsões) não é alterado.
+    """
+    scale = old_scaler.scale_ / new_scaler.scale_
+    shift = (old_scaler.mean_ - new_scaler.mean_) / new_scaler.scale_
+    features = getattr(forest, 'estimators_features_', None)
+    
+    rescaled = []
+    for i, estimator in enumerate(forest.estimators_):
+        tree_cls, tree_args, state = estimator.tree_.__reduce__()
+        nodes = state['nodes'].copy()
+        split = nodes['left_child'] != -1
+        feature = nodes['feature'][split]
+        if features is not None and forest._max_features != forest.n_features_in_:
+            # Árvores treinadas num subconjunto de colunas
+            feature = np.asarray(features[i])[feature]
+        nodes['threshold'][split] = nodes['threshold'][split] * scale[feature] + shift[feature]
+        tree = tree_cls(*tree_args)
+        tree.__setstate__({**state, 'nodes': nodes})
+        estimator = copy.copy(estimator)
+        estimator.tree_ = tree
+        rescaled.append(estimator)
+    
+    forest = copy.copy(forest)
+    forest.estimators_ = rescaled
+    if features is not None:
+        forest.estimators_features_ = list(features)
+    return forest
+
+def _retire_oldest(forest, max_trees):
+    """Descarta as árvores mais antigas além de max_trees; retorna quantas saíram"""
+    excess = len(forest.estimators_) - max_trees
+    if excess <= 0:
+        return 0
+    for name in ('estimators_', 'estimators_features_', '_average_path_length_per_tree', '_decision_path_lengths'):
+        if hasattr(forest, name):
+            setattr(forest, name, getattr(forest, name)[excess:])
+    forest.set_params(n_estimators=len(forest.estimators_))
+    return excess
+
+def _standardize(scaler, X):
+    """Mesmo cálculo de StandardScaler.transform, sem a validação por chamada"""
+    return (X - scaler.mean_) / scaler.scale_
+
+def score_anomalies(anomaly_detector, X_scaled):
+    """Scores e rótulos de anomalia numa única passada pelas árvores
+
+    Equivale a decision_function + predict do IsolationForest, mas percorre as
+    árvores uma vez só: o rótulo vem do próprio score (anomalia se < 0).
+    """
+    anomaly_score = anomaly_detector.score_samples(X_scaled) - anomaly_detector.offset_
+    return anomaly_score, anomaly_score < 0
+
+def _estimator_nbytes(estimator):
+    """Memória aproximada dos nós e valores das árvores de um ensemble"""
+    if estimator is None:
+        return 0
+    total = 0
+    for tree in getattr(estimator, 'estimators_', []):
+        state = tree.tree_.__getstate__()
+        total += state['nodes'].nbytes + state['values'].nbytes
+    return total
 
 # Instância global do modelo
 predictive_model = TurbinePredictiveModel()
 
+def warm_up_model():
+    """Carrega e aquece o modelo ativo na inicialização do servidor"""
+    try:
+        started = time.perf_counter()
+        if predictive_model.ensure_loaded():
+            print(f"Modelo {predictive_model.version} carregado e aquecido em "
+                  f"{time.perf_counter() - started:.2f}s")
+        else:
+            print("Nenhum modelo publicado; /api/ml/ready retorna 503 até o primeiro treinamento.")
+    except Exception as e:
+        print(f"Falha ao carregar o modelo na inicialização: {e}")
+
@@ -0,0 +1,219 @@
+import contextlib
+import datetime
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from src.models.user import db
+from src.models.training_job import TrainingJob
+from src.ml_models.model_registry import model_registry
+from src.ml_models.predictive_model import TurbinePredictiveModel, predictive_model
+from src.services.telemetry_store import begin_write
+
+# Quantidade de jobs finalizados mantidos no banco para consulta
+MAX_FINISHED_JOBS = 20
+
+# full: treina do zero; incremental: parte do modelo em uso com a janela recente
+TRAINING_MODES = ('full', 'incremental')
+
+JOB_COLUMNS = tuple(column.name for column in TrainingJob.__table__.columns)
+# Colunas guardadas como JSON
+_JSON_COLUMNS = ('options', 'phase_timings', 'metrics')
+_ACTIVE = "status IN ('queued', 'running')"
+
+SELECT_JOB_SQL = f"SELECT {', '.join(JOB_COLUMNS)} FROM training_jobs WHERE id = ?"
+SELECT_ACTIVE_SQL = f"SELECT {', '.join(JOB_COLUMNS)} FROM training_jobs WHERE {_ACTIVE} ORDER BY submitted_at"
+INSERT_JOB_SQL = f"INSERT INTO training_jobs ({', '.join(JOB_COLUMNS)}) VALUES ({', '.join('?' for _ in JOB_COLUMNS)})"
+PRUNE_JOBS_SQL = (
+    f"DELETE FROM training_jobs WHERE NOT {_ACTIVE} AND id NOT IN ("
+    f"SELECT id FROM training_jobs WHERE NOT {_ACTIVE} ORDER BY finished_at DESC LIMIT ?)"
+)
+
+
+class TrainingJobManager:
+    """Executa treinamentos em segundo plano, um de cada vez
+
+    Os jobs ficam na tabela training_jobs. Pedidos feitos enquanto há um job
+    pendente ou em execução, em qualquer processo, são agrupados nesse mesmo
+    job (a verificação e a criação são uma transação com o lock de escrita
+    do banco), então nunca há dois treinamentos gravando o modelo ao mesmo
+    tempo. O job roda no processo que o criou; os demais passam a usar a
+    versão nova pelo watcher do registro. Um job ativo cujo processo não
+    existe mais é marcado como falho.
+    """
+
+    def __init__(self, target_model, registry):
+        self.target_model = target_model
+        self.registry = registry
+        self.engine = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ml-train')
+
+    def init_app(self, app):
+        with app.app_context():
+            self.engine = db.engine
+
+    def submit(self, options=None):
+        """Agenda um treinamento e retorna (job, coalesced)"""
+        with self._transaction() as cursor:
+            active = self._active(cursor)
+            if active is not None:
+                active['coalesced_requests'] += 1
+                cursor.execute('UPDATE training_jobs SET coalesced_requests = ? WHERE id = ?',
+                               (active['coalesced_requests'], active['id']))
+                return self._public(active), True
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'status': 'queued',
+                'phase': None,
+                'progress': 0.0,
+                'options': dict(options or {}),
+                'phase_timings': {},
+                'metrics': None,
+                'model_version': None,
+                'error': None,
+                'submitted_at': datetime.datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'coalesced_requests': 0,
+                'pid': os.getpid()
+            }
+            cursor.execute(INSERT_JOB_SQL, _to_row({name: job[name] for name in JOB_COLUMNS}))
+            cursor.execute(PRUNE_JOBS_SQL, (MAX_FINISHED_JOBS,))
+
+        self._executor.submit(self._run, job['id'], job['options'])
+        return self._public(job), False
+
+    def get(self, job_id):
+        """Retorna o estado do job, ou None se não existir"""
+        with self._connection() as connection:
+            cursor = connection.cursor()
+            try:
+                job = _from_row(cursor.execute(SELECT_JOB_SQL, (job_id,)).fetchone())
+            finally:
+                cursor.close()
+        if job is not None and job['status'] in ('queued', 'running') and not _pid_alive(job['pid']):
+            with self._transaction() as cursor:
+                self._active(cursor)
+                job = _from_row(cursor.execute(SELECT_JOB_SQL, (job_id,)).fetchone())
+        return self._public(job) if job is not None else None
+
+    def _run(self, job_id, options):
+        self._update(job_id, status='running', started_at=datetime.datetime.now().isoformat())
+
+        options = dict(options)
+        phase_timings = {}
+        phase_started = [None, time.perf_counter()]
+
+        def on_progress(phase, progress):
+            now = time.perf_counter()
+            if phase_started[0] is not None:
+                phase_timings[phase_started[0]] = round(now - phase_started[1], 4)
+            self._update(job_id, phase=phase, progress=progress, phase_timings=phase_timings)
+            phase_started[0] = phase
+            phase_started[1] = now
+
+        fields = {}
+        try:
+            # Treinar numa instância nova para não afetar as previsões em curso
+            model = TurbinePredictiveModel()
+            if options.pop('mode', 'full') == 'incremental':
+                metrics = model.train_incremental(self.target_model, progress_callback=on_progress, **options)
+            else:
+                metrics = model.train_models(progress_callback=on_progress, **options)
+
+            on_progress('save_model', 0.95)
+            manifest = model.save_model(self.registry)
+            model.warm_up()
+            self.target_model.swap_in(model)
+            on_progress('done', 1.0)
+
+            fields.update(status='completed', metrics=metrics, model_version=manifest['version'])
+        except Exception as e:
+            fields.update(status='failed', error=str(e))
+        finally:
+            self._update(job_id, finished_at=datetime.datetime.now().isoformat(), **fields)
+
+    def _active(self, cursor):
+        """Job ativo (dict) ou None; marca como falhos os ativos cujo processo terminou"""
+        for row in cursor.execute(SELECT_ACTIVE_SQL).fetchall():
+            job = _from_row(row)
+            if _pid_alive(job['pid']):
+                return job
+            cursor.execute(
+                "UPDATE training_jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                ('Processo do treinamento encerrado antes do fim', datetime.datetime.now().isoformat(), job['id'])
+            )
+        return None
+
+    def _update(self, job_id, **fields):
+        row = _to_row(fields)
+        with self._transaction() as cursor:
+            cursor.execute(
+                f"UPDATE training_jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?",
+                (*row, job_id)
+            )
+
+    @contextlib.contextmanager
+    def _connection(self):
+        if self.engine is None:
+            raise RuntimeError('Gerenciador de treinamentos sem banco: chame init_app')
+        connection = self.engine.raw_connection()
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Cursor numa transação com o lock de escrita do banco, com commit no fim"""
+        with self._connection() as connection:
+            begin_write(connection)
+            cursor = connection.cursor()
+            try:
+                yield cursor
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _public(job):
+        public = dict(job)
+        public.pop('pid', None)
+        public['phase_timings'] = dict(job['phase_timings'])
+        return public
+
+
+def _to_row(fields):
+    """Valores de fields (na ordem das chaves) prontos para gravar"""
+    return tuple(json.dumps(value) if name in _JSON_COLUMNS and value is not None else value
+                 for name, value in fields.items())
+
+
+def _from_row(row):
+    if row is None:
+        return None
+    job = dict(zip(JOB_COLUMNS, row))
+    for name in _JSON_COLUMNS:
+        if job[name] is not None:
+            job[name] = json.loads(job[name])
+    return job
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# Instância global do gerenciador de treinamentos (ligada ao banco em main.py)
+training_jobs = TrainingJobManager(predictive_model, model_registry)
@@ -0,0 +1,180 @@
+import numpy as np
+
+# Nomes dos grupos de árvores, na ordem em que são concatenados
+GROUPS = ('failure_model', 'availability_model', 'anomaly_detector')
+
+# Passos da travessia entre verificações de "todas as amostras em folhas"
+LEAF_CHECK_INTERVAL = 4
+
+
+def _average_path_length(n_samples):
+    """Comprimento médio de caminho c(n) de uma busca malsucedida (Isolation Forest)"""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n_samples)
+    result[n_samples == 2] = 1.0
+    mask = n_samples > 2
+    n = n_samples[mask]
+    result[mask] = 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+    return result
+
+
+class CompiledEnsemble:
+    """Florestas de falha, disponibilidade e anomalia achatadas em arrays NumPy
+
+    Todas as árvores dos três estimadores viram um único conjunto de arrays
+    contíguos (feature, threshold, filhos, valor), com os índices de nó
+    deslocados para o espaço global. As folhas apontam para si mesmas, então
+    a travessia é um laço de profundidade fixa em que cada passo avança todas
+    as amostras em todas as árvores ao mesmo tempo, sem validação de entrada
+    nem despacho do joblib.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children = arrays['children']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.group_bounds = arrays['group_bounds']
+        self.meta = arrays['meta']
+
+        self.max_depth = int(self.meta[0])
+        self.anomaly_offset = float(self.meta[1])
+        self.anomaly_denominator = float(self.meta[2])
+        self.n_features = int(self.meta[3])
+        self._slices = {
+            name: slice(int(self.group_bounds[i]), int(self.group_bounds[i + 1]))
+            for i, name in enumerate(GROUPS)
+        }
+
+    @classmethod
+    def from_estimators(cls, failure_model, availability_model, anomaly_detector):
+        """Achata os estimadores treinados do sklearn"""
+        features, thresholds, children, values, roots = [], [], [], [], []
+        group_bounds = [0]
+        max_depth = 0
+        offset = 0
+
+        def add_tree(tree, leaf_values, feature_map=None):
+            nonlocal offset, max_depth
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+
+            feature = tree.feature.astype(np.int64)
+            if feature_map is not None:
+                feature = np.where(is_leaf, 0, feature_map[np.maximum(feature, 0)])
+            feature = np.where(is_leaf, 0, feature)
+
+            # Folhas: threshold infinito e os dois filhos apontando para a própria folha
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            features.append(feature.astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            child_pairs = np.empty(2 * n_nodes, dtype=np.int32)
+            child_pairs[0::2] = left
+            child_pairs[1::2] = right
+            children.append(child_pairs)
+            values.append(np.where(is_leaf, leaf_values, 0.0))
+            roots.append(offset)
+
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += n_nodes
+
+        for forest in (failure_model, availability_model):
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                add_tree(tree, tree.value[:, 0, 0])
+            group_bounds.append(len(roots))
+
+        for estimator, estimator_features in zip(anomaly_detector.estimators_, anomaly_detector.estimators_features_):
+            tree = estimator.tree_
+            # Profundidade do nó + c(amostras no nó) - 1, como no sklearn
+            leaf_depths = (tree.compute_node_depths() + _average_path_length(tree.n_node_samples) - 1.0)
+            add_tree(tree, leaf_depths, feature_map=np.asarray(estimator_features))
+        group_bounds.append(len(roots))
+
+        n_anomaly_trees = group_bounds[3] - group_bounds[2]
+        denominator = n_anomaly_trees * float(_average_path_length([anomaly_detector.max_samples_])[0])
+
+        return cls({
+            'feature': np.concatenate(features),
+            'threshold': np.concatenate(thresholds).astype(np.float64),
+            'children': np.concatenate(children),
+            'value': np.concatenate(values).astype(np.float64),
+            'roots': np.asarray(roots, dtype=np.int64),
+            'group_bounds': np.asarray(group_bounds, dtype=np.int64),
+            'meta': np.array([max_depth, anomaly_detector.offset_, denominator,
+                              failure_model.n_features_in_], dtype=np.float64)
+        })
+
+    def to_arrays(self):
+        """Arrays que descrevem o ensemble (para salvar como .npy)"""
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'children': self.children,
+            'value': self.value,
+            'roots': self.roots,
+            'group_bounds': self.group_bounds,
+            'meta': self.meta
+        }
+
+    def _leaf_values(self, X, group=None):
+        # Mesma semântica do sklearn: as árvores comparam X em float32
+        X = np.ascontiguousarray(X, dtype=np.float32).astype(np.float64)
+        roots = self.roots if group is None else self.roots[self._slices[group]]
+        n_samples = X.shape[0]
+        n_trees = len(roots)
+
+        X_flat = X.ravel()
+        row_base = np.repeat(np.arange(n_samples, dtype=np.int64) * self.n_features, n_trees)
+        node = np.tile(roots, n_samples)
+
+        for depth in range(self.max_depth):
+            threshold = self.threshold[node]
+            # A cada poucos passos, parar se todas as amostras já chegaram às folhas
+            if depth % LEAF_CHECK_INTERVAL == LEAF_CHECK_INTERVAL - 1 and np.isinf(threshold).all():
+                break
+            go_right = X_flat[row_base + self.feature[node]] > threshold
+            node = self.children[2 * node + go_right]
+
+        return self.value[node].reshape(n_samples, n_trees)
+
+    def predict(self, X):
+        """Retorna (falha, disponibilidade, anomaly_score) para cada linha de X"""
+        failure_trees, availability, anomaly_score = self.predict_trees(X)
+        return failure_trees.mean(axis=1), availability, anomaly_score
+
+    def predict_trees(self, X):
+        """Como predict, mas com a saída de cada árvore de falha: (n_amostras, n_árvores)"""
+        leaf_values = self._leaf_values(X)
+
+        failure_trees = leaf_values[:, self._slices['failure_model']]
+        availability = leaf_values[:, self._slices['availability_model']].mean(axis=1)
+
+        anomaly_score = self._anomaly_score(leaf_values[:, self._slices['anomaly_detector']])
+
+        return failure_trees, availability, anomaly_score
+
+    def anomaly_scores(self, X):
+        """decision_function do Isolation Forest, percorrendo só as árvores de anomalia"""
+        return self._anomaly_score(self._leaf_values(X, group='anomaly_detector'))
+
+    def _anomaly_score(self, leaf_depths):
+        depths = leaf_depths.sum(axis=1)
+        if self.anomaly_denominator != 0:
+            scores = 2 ** (-depths / self.anomaly_denominator)
+        else:
+            scores = np.ones_like(depths)
+        return -scores - self.anomaly_offset
+
+    def max_abs_error(self, failure_model, availability_model, anomaly_detector, X):
+        """Maior diferença absoluta contra as saídas do sklearn em X"""
+        failure, availability, anomaly_score = self.predict(X)
+        return {
+            'failure_model': float(np.max(np.abs(failure - failure_model.predict(X)))),
+            'availability_model': float(np.max(np.abs(availability - availability_model.predict(X)))),
+            'anomaly_detector': float(np.max(np.abs(anomaly_score - anomaly_detector.decision_function(X))))
+        }
@@ -0,0 +1,62 @@
+from src.models.user import db
+
+# Estados do ciclo de vida de um alerta
+ALERT_STATUSES = ('open', 'acknowledged', 'cleared')
+
+
+class Alert(db.Model):
+    """Alerta de uma regra para uma turbina
+
+    Há no máximo um alerta ativo (open ou acknowledged) por (turbine_id,
+    rule); mudanças de severidade atualizam o mesmo alerta. Os instantes
+    são segundos desde a época (UTC), como na telemetria.
+    """
+    __tablename__ = 'alerts'
+    __table_args__ = (db.Index('ix_alerts_status_turbine', 'status', 'turbine_id'),)
+
+    id = db.Column(db.String(32), primary_key=True)
+    turbine_id = db.Column(db.String(16), nullable=False)
+    rule = db.Column(db.String(32), nullable=False)
+    severity = db.Column(db.String(16), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='open')
+    value = db.Column(db.Float)
+    opened_at = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.Integer, nullable=False)
+    acknowledged_at = db.Column(db.Integer)
+    cleared_at = db.Column(db.Integer)
+
+    def __repr__(self):
+        return f'<Alert {self.turbine_id} {self.rule} {self.status}>'
+
+    def to_dict(self):
+        return {
+            column.name: getattr(self, column.name) for column in self.__table__.columns
+        }
+
+
+
+class AlertLevel(db.Model):
+    """Nível atual da condição de uma regra para uma turbina
+
+    É o estado da histerese: continua valendo depois que o alerta é
+    encerrado manualmente, e todos os processos avaliam as regras a partir
+    do mesmo nível.
+    """
+    __tablename__ = 'alert_levels'
+
+    turbine_id = db.Column(db.String(16), primary_key=True)
+    rule = db.Column(db.String(32), primary_key=True)
+    severity = db.Column(db.String(16), nullable=False)
+
+    def __repr__(self):
+        return f'<AlertLevel {self.turbine_id} {self.rule} {self.severity}>'
+
+
+# Revisão do estado dos alertas (uma linha, id = 1), incrementada a cada
+# transação que muda alertas ou níveis; um processo só relê o estado do
+# banco quando ela muda
+alert_revision = db.Table(
+    'alert_revision',
+    db.Column('id', db.Integer, primary_key=True, autoincrement=False),
+    db.Column('revision', db.Integer, nullable=False)
+)
@@ -0,0 +1,90 @@
+from src.models.user import db
+
+# Métricas de sensores guardadas por amostra de telemetria
+TELEMETRY_METRICS = (
+    'wind_speed', 'temperature', 'humidity', 'operating_hours', 'power_output',
+    'vibration_level', 'days_since_maintenance', 'availability',
+    'failure_events', 'downtime_hours'
+)
+
+# Resoluções (segundos) dos rollups mantidos na ingestão: 1 minuto, 1 hora, 1 dia
+ROLLUP_RESOLUTIONS = (60, 3600, 86400)
+
+
+class Telemetry(db.Model):
+    """Amostra de telemetria de uma turbina
+
+    A chave primária é (turbine_id, ts) e a tabela é WITHOUT ROWID, então no
+    SQLite as linhas ficam agrupadas fisicamente por turbina e em ordem de
+    tempo: uma consulta por intervalo é uma varredura contígua do índice.
+    ts é o instante em segundos desde a época (UTC).
+    """
+    __tablename__ = 'telemetry'
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    turbine_id = db.Column(db.String(16), primary_key=True)
+    ts = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    wind_speed = db.Column(db.Float)
+    temperature = db.Column(db.Float)
+    humidity = db.Column(db.Float)
+    operating_hours = db.Column(db.Float)
+    power_output = db.Column(db.Float)
+    vibration_level = db.Column(db.Float)
+    days_since_maintenance = db.Column(db.Float)
+    availability = db.Column(db.Float)
+    failure_events = db.Column(db.Float)  # Falhas iniciadas no intervalo da amostra
+    downtime_hours = db.Column(db.Float)  # Horas de parada atribuídas à amostra
+
+    def __repr__(self):
+        return f'<Telemetry {self.turbine_id} {self.ts}>'
+
+    def to_dict(self):
+        return {
+            'turbine_id': self.turbine_id,
+            'ts': self.ts,
+            **{metric: getattr(self, metric) for metric in TELEMETRY_METRICS}
+        }
+
+
+# Rollups de telemetria: um balde por (resolução, turbina, início do balde)
+# com quantidade de amostras e, por métrica, soma, quantidade de valores
+# não nulos, mínimo e máximo. A média é soma / quantidade, então baldes
+# vizinhos podem ser somados para formar baldes maiores sem perder precisão.
+telemetry_rollup = db.Table(
+    'telemetry_rollup',
+    db.Column('resolution', db.Integer, primary_key=True, autoincrement=False),
+    db.Column('turbine_id', db.String(16), primary_key=True),
+    db.Column('bucket_ts', db.Integer, primary_key=True, autoincrement=False),
+    db.Column('samples', db.Integer, nullable=False, default=0),
+    *[
+        db.Column(f'{metric}_{stat}', db.Float if stat != 'count' else db.Integer)
+        for metric in TELEMETRY_METRICS
+        for stat in ('sum', 'count', 'min', 'max')
+    ],
+    sqlite_with_rowid=False
+)
+
+
+# Última amostra de cada turbina recebida pela ingestão. Fica no banco para
+# que todos os processos (workers do gunicorn) usem a mesma telemetria nas
+# previsões, não só o que recebeu a amostra.
+telemetry_latest = db.Table(
+    'telemetry_latest',
+    db.Column('turbine_id', db.String(16), primary_key=True),
+    db.Column('ts', db.Integer, nullable=False),
+    *[db.Column(metric, db.Float) for metric in TELEMETRY_METRICS]
+)
+
+
+# Diário dos lotes gravados pela ingestão, em ordem de seq (JSON das tuplas).
+# Cada processo reaplica os lotes dos outros no próprio estado derivado da
+# telemetria (ex.: detector contínuo de anomalias). AUTOINCREMENT: seq nunca
+# é reutilizado, mesmo depois que os lotes antigos são descartados.
+telemetry_journal = db.Table(
+    'telemetry_journal',
+    db.Column('seq', db.Integer, primary_key=True),
+    db.Column('created_at', db.Integer, nullable=False),
+    db.Column('n_rows', db.Integer, nullable=False),
+    db.Column('payload', db.Text, nullable=False),
+    sqlite_autoincrement=True
+)
@@ -0,0 +1,34 @@
+from src.models.user import db
+
+# Estados de um job de treinamento; os dois primeiros são ativos
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed')
+
+
+class TrainingJob(db.Model):
+    """Job de treinamento do modelo preditivo
+
+    Fica no banco para que qualquer processo (worker do gunicorn) consulte o
+    job e agrupe pedidos no job ativo, não só o que o executa. pid é o
+    processo que executa o job; options, phase_timings e metrics são JSON e
+    os instantes são datas ISO 8601, como na resposta de /api/ml/jobs.
+    """
+    __tablename__ = 'training_jobs'
+    __table_args__ = (db.Index('ix_training_jobs_status', 'status'),)
+
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(16), nullable=False, default='queued')
+    phase = db.Column(db.String(32))
+    progress = db.Column(db.Float, nullable=False, default=0.0)
+    options = db.Column(db.Text, nullable=False, default='{}')
+    phase_timings = db.Column(db.Text, nullable=False, default='{}')
+    metrics = db.Column(db.Text)
+    model_version = db.Column(db.String(32))
+    error = db.Column(db.Text)
+    submitted_at = db.Column(db.String(32), nullable=False)
+    started_at = db.Column(db.String(32))
+    finished_at = db.Column(db.String(32))
+    coalesced_requests = db.Column(db.Integer, nullable=False, default=0)
+    pid = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<TrainingJob {self.id} {self.status}>'
@@ -0,0 +1,48 @@
+from src.models.user import db
+
+# Níveis de criticidade aceitos no cadastro
+CRITICALITY_LEVELS = ('alta', 'media', 'baixa')
+
+# Frota inicial gravada no cadastro quando a tabela está vazia
+DEFAULT_TURBINES = (
+    {'id': 'TEB001', 'farm': 'TEB', 'criticality': 'alta', 'base_failures': 40, 'base_failure_rate': 0.8, 'base_availability': 26.24, 'base_mttr': 73.46},
+    {'id': 'TEB002', 'farm': 'TEB', 'criticality': 'media', 'base_failures': 33, 'base_failure_rate': 0.4, 'base_availability': 97.07, 'base_mttr': 3.54},
+    {'id': 'TEB003', 'farm': 'TEB', 'criticality': 'baixa', 'base_failures': 27, 'base_failure_rate': 0.3, 'base_availability': 98.52, 'base_mttr': 2.19},
+    {'id': 'TEB004', 'farm': 'TEB', 'criticality': 'media', 'base_failures': 46, 'base_failure_rate': 0.5, 'base_availability': 92.88, 'base_mttr': 6.17},
+    {'id': 'TEB005', 'farm': 'TEB', 'criticality': 'baixa', 'base_failures': 24, 'base_failure_rate': 0.3, 'base_availability': 96.88, 'base_mttr': 5.18},
+    {'id': 'TEB006', 'farm': 'TEB', 'criticality': 'baixa', 'base_failures': 30, 'base_failure_rate': 0.3, 'base_availability': 98.19, 'base_mttr': 2.41},
+    {'id': 'TEB007', 'farm': 'TEB', 'criticality': 'baixa', 'base_failures': 25, 'base_failure_rate': 0.3, 'base_availability': 97.96, 'base_mttr': 3.25},
+    {'id': 'TEB008', 'farm': 'TEB', 'criticality': 'baixa', 'base_failures': 26, 'base_failure_rate': 0.3, 'base_availability': 97.97, 'base_mttr': 3.11}
+)
+
+
+class Turbine(db.Model):
+    """Turbina cadastrada e seus parâmetros base
+
+    Os parâmetros base alimentam a simulação em tempo real e a geração de
+    dados de treinamento. Turbinas desativadas (active=False) saem da frota
+    sem perder o histórico. revision é incrementado a cada alteração, então
+    a soma das revisões identifica uma versão do cadastro e permite a outros
+    processos detectar mudanças sem reler a tabela.
+    """
+    __tablename__ = 'turbines'
+
+    id = db.Column(db.String(16), primary_key=True)
+    name = db.Column(db.String(80))
+    farm = db.Column(db.String(32), nullable=False, default='TEB', index=True)
+    criticality = db.Column(db.String(16), nullable=False, default='baixa')
+    base_failures = db.Column(db.Integer, nullable=False, default=0)
+    base_failure_rate = db.Column(db.Float, nullable=False, default=0.4)
+    base_availability = db.Column(db.Float, nullable=False, default=95.0)
+    base_mttr = db.Column(db.Float, nullable=False, default=5.0)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    revision = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.Integer, nullable=False, default=0)  # Segundos desde a época
+
+    def __repr__(self):
+        return f'<Turbine {self.id}>'
+
+    def to_dict(self):
+        return {
+            column.name: getattr(self, column.name) for column in self.__table__.columns
+        }
@@ -0,0 +1,64 @@
+from flask import Blueprint, Response
+from src.services.metrics import metrics, PROMETHEUS_CONTENT_TYPE
+from src.services.telemetry_ingest import telemetry_ingest
+from src.services.alert_engine import alert_engine
+from src.ml_models.predictive_model import predictive_model
+from src.ml_models.prediction_cache import prediction_cache
+from src.routes.turbine_data import fleet_snapshot, kpis_snapshot
+from src.routes.realtime import realtime_feed
+from src.ml_models.anomaly_stream import anomaly_stream
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def collect_model():
+    """Qualidade e estado do modelo publicado (antes só impressos no treinamento)"""
+    status = predictive_model.status()
+    quality = predictive_model.metrics or {}
+    samples = [
+        ({'model': model, 'metric': metric}, quality.get(f'{model}_{metric}'))
+        for model in ('failure', 'availability') for metric in ('mae', 'r2')
+    ]
+    training = quality.get('training') or {}
+    delta = quality.get('delta') or {}
+    return [
+        ('teb_model_ready', 'gauge', 'Modelo carregado e aquecido (1) ou não (0).', [({}, status['ready'])]),
+        ('teb_model_info', 'gauge', 'Versão e backend de inferência do modelo carregado.',
+         [({'version': status['version'], 'backend': status['inference_backend']}, 1)] if status['version'] else []),
+        ('teb_model_quality', 'gauge', 'MAE e R² do último treinamento no conjunto de teste.', samples),
+        ('teb_model_fit_seconds', 'gauge', 'Tempo de ajuste de cada estimador no último treinamento.',
+         [({'estimator': name}, seconds) for name, seconds in (training.get('model_wall_time') or {}).items()]),
+        ('teb_model_baseline_delta', 'gauge', 'Retreino incremental menos o treino completo de referência (MAE e R²).',
+         [({'model': model, 'metric': metric}, delta.get(f'{model}_{metric}'))
+          for model in ('failure', 'availability') for metric in ('mae', 'r2')])
+    ]
+
+
+def collect_services():
+    """Contadores internos dos serviços (ingestão, caches, alertas e feed)"""
+    families = {
+        'teb_ingest': (telemetry_ingest.stats(), ('accepted', 'rejected', 'flushed', 'flushes', 'failed_flushes'), ('buffered',)),
+        'teb_prediction_cache': (prediction_cache.stats(), ('hits', 'misses', 'evictions', 'invalidations'), ('entries', 'bytes')),
+        'teb_fleet_snapshot': (fleet_snapshot.stats(), ('hits', 'misses', 'coalesced', 'errors'), ('entries',)),
+        'teb_kpis_snapshot': (kpis_snapshot.stats(), ('hits', 'misses', 'coalesced', 'errors'), ('entries',)),
+        'teb_alerts': (alert_engine.stats(), ('evaluations', 'opened', 'updated', 'cleared', 'acknowledged'), ('active',)),
+        'teb_realtime_feed': (realtime_feed.stats(), (), ('subscribers',)),
+        'teb_anomaly_stream': (anomaly_stream.stats(), ('samples', 'batches', 'events', 'unscored_samples'), ('turbines', 'anomalous'))
+    }
+    collected = []
+    for prefix, (stats, counters, gauges) in families.items():
+        for name in counters:
+            collected.append((f'{prefix}_{name}_total', 'counter', f'{prefix}: {name}.', [({}, stats.get(name))]))
+        for name in gauges:
+            collected.append((f'{prefix}_{name}', 'gauge', f'{prefix}: {name}.', [({}, stats.get(name))]))
+    return collected
+
+
+metrics.add_collector(collect_model)
+metrics.add_collector(collect_services)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Endpoint com as métricas do processo no formato texto do Prometheus"""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,27 +1,212 @@
 from flask import Blueprint, jsonify, request
 import numpy as np
 import datetime
+import time
+import zlib
 from src.ml_models.predictive_model import predictive_model
+from src.ml_models.model_registry import model_registry
+from src.ml_models.features import BASE_FEATURES, DEFAULT_TURBINE_AGE
+from src.ml_models.forecasting import (
+    FORECAST_HORIZON_DAYS, MAX_FORECAST_HORIZON_DAYS, FAILURE_THRESHOLD, AVAILABILITY_THRESHOLD, QUANTILES,
+    tree_quantiles, point_days_to_failure, priority_agreement
+)
+from src.services.telemetry_ingest import telemetry_ingest
+from src.ml_models.training_jobs import training_jobs, TRAINING_MODES
+from src.ml_models.prediction_cache import prediction_cache
+from src.services.snapshot_cache import SNAPSHOT_TTL
+from src.services.alert_engine import alert_engine
+from src.services.turbine_registry import turbine_registry
 
 ml_bp = Blueprint('ml', __name__)
 
+def invalidate_predictions(connection, rows):
+    """Listener de flush: descarta as previsões em cache das turbinas gravadas
+
+    Só depois do commit; um flush desfeito não gravou nada e o cache continua valendo.
+    """
+    turbine_ids = {row[0] for row in rows}
+    
+    def finish(committed):
+        if committed:
+            prediction_cache.invalidate_turbines(turbine_ids)
+    return finish
+
+# Invalidar o cache de previsões quando o modelo é trocado ou chega telemetria
+predictive_model.add_swap_listener(prediction_cache.clear)
+telemetry_ingest.add_flush_listener(invalidate_predictions)
+
+def simulation_uniforms(turbine_ids, n_draws, stream=0):
+    """Valores uniformes em (0, 1) por turbina, fixos dentro de cada janela de snapshot
+
+    Cada valor é um hash (splitmix64) da janela, da turbina e da posição, então
+    a mesma turbina tem as mesmas entradas simuladas (e acerta o cache de
+    previsões) até a janela virar, consultada sozinha ou com a frota inteira,
+    e só as turbinas pedidas são calculadas. Como não há estado, todos os
+    processos sorteiam os mesmos valores na mesma janela. stream separa
+    sorteios independentes (ex.: entradas do modelo e dados em tempo real).
+    Retorna (len(turbine_ids), n_draws).
+    """
+    window = int(time.time() // SNAPSHOT_TTL) if SNAPSHOT_TTL > 0 else time.time_ns()
+    keys = np.fromiter((zlib.crc32(t.encode()) for t in turbine_ids), dtype=np.uint64, count=len(turbine_ids))
+    counters = keys[:, np.newaxis] * np.uint64(n_draws) + np.arange(n_draws, dtype=np.uint64)
+    seed = _splitmix64(np.array([window], dtype=np.uint64))
+    if stream:
+        seed = _splitmix64(seed ^ np.uint64(stream))
+    bits = _splitmix64(counters ^ seed)
+    return ((bits >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0 ** -53
+
+def _splitmix64(x):
+    with np.errstate(over='ignore'):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def _normal(uniforms, k):
+    """k-ésima normal padrão (Box-Muller) a partir das colunas 2k e 2k+1"""
+    return np.sqrt(-2 * np.log(uniforms[:, 2 * k])) * np.cos(2 * np.pi * uniforms[:, 2 * k + 1])
+
+def apply_latest_telemetry(latest, current_data, row):
+    """Substitui os valores simulados da linha row pela última telemetria da turbina (latest)
+
+    Retorna 'telemetry' se havia amostra da turbina, senão 'simulated'.
+    """
+    if latest is None:
+        return 'simulated'
+    
+    for feature in BASE_FEATURES:
+        value = latest.get(feature)
+        if value is None:
+            continue
+        current_data[feature][row] = value
+    return 'telemetry'
+
+def fleet_inputs(fleet, rows):
+    """Entradas atuais das linhas indicadas do cadastro (um vetor por feature) e a origem de cada uma"""
+    # Simular dados específicos para cada turbina
+    turbine_ids = [fleet.ids[i] for i in rows]
+    base_rates = fleet.base_failure_rate[rows]
+    uniforms = simulation_uniforms(turbine_ids, 13)
+    current_data = {
+        'wind_speed': 12 + 3 * _normal(uniforms, 0),
+        'temperature': 25 + 5 * _normal(uniforms, 1),
+        'humidity': 60 + 15 * _normal(uniforms, 2),
+        'operating_hours': 20 + 4 * _normal(uniforms, 3),
+        'power_output': 2.0 + 0.3 * _normal(uniforms, 4),
+        'vibration_level': 2 * (1 + base_rates) + 0.5 * _normal(uniforms, 5),
+        'turbine_age': np.full(len(turbine_ids), DEFAULT_TURBINE_AGE),
+        'days_since_maintenance': -30 * (1 + base_rates) * np.log(uniforms[:, 12])
+    }
+    latest = telemetry_ingest.latest_many(turbine_ids)
+    data_sources = [apply_latest_telemetry(latest.get(t), current_data, i) for i, t in enumerate(turbine_ids)]
+    return current_data, data_sources
+
+def failure_scale(fleet, rows):
+    """Fator de ajuste da probabilidade de falha pelo histórico de cada turbina"""
+    return 0.5 + fleet.base_failure_rate[rows]
+
+def predict_rows(fleet, rows):
+    """Previsões das linhas indicadas do cadastro numa única passada pelos modelos
+
+    A probabilidade de falha é ajustada pelo histórico da turbina, também em
+    cada árvore. Intervalo, confiança e dias até a falha saem das árvores de
+    hoje (em cache), mantendo a probabilidade constante; o forecast que
+    projeta as entradas dia a dia fica em /ml/forecast. Retorna
+    (batch, data_sources, records), com records as entradas usadas (um vetor
+    por feature).
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    records, data_sources = fleet_inputs(fleet, rows)
+    
+    # Uma única passada pelos modelos, só para as turbinas fora do cache
+    batch = prediction_cache.predict(predictive_model, [fleet.ids[i] for i in rows], records)
+    
+    # Ajustar previsão baseada no histórico da turbina
+    adjustment = failure_scale(fleet, rows)
+    failure_trees = np.clip(batch.pop('failure_trees') * adjustment[:, np.newaxis], 0, 1)
+    batch['failure_probability'] = np.minimum(1.0, batch['failure_probability'] * adjustment)
+    batch['failure_probability_interval'] = tree_quantiles(failure_trees)
+    batch['confidence'] = priority_agreement(failure_trees, batch['failure_probability'])
+    batch['days_to_failure'] = point_days_to_failure(batch['failure_probability'])
+    
+    return batch, data_sources, records
+
+def quantile_dict(values, digits=3):
+    """Linha de quantis do forecast como {'p10': ..., 'p50': ..., 'p90': ...}
+
+    NaN (além do horizonte) vira None; com digits=0 os valores são dias inteiros.
+    """
+    return {
+        f'p{round(q * 100)}': None if np.isnan(v) else (int(v) if digits == 0 else round(float(v), digits))
+        for q, v in zip(QUANTILES, values)
+    }
+
+def forecast_options():
+    """Parâmetros de forecast da query string (horizon, failure_threshold, availability_threshold)
+
+    Levanta ValueError com a mensagem para o cliente se algum for inválido.
+    """
+    try:
+        horizon = int(request.args.get('horizon', FORECAST_HORIZON_DAYS))
+        failure_threshold = float(request.args.get('failure_threshold', FAILURE_THRESHOLD))
+        availability_threshold = float(request.args.get('availability_threshold', AVAILABILITY_THRESHOLD))
+    except ValueError:
+        raise ValueError('horizon deve ser inteiro e os limiares devem ser números') from None
+    
+    if not 1 <= horizon <= MAX_FORECAST_HORIZON_DAYS:
+        raise ValueError(f'horizon deve estar entre 1 e {MAX_FORECAST_HORIZON_DAYS}')
+    if not 0 <= failure_threshold <= 1:
+        raise ValueError('failure_threshold deve estar entre 0 e 1')
+    if not 0 <= availability_threshold <= 100:
+        raise ValueError('availability_threshold deve estar entre 0 e 100')
+    
+    return {
+        'horizon_days': horizon,
+        'failure_threshold': failure_threshold,
+        'availability_threshold': availability_threshold
+    }
+
+def forecast_summary(forecast, i):
+    """Resumo do forecast da linha i (intervalos e tempos até os limiares)"""
+    summary = {
+        'failure_probability': quantile_dict(forecast['failure_probability'][i]),
+        'predicted_availability': quantile_dict(forecast['predicted_availability'][i], digits=2),
+        'days_to_failure': quantile_dict(forecast['days_to_failure'][i], digits=0),
+        'failure_within_horizon': round(float(forecast['failure_within_horizon'][i]), 3),
+        'days_to_failure_threshold': quantile_dict(forecast['days_to_failure_threshold'][i], digits=0),
+        'confidence': round(float(forecast['confidence'][i]), 2)
+    }
+    if 'days_to_availability_threshold' in forecast:
+        summary['days_to_availability_threshold'] = quantile_dict(
+            forecast['days_to_availability_threshold'][i], digits=0
+        )
+    return summary
+
 @ml_bp.route('/ml/train', methods=['POST'])
 def train_model():
-    """Endpoint para treinar o modelo preditivo"""
+    """Endpoint para agendar o treinamento do modelo preditivo em segundo plano"""
     try:
-        print("Iniciando treinamento do modelo...")
-        metrics = predictive_model.train_models()
+        data = request.get_json(silent=True) or {}
+        mode = data.get('mode', 'full')
+        if mode not in TRAINING_MODES:
+            return jsonify({'status': 'error', 'message': f"mode deve ser um de: {', '.join(TRAINING_MODES)}"}), 400
+        keys = ('n_turbines', 'start', 'end', 'freq', 'seed', 'parallel', 'n_jobs')
+        if mode == 'incremental':
+            keys += ('new_trees', 'max_trees', 'baseline')
+        options = {k: data[k] for k in keys if k in data}
+        options['mode'] = mode
         
-        # Salvar modelo treinado
-        model_path = 'src/ml_models/trained_model.pkl'
-        predictive_model.save_model(model_path)
+        job, coalesced = training_jobs.submit(options)
         
         return jsonify({
-            'status': 'success',
-            'message': 'Modelo treinado com sucesso',
-            'metrics': metrics,
+            'status': 'accepted',
+            'message': 'Treinamento já em andamento' if coalesced else 'Treinamento agendado',
+            'job_id': job['id'],
+            'job_status': job['status'],
+            'coalesced': coalesced,
+            'status_url': f"/api/ml/jobs/{job['id']}",
             'timestamp': datetime.datetime.now().isoformat()
-        })
+        }), 202
     
     except Exception as e:
         return jsonify({
@@ -29,39 +214,42 @@ def train_model():
             'message': str(e)
         }), 500
 
+@ml_bp.route('/ml/jobs/<job_id>', methods=['GET'])
+def get_training_job(job_id):
+    """Endpoint para acompanhar um job de treinamento"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    
+    return jsonify(job)
+
 @ml_bp.route('/ml/predict/<turbine_id>', methods=['GET'])
 def predict_turbine(turbine_id):
     """Endpoint para previsão de uma turbina específica"""
     try:
-        # Carregar modelo se não estiver treinado
-        if not predictive_model.is_trained:
-            model_path = 'src/ml_models/trained_model.pkl'
-            if not predictive_model.load_model(model_path):
-                return jsonify({
-                    'error': 'Modelo não encontrado. Execute o treinamento primeiro.'
-                }), 400
-        
-        # Simular dados atuais da turbina (em produção, viria de sensores)
-        current_data = {
-            'wind_speed': np.random.normal(12, 3),
-            'temperature': np.random.normal(25, 5),
-            'humidity': np.random.normal(60, 15),
-            'operating_hours': np.random.normal(20, 4),
-            'power_output': np.random.normal(2.0, 0.3),
-            'vibration_level': np.random.normal(2, 0.5),
-            'turbine_age': 150,  # dias desde início do ano
-            'days_since_maintenance': np.random.exponential(30)
-        }
+        if not predictive_model.ensure_loaded():
+            return jsonify({
+                'error': 'Modelo não encontrado. Execute o treinamento primeiro.'
+            }), 400
         
-        # Fazer previsão
-        prediction = predictive_model.predict_failure_probability(current_data)
+        fleet = turbine_registry.index()
+        row = fleet.row(turbine_id)
+        if row is None:
+            return jsonify({'error': 'Turbina não encontrada'}), 404
         
-        # Calcular dias estimados para falha
+        # Mesmo caminho de /ml/predict/all: o mesmo valor ajustado vai para a
+        # resposta e para o motor de alertas
+        batch, data_sources, records = predict_rows(fleet, [row])
+        prediction = {name: batch[name][0].item() for name in ('failure_probability', 'predicted_availability',
+                                                              'anomaly_score', 'is_anomaly')}
+        alert_engine.observe(turbine_id, {
+            'failure_probability': prediction['failure_probability'],
+            'anomaly_detected': prediction['is_anomaly']
+        })
+        
+        # Dias até a falha e confiança a partir das árvores de hoje
+        days_to_failure = quantile_dict(batch['days_to_failure'][0], digits=0)
         failure_prob = prediction['failure_probability']
-        if failure_prob > 0.1:
-            days_to_failure = max(1, int(30 * (1 - failure_prob)))
-        else:
-            days_to_failure = np.random.randint(30, 90)
         
         # Determinar ação recomendada
         if failure_prob > 0.7:
@@ -82,16 +270,21 @@ def predict_turbine(turbine_id):
             'prediction': {
                 'failure_probability': round(prediction['failure_probability'], 3),
                 'predicted_availability': round(prediction['predicted_availability'], 2),
-                'estimated_days_to_failure': days_to_failure,
+                'estimated_days_to_failure': days_to_failure['p50'],
+                'days_to_failure_interval': days_to_failure,
+                'failure_probability_interval': quantile_dict(batch['failure_probability_interval'][0]),
+                'forecast_horizon_days': FORECAST_HORIZON_DAYS,
                 'anomaly_detected': bool(prediction['is_anomaly']),
                 'anomaly_score': round(prediction['anomaly_score'], 3)
             },
             'recommendation': {
                 'action': recommended_action,
                 'priority': priority,
-                'confidence': round(np.random.uniform(0.75, 0.95), 2)
+                'confidence': round(float(batch['confidence'][0]), 2)
             },
-            'input_data': {k: round(v, 2) for k, v in current_data.items()},
+            'input_data': {k: round(float(v[0]), 2) for k, v in records.items()},
+            'data_source': data_sources[0],
+            'model_info': predictive_model.model_info(),
             'timestamp': datetime.datetime.now().isoformat()
         }
         
@@ -100,95 +293,184 @@ def predict_turbine(turbine_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def predict_fleet():
+    """Previsões de todas as turbinas numa única passada pelos modelos
+
+    Retorna a resposta de /ml/predict/all, ou None se não há modelo carregado.
+    """
+    if not predictive_model.ensure_loaded():
+        return None
+    
+    fleet = turbine_registry.index()
+    turbines = fleet.ids
+    batch, data_sources, _ = predict_rows(fleet, range(len(fleet)))
+    adjusted_failure_probs = batch['failure_probability']
+    
+    predictions = []
+    for i, turbine_id in enumerate(turbines):
+        adjusted_failure_prob = float(adjusted_failure_probs[i])
+        days_to_failure = quantile_dict(batch['days_to_failure'][i], digits=0)
+        
+        if adjusted_failure_prob > 0.7:
+            recommended_action = 'immediate_maintenance'
+            priority = 'critical'
+        elif adjusted_failure_prob > 0.4:
+            recommended_action = 'schedule_maintenance'
+            priority = 'high'
+        elif adjusted_failure_prob > 0.2:
+            recommended_action = 'monitor_closely'
+            priority = 'medium'
+        else:
+            recommended_action = 'routine_monitoring'
+            priority = 'low'
+        
+        predictions.append({
+            'turbine_id': turbine_id,
+            'failure_probability': round(adjusted_failure_prob, 3),
+            'predicted_availability': round(float(batch['predicted_availability'][i]), 2),
+            'estimated_days_to_failure': days_to_failure['p50'],
+            'days_to_failure_interval': days_to_failure,
+            'recommended_action': recommended_action,
+            'priority': priority,
+            'confidence': round(float(batch['confidence'][i]), 2),
+            'anomaly_detected': bool(batch['is_anomaly'][i]),
+            'data_source': data_sources[i]
+        })
+    
+    alert_engine.observe_many({
+        p['turbine_id']: {'failure_probability': p['failure_probability'], 'anomaly_detected': p['anomaly_detected']}
+        for p in predictions
+    })
+    
+    # Estatísticas gerais
+    high_risk_turbines = [p for p in predictions if p['failure_probability'] > 0.4]
+    avg_availability = np.mean([p['predicted_availability'] for p in predictions])
+    
+    return {
+        'predictions': predictions,
+        'summary': {
+            'total_turbines': len(turbines),
+            'high_risk_turbines': len(high_risk_turbines),
+            'avg_predicted_availability': round(float(avg_availability), 2),
+            'critical_actions_needed': len([p for p in predictions if p['priority'] == 'critical']),
+            'anomalies_detected': len([p for p in predictions if p['anomaly_detected']])
+        },
+        'model_info': {
+            **predictive_model.model_info(),
+            'algorithm': 'Random Forest + Isolation Forest'
+        },
+        'forecast_horizon_days': FORECAST_HORIZON_DAYS,
+        'timestamp': datetime.datetime.now().isoformat()
+    }
+
 @ml_bp.route('/ml/predict/all', methods=['GET'])
 def predict_all_turbines():
     """Endpoint para previsões de todas as turbinas"""
     try:
-        # Carregar modelo se não estiver treinado
-        if not predictive_model.is_trained:
-            model_path = 'src/ml_models/trained_model.pkl'
-            if not predictive_model.load_model(model_path):
-                return jsonify({
-                    'error': 'Modelo não encontrado. Execute o treinamento primeiro.'
-                }), 400
-        
-        turbines = ['TEB001', 'TEB002', 'TEB003', 'TEB004', 'TEB005', 'TEB006', 'TEB007', 'TEB008']
-        predictions = []
-        
-        for turbine_id in turbines:
-            # Simular dados específicos para cada turbina
-            base_failure_rates = {
-                'TEB001': 0.8, 'TEB002': 0.4, 'TEB003': 0.3, 'TEB004': 0.5,
-                'TEB005': 0.3, 'TEB006': 0.3, 'TEB007': 0.3, 'TEB008': 0.3
-            }
-            
-            base_rate = base_failure_rates.get(turbine_id, 0.4)
-            
-            current_data = {
-                'wind_speed': np.random.normal(12, 3),
-                'temperature': np.random.normal(25, 5),
-                'humidity': np.random.normal(60, 15),
-                'operating_hours': np.random.normal(20, 4),
-                'power_output': np.random.normal(2.0, 0.3),
-                'vibration_level': np.random.normal(2 * (1 + base_rate), 0.5),
-                'turbine_age': 150,
-                'days_since_maintenance': np.random.exponential(30 * (1 + base_rate))
-            }
-            
-            prediction = predictive_model.predict_failure_probability(current_data)
-            
-            # Ajustar previsão baseada no histórico da turbina
-            adjusted_failure_prob = prediction['failure_probability'] * (0.5 + base_rate)
-            adjusted_failure_prob = min(1.0, adjusted_failure_prob)
-            
-            days_to_failure = max(1, int(60 * (1 - adjusted_failure_prob)))
-            
-            if adjusted_failure_prob > 0.7:
-                recommended_action = 'immediate_maintenance'
-                priority = 'critical'
-            elif adjusted_failure_prob > 0.4:
-                recommended_action = 'schedule_maintenance'
-                priority = 'high'
-            elif adjusted_failure_prob > 0.2:
-                recommended_action = 'monitor_closely'
-                priority = 'medium'
-            else:
-                recommended_action = 'routine_monitoring'
-                priority = 'low'
-            
-            predictions.append({
-                'turbine_id': turbine_id,
-                'failure_probability': round(adjusted_failure_prob, 3),
-                'predicted_availability': round(prediction['predicted_availability'], 2),
-                'estimated_days_to_failure': days_to_failure,
-                'recommended_action': recommended_action,
-                'priority': priority,
-                'confidence': round(np.random.uniform(0.75, 0.95), 2),
-                'anomaly_detected': bool(prediction['is_anomaly'])
-            })
+        response = predict_fleet()
+        if response is None:
+            return jsonify({
+                'error': 'Modelo não encontrado. Execute o treinamento primeiro.'
+            }), 400
         
-        # Estatísticas gerais
-        high_risk_turbines = [p for p in predictions if p['failure_probability'] > 0.4]
-        avg_availability = np.mean([p['predicted_availability'] for p in predictions])
+        return jsonify(response)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ml_bp.route('/ml/forecast', methods=['GET'])
+def forecast_all_turbines():
+    """Endpoint para o forecast de falha de todas as turbinas
+
+    Parâmetros opcionais: horizon (dias, padrão TEB_FORECAST_HORIZON_DAYS),
+    failure_threshold e availability_threshold.
+    """
+    try:
+        try:
+            options = forecast_options()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        response = {
-            'predictions': predictions,
-            'summary': {
-                'total_turbines': len(turbines),
-                'high_risk_turbines': len(high_risk_turbines),
-                'avg_predicted_availability': round(avg_availability, 2),
-                'critical_actions_needed': len([p for p in predictions if p['priority'] == 'critical']),
-                'anomalies_detected': len([p for p in predictions if p['anomaly_detected']])
-            },
-            'model_info': {
-                'version': '1.0.0',
-                'last_training': datetime.datetime.now().isoformat(),
-                'algorithm': 'Random Forest + Isolation Forest'
-            },
+        if not predictive_model.ensure_loaded():
+            return jsonify({
+                'error': 'Modelo não encontrado. Execute o treinamento primeiro.'
+            }), 400
+        
+        fleet = turbine_registry.index()
+        rows = np.arange(len(fleet))
+        batch, data_sources, records = predict_rows(fleet, rows)
+        forecast = predictive_model.forecast(records, failure_scale=failure_scale(fleet, rows),
+                                             trajectory=True, **options)
+        
+        return jsonify({
+            'forecasts': [
+                {
+                    'turbine_id': turbine_id,
+                    'failure_probability': round(float(batch['failure_probability'][i]), 3),
+                    'forecast': forecast_summary(forecast, i),
+                    'data_source': data_sources[i]
+                }
+                for i, turbine_id in enumerate(fleet.ids)
+            ],
+            **options,
+            'quantiles': list(QUANTILES),
+            'model_info': predictive_model.model_info(),
             'timestamp': datetime.datetime.now().isoformat()
-        }
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ml_bp.route('/ml/forecast/<turbine_id>', methods=['GET'])
+def forecast_turbine(turbine_id):
+    """Endpoint para o forecast de falha de uma turbina, com a trajetória dia a dia
+
+    Além dos parâmetros de /ml/forecast, aceita step (a cada quantos dias
+    incluir um ponto da trajetória, padrão 1).
+    """
+    try:
+        try:
+            options = forecast_options()
+            step = int(request.args.get('step', 1))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if step < 1:
+            return jsonify({'error': 'step deve ser pelo menos 1'}), 400
         
-        return jsonify(response)
+        if not predictive_model.ensure_loaded():
+            return jsonify({
+                'error': 'Modelo não encontrado. Execute o treinamento primeiro.'
+            }), 400
+        
+        fleet = turbine_registry.index()
+        row = fleet.row(turbine_id)
+        if row is None:
+            return jsonify({'error': 'Turbina não encontrada'}), 404
+        
+        records, data_sources = fleet_inputs(fleet, np.array([row]))
+        forecast = predictive_model.forecast(records, failure_scale=failure_scale(fleet, np.array([row])),
+                                             trajectory=True, **options)
+        
+        trajectory = [
+            {
+                'day': day,
+                'failure_probability': quantile_dict(forecast['failure_probability_path'][0, day]),
+                'predicted_availability': quantile_dict(forecast['predicted_availability_path'][0, day], digits=2)
+            }
+            for day in range(0, forecast['horizon_days'], step)
+        ]
+        
+        return jsonify({
+            'turbine_id': turbine_id,
+            'forecast': forecast_summary(forecast, 0),
+            'trajectory': trajectory,
+            **options,
+            'quantiles': list(QUANTILES),
+            'input_data': {k: round(float(v[0]), 2) for k, v in records.items()},
+            'data_source': data_sources[0],
+            'model_info': predictive_model.model_info(),
+            'timestamp': datetime.datetime.now().isoformat()
+        })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -197,12 +479,10 @@ def predict_all_turbines():
 def get_feature_importance():
     """Endpoint para obter importância das features"""
     try:
-        if not predictive_model.is_trained:
-            model_path = 'src/ml_models/trained_model.pkl'
-            if not predictive_model.load_model(model_path):
-                return jsonify({
-                    'error': 'Modelo não encontrado. Execute o treinamento primeiro.'
-                }), 400
+        if not predictive_model.ensure_loaded():
+            return jsonify({
+                'error': 'Modelo não encontrado. Execute o treinamento primeiro.'
+            }), 400
         
         importance = predictive_model.get_feature_importance()
         
@@ -216,17 +496,75 @@ def get_feature_importance():
 
 @ml_bp.route('/ml/model-status', methods=['GET'])
 def get_model_status():
-    """Endpoint para verificar status do modelo"""
+    """Endpoint para verificar status do modelo (só metadados em memória)"""
     try:
-        model_path = 'src/ml_models/trained_model.pkl'
-        model_exists = predictive_model.load_model(model_path) if not predictive_model.is_trained else True
+        status = predictive_model.status()
         
         return jsonify({
-            'is_trained': predictive_model.is_trained,
-            'model_exists': model_exists,
+            **status,
+            'model_exists': status['is_trained'],
+            'prediction_cache': prediction_cache.stats(),
             'last_check': datetime.datetime.now().isoformat()
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@ml_bp.route('/ml/reload', methods=['POST'])
+def reload_model():
+    """Endpoint para recarregar o modelo ativo (ou uma versão específica) do registro"""
+    try:
+        data = request.get_json(silent=True) or {}
+        version = data.get('version')
+        
+        if version is not None:
+            model_registry.activate(version)
+        
+        if not predictive_model.reload(version=version):
+            return jsonify({
+                'error': 'Modelo não encontrado. Execute o treinamento primeiro.'
+            }), 400
+        
+        return jsonify({
+            'status': 'success',
+            **predictive_model.status()
+        })
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ml_bp.route('/ml/ready', methods=['GET'])
+def get_readiness():
+    """Endpoint de prontidão: 503 até o modelo estar carregado e aquecido"""
+    body = {
+        'ready': predictive_model.ready,
+        **predictive_model.model_info(),
+        'timestamp': datetime.datetime.now().isoformat()
+    }
+    return jsonify(body), 200 if predictive_model.ready else 503
+
+@ml_bp.route('/ml/models', methods=['GET'])
+def list_model_versions():
+    """Endpoint para listar as versões publicadas no registro de modelos"""
+    try:
+        current = model_registry.current_version()
+        versions = []
+        for version in reversed(model_registry.list_versions()):
+            manifest = model_registry.load_manifest(version) or {}
+            versions.append({
+                'version': version,
+                'trained_at': manifest.get('trained_at'),
+                'metrics': manifest.get('metrics'),
+                'active': version == current
+            })
+        
+        return jsonify({
+            'current_version': current,
+            'loaded_version': predictive_model.version,
+            'versions': versions
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,41 @@
+from flask import Blueprint, Response, jsonify, stream_with_context
+from src.routes.turbine_data import fleet_snapshot
+from src.routes.ml_predictions import predict_fleet
+from src.services.realtime_feed import RealtimeFeed
+from src.services.alert_engine import alert_engine
+
+realtime_bp = Blueprint('realtime', __name__)
+
+def build_fleet_state():
+    """Estado da frota enviado pelo feed: dados em tempo real, alertas e previsões"""
+    state = {
+        **fleet_snapshot.get(),
+        'predictions': predict_fleet()
+    }
+    # Alertas lidos depois das previsões, que também alimentam o motor
+    state['alerts'] = alert_engine.summary()
+    return state
+
+# Feed global: um snapshot por tick, compartilhado por todos os clientes
+realtime_feed = RealtimeFeed(build_fleet_state, collections={
+    'realtime': ('turbines', 'id'),
+    'alerts': ('alerts', 'id'),
+    'predictions': ('predictions', 'turbine_id')
+})
+
+@realtime_bp.route('/realtime/stream', methods=['GET'])
+def stream_realtime():
+    """Endpoint Server-Sent Events com o estado da frota
+
+    Envia um evento 'snapshot' com o estado completo na conexão e depois
+    eventos 'delta' só com as turbinas, alertas e previsões que mudaram.
+    """
+    response = Response(stream_with_context(realtime_feed.stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Não bufferizar atrás de proxy (nginx)
+    return response
+
+@realtime_bp.route('/realtime/stats', methods=['GET'])
+def get_feed_stats():
+    """Endpoint com contadores do feed (clientes conectados, ticks, deltas)"""
+    return jsonify(realtime_feed.stats())
@@ -0,0 +1,60 @@
+from flask import Blueprint, jsonify, request
+import datetime
+from src.services.telemetry_ingest import telemetry_ingest, parse_payload, BufferFullError
+from src.ml_models.anomaly_stream import anomaly_stream, MAX_ANOMALY_EVENTS
+
+telemetry_bp = Blueprint('telemetry', __name__)
+
+@telemetry_bp.route('/telemetry', methods=['POST'])
+def ingest_telemetry():
+    """Endpoint para receber lotes de telemetria dos sensores
+
+    Aceita JSON (lista de amostras ou colunar), JSON lines
+    (application/x-ndjson) ou um array NumPy estruturado (application/x-npy).
+    As amostras vão para um buffer em memória e são gravadas em lote.
+    """
+    try:
+        rows = parse_payload(request.get_data(), request.content_type)
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'error': f'Payload inválido: {e}'}), 400
+
+    try:
+        accepted = telemetry_ingest.submit(rows)
+    except BufferFullError as e:
+        response = jsonify({
+            'error': 'Buffer de ingestão cheio, tente novamente',
+            'retry_after': e.retry_after
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+
+    return jsonify({
+        'accepted': accepted,
+        'timestamp': datetime.datetime.now().isoformat()
+    }), 202
+
+@telemetry_bp.route('/telemetry/stats', methods=['GET'])
+def get_ingest_stats():
+    """Endpoint com contadores do buffer de ingestão"""
+    return jsonify(telemetry_ingest.stats())
+
+@telemetry_bp.route('/telemetry/anomalies', methods=['GET'])
+def get_stream_anomalies():
+    """Endpoint com o estado da detecção contínua de anomalias na telemetria
+
+    Retorna as turbinas em anomalia, os eventos de mudança de estado mais
+    recentes e os contadores do detector. Parâmetros opcionais: turbine_id e
+    limit (quantidade de eventos, padrão 100).
+    """
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({'error': 'limit deve ser um inteiro'}), 400
+    if not 1 <= limit <= MAX_ANOMALY_EVENTS:
+        return jsonify({'error': f'limit deve estar entre 1 e {MAX_ANOMALY_EVENTS}'}), 400
+
+    turbine_id = request.args.get('turbine_id')
+    summary = anomaly_stream.summary(turbine_id=turbine_id, limit=limit)
+    if turbine_id is not None:
+        summary['state'] = anomaly_stream.state(turbine_id)
+    return jsonify(summary)
@@ -1,196 +1,357 @@
 from flask import Blueprint, jsonify, request
-import random
 import datetime
 import time
+import numpy as np
+from src.services.telemetry_store import telemetry_store, parse_timestamp, parse_resolution
+from src.services.snapshot_cache import SnapshotCache
+from src.services.alert_engine import alert_engine
+from src.services.turbine_registry import turbine_registry
+from src.services.streaming import ListQuery, keyset_slice, stream_list
+from src.models.telemetry import TELEMETRY_METRICS
+from src.ml_models.predictive_model import predictive_model
+from src.ml_models.forecasting import FORECAST_HORIZON_DAYS
+from src.routes.ml_predictions import predict_rows, quantile_dict, simulation_uniforms
 
 turbine_bp = Blueprint('turbine', __name__)
 
-# Dados base das turbinas
-TURBINES_BASE_DATA = {
-    'TEB001': {'base_failures': 40, 'base_mttr': 73.46, 'base_availability': 26.24, 'criticality': 'alta'},
-    'TEB002': {'base_failures': 33, 'base_mttr': 3.54, 'base_availability': 97.07, 'criticality': 'media'},
-    'TEB003': {'base_failures': 27, 'base_mttr': 2.19, 'base_availability': 98.52, 'criticality': 'baixa'},
-    'TEB004': {'base_failures': 46, 'base_mttr': 6.17, 'base_availability': 92.88, 'criticality': 'media'},
-    'TEB005': {'base_failures': 24, 'base_mttr': 5.18, 'base_availability': 96.88, 'criticality': 'baixa'},
-    'TEB006': {'base_failures': 30, 'base_mttr': 2.41, 'base_availability': 98.19, 'criticality': 'baixa'},
-    'TEB007': {'base_failures': 25, 'base_mttr': 3.25, 'base_availability': 97.96, 'criticality': 'baixa'},
-    'TEB008': {'base_failures': 26, 'base_mttr': 3.11, 'base_availability': 97.97, 'criticality': 'baixa'}
-}
+# Sorteios dos dados em tempo real, independentes das entradas simuladas do modelo
+REALTIME_STREAM = 1
+# Chave da variação comum a toda a frota em simulation_uniforms
+FLEET_KEY = '__fleet__'
 
 def generate_real_time_data():
-    """Gera dados em tempo real com pequenas variações"""
+    """Gera dados em tempo real com pequenas variações
+
+    Calculado de uma vez sobre os arrays do cadastro de turbinas. As variações
+    vêm de simulation_uniforms, então são as mesmas em todos os workers
+    durante a janela do snapshot (e o motor de alertas recebe as mesmas
+    disponibilidades de qualquer um deles).
+    """
     current_time = datetime.datetime.now()
+    fleet = turbine_registry.index()
+    n = len(fleet)
+    uniforms = simulation_uniforms(fleet.ids, 3, stream=REALTIME_STREAM)
     
     # Simular variações baseadas no horário
     hour_factor = 1 + (current_time.hour - 12) * 0.02  # Variação baseada na hora
-    day_factor = 1 + random.uniform(-0.1, 0.1)  # Variação aleatória diária
+    day_factor = 1 + (simulation_uniforms([FLEET_KEY], 1, stream=REALTIME_STREAM)[0, 0] * 0.2 - 0.1)  # Variação aleatória da frota
+    
+    # Aplicar variações pequenas aos dados base
+    failures = np.maximum(0, (fleet.base_failures * day_factor).astype(int))
+    mttr = np.round(np.maximum(0.1, fleet.base_mttr * hour_factor), 2)
+    availability = np.round(np.clip(fleet.base_availability * (2 - day_factor), 0.1, 99.9), 2)
+    power_output = np.round(1.8 + 0.4 * uniforms[:, 0], 2)  # MW
+    wind_speed = np.round(8 + 7 * uniforms[:, 1], 1)  # m/s
+    temperature = np.round(20 + 15 * uniforms[:, 2], 1)  # °C
     
-    turbines_data = []
+    # Status atual da turbina
+    status = np.where(availability < 50, 'critical', np.where(availability < 90, 'warning', 'operational'))
     
-    for turbine_id, base_data in TURBINES_BASE_DATA.items():
-        # Aplicar variações pequenas aos dados base
-        current_failures = max(0, int(base_data['base_failures'] * day_factor))
-        current_mttr = max(0.1, base_data['base_mttr'] * hour_factor)
-        current_availability = min(99.9, max(0.1, base_data['base_availability'] * (2 - day_factor)))
-        
-        # Status atual da turbina
-        status = 'operational'
-        if current_availability < 50:
-            status = 'critical'
-        elif current_availability < 90:
-            status = 'warning'
-        
-        turbine_data = {
-            'id': turbine_id,
-            'name': turbine_id,
-            'failures': current_failures,
-            'mttr': round(current_mttr, 2),
-            'availability': round(current_availability, 2),
-            'criticality': base_data['criticality'],
-            'status': status,
-            'last_update': current_time.isoformat(),
-            'power_output': round(random.uniform(1.8, 2.2), 2),  # MW
-            'wind_speed': round(random.uniform(8, 15), 1),  # m/s
-            'temperature': round(random.uniform(20, 35), 1)  # °C
+    last_update = current_time.isoformat()
+    return [
+        {
+            'id': fleet.ids[i],
+            'name': fleet.names[i],
+            'farm': fleet.farms[i],
+            'failures': failures[i].item(),
+            'mttr': mttr[i].item(),
+            'availability': availability[i].item(),
+            'criticality': fleet.criticality[i],
+            'status': str(status[i]),
+            'last_update': last_update,
+            'power_output': power_output[i].item(),
+            'wind_speed': wind_speed[i].item(),
+            'temperature': temperature[i].item()
         }
-        
-        turbines_data.append(turbine_data)
+        for i in range(n)
+    ]
+
+def build_realtime_snapshot():
+    """Snapshot da frota com os KPIs gerais (resposta de /turbines/realtime)"""
+    data = generate_real_time_data()
     
-    return turbines_data
+    # Calcular KPIs gerais
+    total_failures = sum(t['failures'] for t in data)
+    avg_availability = sum(t['availability'] for t in data) / len(data) if data else 0.0
+    critical_turbines = [t['name'] for t in data if t['status'] == 'critical']
+    
+    return {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'turbines': data,
+        'kpis': {
+            'total_failures': total_failures,
+            'avg_availability': round(avg_availability, 2),
+            'critical_turbines': critical_turbines,
+            'operational_turbines': len([t for t in data if t['status'] == 'operational']),
+            'total_power_output': round(sum(t['power_output'] for t in data), 2)
+        }
+    }
+
+def build_fleet_snapshot():
+    """Dados em tempo real da frota; as disponibilidades alimentam o motor de alertas"""
+    realtime = build_realtime_snapshot()
+    alert_engine.observe_many({t['id']: {'availability': t['availability']} for t in realtime['turbines']})
+    return {'realtime': realtime}
+
+def build_default_kpis(resolution):
+    """KPIs da janela padrão de /kpis (últimos 180 dias até agora)"""
+    end_ts = int(time.time())
+    start_ts = end_ts - 180 * 86400
+    return start_ts, end_ts, telemetry_store.kpis(start_ts, end_ts, resolution)
+
+# Snapshots compartilhados por /turbines/realtime, /alerts, /kpis e o feed
+fleet_snapshot = SnapshotCache(build_fleet_snapshot)
+kpis_snapshot = SnapshotCache(build_default_kpis)
+
+# Uma mudança no cadastro vale já no próximo pedido, sem esperar a janela virar
+turbine_registry.add_change_listener(lambda index: fleet_snapshot.invalidate())
 
 @turbine_bp.route('/turbines/realtime', methods=['GET'])
 def get_realtime_data():
     """Endpoint para dados em tempo real das turbinas"""
     try:
-        data = generate_real_time_data()
-        
-        # Calcular KPIs gerais
-        total_failures = sum(t['failures'] for t in data)
-        avg_availability = sum(t['availability'] for t in data) / len(data)
-        critical_turbines = [t['name'] for t in data if t['status'] == 'critical']
-        
-        response = {
-            'timestamp': datetime.datetime.now().isoformat(),
-            'turbines': data,
-            'kpis': {
-                'total_failures': total_failures,
-                'avg_availability': round(avg_availability, 2),
-                'critical_turbines': critical_turbines,
-                'operational_turbines': len([t for t in data if t['status'] == 'operational']),
-                'total_power_output': round(sum(t['power_output'] for t in data), 2)
-            }
-        }
+        return jsonify(fleet_snapshot.get()['realtime'])
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@turbine_bp.route('/turbines', methods=['GET'])
+def list_turbines():
+    """Endpoint com o cadastro de turbinas
+
+    Parâmetros opcionais: farm (filtra por parque), include_inactive=true,
+    limit/after (paginação por id), fields e format=ndjson.
+    """
+    try:
+        try:
+            list_query = ListQuery.from_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        include_inactive = request.args.get('include_inactive', '').lower() in ('1', 'true', 'yes')
+        turbines, next_cursor = turbine_registry.page(
+            farm=request.args.get('farm'), include_inactive=include_inactive,
+            after=list_query.after, limit=list_query.limit
+        )
         
-        return jsonify(response)
+        return stream_list(turbines, list_query, key='turbines', count_field='total', next_cursor=next_cursor)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@turbine_bp.route('/turbines/<turbine_id>', methods=['GET'])
+def get_turbine(turbine_id):
+    """Endpoint com o cadastro de uma turbina"""
+    turbine = turbine_registry.get(turbine_id)
+    if turbine is None:
+        return jsonify({'error': 'Turbina não encontrada'}), 404
+    return jsonify(turbine)
+
+@turbine_bp.route('/turbines/<turbine_id>', methods=['PUT'])
+def put_turbine(turbine_id):
+    """Endpoint para cadastrar ou alterar uma turbina
+
+    Corpo JSON com qualquer um dos campos name, farm, criticality,
+    base_failures, base_failure_rate, base_availability, base_mttr e active.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Corpo JSON inválido'}), 400
+        
+        try:
+            turbine, created = turbine_registry.upsert(turbine_id, data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(turbine), 201 if created else 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@turbine_bp.route('/turbines/<turbine_id>', methods=['DELETE'])
+def delete_turbine(turbine_id):
+    """Endpoint para desativar uma turbina (o histórico é mantido)"""
+    try:
+        turbine = turbine_registry.deactivate(turbine_id)
+        if turbine is None:
+            return jsonify({'error': 'Turbina não encontrada'}), 404
+        return jsonify(turbine)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @turbine_bp.route('/turbines/<turbine_id>/history', methods=['GET'])
 def get_turbine_history(turbine_id):
-    """Endpoint para histórico de uma turbina específica"""
+    """Endpoint para histórico de uma turbina específica
+
+    Parâmetros opcionais: from/to (epoch ou ISO 8601, padrão: últimas 24h) e
+    resolution ('raw', '1m', '1h', '1d' ou segundos; padrão '1h'). Resoluções
+    múltiplas de 1 minuto são lidas dos rollups pré-agregados. Também aceita
+    limit/after (paginação por ts), fields (só as métricas pedidas são lidas
+    do banco) e format=ndjson; os pontos são enviados em streaming.
+    """
     try:
-        if turbine_id not in TURBINES_BASE_DATA:
+        if turbine_id not in turbine_registry.index():
             return jsonify({'error': 'Turbina não encontrada'}), 404
         
-        # Gerar histórico simulado das últimas 24 horas
-        history = []
-        current_time = datetime.datetime.now()
-        
-        for i in range(24):
-            timestamp = current_time - datetime.timedelta(hours=i)
-            base_data = TURBINES_BASE_DATA[turbine_id]
-            
-            # Variação temporal
-            time_factor = 1 + random.uniform(-0.15, 0.15)
-            
-            history_point = {
-                'timestamp': timestamp.isoformat(),
-                'availability': round(base_data['base_availability'] * time_factor, 2),
-                'power_output': round(random.uniform(1.5, 2.5), 2),
-                'wind_speed': round(random.uniform(6, 18), 1),
-                'temperature': round(random.uniform(18, 38), 1),
-                'failures_count': max(0, int(base_data['base_failures'] * time_factor / 24))
-            }
-            
-            history.append(history_point)
+        try:
+            end_ts = parse_timestamp(request.args.get('to'), default=int(time.time()))
+            start_ts = parse_timestamp(request.args.get('from'), default=end_ts - 24 * 3600)
+            resolution = parse_resolution(request.args.get('resolution', '1h'))
+            list_query = ListQuery.from_request()
+            after = parse_timestamp(list_query.after)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return jsonify({
+        if start_ts > end_ts:
+            return jsonify({'error': 'from deve ser anterior a to'}), 400
+        
+        metrics = TELEMETRY_METRICS
+        if list_query.fields is not None:
+            requested = {field.removesuffix('_min').removesuffix('_max') for field in list_query.fields}
+            metrics = [m for m in TELEMETRY_METRICS if m in requested]
+        
+        page_start, page_end, next_cursor = telemetry_store.page_range(
+            turbine_id, start_ts, end_ts, resolution, after=after, limit=list_query.limit
+        )
+        history = telemetry_store.iter_range(turbine_id, page_start, page_end, resolution, metrics)
+        
+        return stream_list(history, list_query, key='history', count_field='points', next_cursor=next_cursor, envelope={
             'turbine_id': turbine_id,
-            'history': list(reversed(history))  # Ordem cronológica
-        })
+            'from': datetime.datetime.fromtimestamp(start_ts).isoformat(),
+            'to': datetime.datetime.fromtimestamp(end_ts).isoformat(),
+            'resolution_seconds': resolution,
+            'source': telemetry_store.source_name(resolution)
+        })  # Ordem cronológica
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@turbine_bp.route('/alerts', methods=['GET'])
-def get_alerts():
-    """Endpoint para alertas ativos"""
+@turbine_bp.route('/kpis', methods=['GET'])
+def get_kpis():
+    """Endpoint com KPIs históricos (disponibilidade, falhas, MTTR, MTBF)
+
+    Parâmetros opcionais: from/to (epoch ou ISO 8601, padrão: últimos 180
+    dias) e resolution da tendência da frota (padrão '1d'). Os valores vêm
+    do maior rollup compatível com a resolução; a janela padrão é servida
+    do cache de snapshots.
+    """
     try:
-        current_data = generate_real_time_data()
-        alerts = []
-        
-        for turbine in current_data:
-            if turbine['status'] == 'critical':
-                alerts.append({
-                    'id': f"alert_{turbine['id']}_{int(time.time())}",
-                    'turbine_id': turbine['id'],
-                    'type': 'critical',
-                    'message': f"Turbina {turbine['id']} com disponibilidade crítica: {turbine['availability']}%",
-                    'timestamp': datetime.datetime.now().isoformat(),
-                    'priority': 'high'
-                })
-            elif turbine['availability'] < 95:
-                alerts.append({
-                    'id': f"alert_{turbine['id']}_{int(time.time())}",
-                    'turbine_id': turbine['id'],
-                    'type': 'warning',
-                    'message': f"Turbina {turbine['id']} com disponibilidade baixa: {turbine['availability']}%",
-                    'timestamp': datetime.datetime.now().isoformat(),
-                    'priority': 'medium'
-                })
+        try:
+            end_ts = parse_timestamp(request.args.get('to'), default=int(time.time()))
+            start_ts = parse_timestamp(request.args.get('from'), default=end_ts - 180 * 86400)
+            resolution = parse_resolution(request.args.get('resolution', '1d'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if start_ts > end_ts:
+            return jsonify({'error': 'from deve ser anterior a to'}), 400
+        if resolution <= 0:
+            return jsonify({'error': 'resolution deve ser maior que zero'}), 400
+        
+        if 'from' in request.args or 'to' in request.args:
+            kpis = telemetry_store.kpis(start_ts, end_ts, resolution)
+        else:
+            # Janela padrão: compartilhada entre os pedidos do mesmo snapshot
+            start_ts, end_ts, kpis = kpis_snapshot.get(resolution)
         
         return jsonify({
-            'alerts': alerts,
-            'total_alerts': len(alerts),
-            'critical_alerts': len([a for a in alerts if a['type'] == 'critical'])
+            'from': datetime.datetime.fromtimestamp(start_ts).isoformat(),
+            'to': datetime.datetime.fromtimestamp(end_ts).isoformat(),
+            'resolution_seconds': resolution,
+            **kpis
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@turbine_bp.route('/snapshot/stats', methods=['GET'])
+def get_snapshot_stats():
+    """Endpoint com acertos/faltas dos caches de snapshot da frota e de KPIs"""
+    return jsonify({
+        'fleet': fleet_snapshot.stats(),
+        'kpis': kpis_snapshot.stats()
+    })
+
+@turbine_bp.route('/alerts', methods=['GET'])
+def get_alerts():
+    """Endpoint para alertas ativos (leitura do estado do motor de alertas)
+
+    Parâmetros opcionais: turbine_id e status ('open' ou 'acknowledged').
+    """
+    try:
+        # Garante que o snapshot da janela atual já foi avaliado pelas regras
+        fleet_snapshot.get()
+        return jsonify(alert_engine.summary(
+            turbine_id=request.args.get('turbine_id'),
+            status=request.args.get('status')
+        ))
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@turbine_bp.route('/alerts/<alert_id>/acknowledge', methods=['POST'])
+def acknowledge_alert(alert_id):
+    """Endpoint para reconhecer um alerta ativo"""
+    alert = alert_engine.acknowledge(alert_id)
+    if alert is None:
+        return jsonify({'error': 'Alerta ativo não encontrado'}), 404
+    return jsonify(alert)
+
+@turbine_bp.route('/alerts/<alert_id>/clear', methods=['POST'])
+def clear_alert(alert_id):
+    """Endpoint para encerrar manualmente um alerta ativo"""
+    alert = alert_engine.clear(alert_id)
+    if alert is None:
+        return jsonify({'error': 'Alerta ativo não encontrado'}), 404
+    return jsonify(alert)
+
 @turbine_bp.route('/predictions', methods=['GET'])
 def get_predictions():
-    """Endpoint para previsões de manutenção"""
+    """Endpoint para previsões de manutenção
+
+    Parâmetros opcionais: limit/after (paginação por turbine_id), fields e
+    format=ndjson. As turbinas da página passam pelo modelo numa única
+    chamada; os itens são montados à medida que a resposta é enviada.
+    """
     try:
-        predictions = []
-        
-        for turbine_id, base_data in TURBINES_BASE_DATA.items():
-            # Simular previsão baseada nos dados históricos
-            failure_probability = random.uniform(0.1, 0.9)
-            days_to_failure = random.randint(5, 30)
-            
-            if base_data['criticality'] == 'alta':
-                failure_probability *= 1.5
-                days_to_failure = max(1, days_to_failure // 2)
-            
-            prediction = {
-                'turbine_id': turbine_id,
-                'failure_probability': round(min(1.0, failure_probability), 3),
-                'estimated_days_to_failure': days_to_failure,
-                'recommended_action': 'preventive_maintenance' if failure_probability > 0.7 else 'monitor',
-                'confidence': round(random.uniform(0.7, 0.95), 2),
-                'prediction_date': datetime.datetime.now().isoformat()
-            }
-            
-            predictions.append(prediction)
+        try:
+            list_query = ListQuery.from_request()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return jsonify({
-            'predictions': predictions,
-            'model_version': '1.0.0',
-            'last_training': '2025-06-15T10:00:00'
+        if not predictive_model.ensure_loaded():
+            return jsonify({
+                'error': 'Modelo não encontrado. Execute o treinamento primeiro.'
+            }), 400
+        
+        fleet = turbine_registry.index()
+        rows, next_cursor = keyset_slice(fleet.ids, list_query.after, list_query.limit)
+        if len(rows):
+            batch, _, _ = predict_rows(fleet, rows)
+        
+        def generate_predictions():
+            prediction_date = datetime.datetime.now().isoformat()
+            for j, i in enumerate(rows):
+                failure_probability = float(batch['failure_probability'][j])
+                days_to_failure = quantile_dict(batch['days_to_failure'][j], digits=0)
+                
+                yield {
+                    'turbine_id': fleet.ids[i],
+                    'failure_probability': round(failure_probability, 3),
+                    'estimated_days_to_failure': days_to_failure['p50'],
+                    'days_to_failure_interval': days_to_failure,
+                    'recommended_action': 'preventive_maintenance' if failure_probability > 0.7 else 'monitor',
+                    'confidence': round(float(batch['confidence'][j]), 2),
+                    'prediction_date': prediction_date
+                }
+        
+        return stream_list(generate_predictions(), list_query, key='predictions', next_cursor=next_cursor, envelope={
+            'model_version': predictive_model.version,
+            'last_training': predictive_model.trained_at,
+            'forecast_horizon_days': FORECAST_HORIZON_DAYS
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
@@ -1,12 +1,41 @@
 from flask import Blueprint, jsonify, request
+from sqlalchemy import select
 from src.models.user import User, db
+from src.services.streaming import ListQuery, STREAM_CHUNK_ROWS, keyset_last_key, stream_list
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """Lista de usuários em ordem de id, em streaming a partir do cursor do banco
+
+    Parâmetros opcionais: limit/after (paginação por id; o próximo cursor vem
+    em X-Next-Cursor e Link), fields e format=ndjson.
+    """
+    try:
+        list_query = ListQuery.from_request()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        after = int(list_query.after) if list_query.after is not None else None
+    except ValueError:
+        return jsonify({'error': 'after deve ser um id de usuário'}), 400
+    
+    statement = select(User).order_by(User.id)
+    if after is not None:
+        statement = statement.where(User.id > after)
+    
+    next_cursor = None
+    if list_query.limit is not None:
+        keys = select(User.id).order_by(User.id)
+        if after is not None:
+            keys = keys.where(User.id > after)
+        next_cursor = keyset_last_key(keys, list_query.limit)
+        statement = statement.limit(list_query.limit)
+    
+    users = db.session.execute(statement, execution_options={'yield_per': STREAM_CHUNK_ROWS}).scalars()
+    return stream_list((user.to_dict() for user in users), list_query, next_cursor=next_cursor)
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -0,0 +1,523 @@
+import contextlib
+import datetime
+import os
+import threading
+import time
+import uuid
+
+from src.models.user import db
+from src.models.alert import Alert
+from src.services.telemetry_store import COLUMNS, begin_write
+from src.services.telemetry_ingest import telemetry_ingest
+
+# Margem de histerese (pontos percentuais) em torno dos limites de disponibilidade
+AVAILABILITY_HYSTERESIS = float(os.environ.get('TEB_ALERT_HYSTERESIS', '1.0'))
+
+ALERT_COLUMNS = tuple(column.name for column in Alert.__table__.columns)
+UPSERT_ALERT_SQL = (
+    f"INSERT OR REPLACE INTO alerts ({', '.join(ALERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in ALERT_COLUMNS)})"
+)
+SELECT_ACTIVE_SQL = f"SELECT {', '.join(ALERT_COLUMNS)} FROM alerts WHERE status IN ('open', 'acknowledged')"
+SELECT_LEVELS_SQL = 'SELECT turbine_id, rule, severity FROM alert_levels'
+UPSERT_LEVEL_SQL = 'INSERT OR REPLACE INTO alert_levels (turbine_id, rule, severity) VALUES (?, ?, ?)'
+DELETE_LEVEL_SQL = 'DELETE FROM alert_levels WHERE turbine_id = ? AND rule = ?'
+SELECT_REVISION_SQL = 'SELECT revision FROM alert_revision WHERE id = 1'
+BUMP_REVISION_SQL = (
+    'INSERT INTO alert_revision (id, revision) VALUES (1, 1) '
+    'ON CONFLICT (id) DO UPDATE SET revision = revision + 1'
+)
+
+
+class AlertRule:
+    """Regra de limite com níveis de severidade e histerese
+
+    levels vai do mais grave para o menos grave: [(limite, severidade), ...].
+    Com direction='below' o nível é atingido quando o valor fica abaixo do
+    limite; para sair dele o valor precisa passar de limite + hysteresis
+    (com 'above', o contrário). Assim um valor oscilando em torno do limite
+    não abre e fecha alertas a cada amostra.
+    """
+
+    def __init__(self, name, field, levels, direction='below', hysteresis=0.0, source='telemetry',
+                 presentation=None):
+        self.name = name
+        self.field = field
+        self.levels = levels
+        self.direction = direction
+        self.hysteresis = hysteresis
+        self.source = source
+        self.presentation = presentation or {}
+        self._severity_index = {severity: i for i, (_, severity) in enumerate(levels)}
+
+    def evaluate(self, value, current=None):
+        """Severidade para value dado o nível atual (None = condição normal)"""
+        current_index = self._severity_index.get(current)
+        for i, (threshold, severity) in enumerate(self.levels):
+            # Quem já está neste nível (ou num mais grave) só sai depois da margem
+            margin = self.hysteresis if current_index is not None and current_index <= i else 0.0
+            if self.direction == 'below' and value < threshold + margin:
+                return severity
+            if self.direction == 'above' and value > threshold - margin:
+                return severity
+        return None
+
+    def is_escalation(self, old, new):
+        return self._severity_index[new] < self._severity_index[old]
+
+    def describe(self, record):
+        title, message, priority, actions = self.presentation[record['severity']]
+        values = {'turbine_id': record['turbine_id'], 'value': record['value']}
+        return {
+            'type': record['severity'],
+            'title': title.format(**values),
+            'message': message.format(**values),
+            'priority': priority,
+            'actions': list(actions),
+            'source': self.source
+        }
+
+
+# Regras avaliadas a cada nova telemetria, snapshot da frota ou previsão
+ALERT_RULES = (
+    AlertRule(
+        'availability', 'availability', levels=((50, 'critical'), (95, 'warning')),
+        direction='below', hysteresis=AVAILABILITY_HYSTERESIS, source='telemetry',
+        presentation={
+            'critical': ('Disponibilidade Crítica - {turbine_id}',
+                         'Turbina {turbine_id} com disponibilidade crítica: {value}%', 'high', ()),
+            'warning': ('Disponibilidade Baixa - {turbine_id}',
+                        'Turbina {turbine_id} com disponibilidade baixa: {value}%', 'medium', ())
+        }
+    ),
+    AlertRule(
+        'failure_risk', 'failure_probability', levels=((0.7, 'critical'), (0.4, 'warning')),
+        direction='above', hysteresis=0.05, source='ml_prediction',
+        presentation={
+            'critical': ('Falha Iminente Detectada - {turbine_id}',
+                         'Probabilidade de falha: {value:.1%}. Ação imediata necessária.',
+                         'critical', ('immediate_maintenance',)),
+            'warning': ('Risco Elevado - {turbine_id}',
+                        'Probabilidade de falha: {value:.1%}. Agendar manutenção preventiva.',
+                        'high', ('schedule_maintenance',))
+        }
+    ),
+    AlertRule(
+        'telemetry_anomaly', 'stream_anomaly', levels=((0.5, 'anomaly'),),
+        direction='above', source='telemetry',
+        presentation={
+            'anomaly': ('Anomalia na Telemetria - {turbine_id}',
+                        'Leituras recentes fora do padrão da turbina (vibração, eficiência ou modelo de anomalias).',
+                        'medium', ('investigate',))
+        }
+    ),
+    AlertRule(
+        'anomaly', 'anomaly_detected', levels=((0.5, 'anomaly'),),
+        direction='above', source='ml_prediction',
+        presentation={
+            'anomaly': ('Anomalia Detectada - {turbine_id}',
+                        'Comportamento anômalo identificado pelo sistema de ML. Investigação recomendada.',
+                        'medium', ('investigate',))
+        }
+    )
+)
+
+
+class AlertEngine:
+    """Avaliação incremental de regras com um alerta ativo por (turbina, regra)
+
+    observe() recebe só os valores que chegaram (telemetria, snapshot ou
+    previsões) e avalia apenas as regras dos campos presentes. O estado fica
+    no banco (alertas em alerts, nível atual de cada regra por turbina em
+    alert_levels) e num índice em memória de cada processo, recarregado
+    quando a revisão em alert_revision muda: com vários workers, todos
+    avaliam as regras a partir do mesmo estado.
+
+    Cada gravação é uma transação com o lock de escrita do banco: o índice é
+    sincronizado dentro dela, as mudanças são calculadas e gravadas junto
+    com a nova revisão, e só depois do commit aplicadas em memória. Se a
+    gravação falhar (ou a transação do flush da ingestão for desfeita), o
+    índice continua igual ao banco. _write_lock serializa esse ciclo dentro
+    do processo, do cálculo até a aplicação em memória.
+    """
+
+    def __init__(self, rules=ALERT_RULES):
+        self.rules = {rule.name: rule for rule in rules}
+        self._rules_by_field = {}
+        for rule in rules:
+            self._rules_by_field.setdefault(rule.field, []).append(rule)
+        self.engine = None
+        self._active = {}     # id -> registro do alerta
+        self._by_key = {}     # (turbine_id, regra) -> id do alerta ativo
+        self._levels = {}     # (turbine_id, regra) -> severidade atual da condição
+        self._revision = None  # revisão do banco refletida no índice
+        self._staged = None    # mudanças gravadas na transação em curso, ainda sem commit
+        self._lock = threading.Lock()
+        # Reentrante: o flush da ingestão segura o lock da gravação até o commit,
+        # e os listeners seguintes do mesmo flush também podem avaliar regras
+        self._write_lock = threading.RLock()
+        self._stats = {'evaluations': 0, 'opened': 0, 'updated': 0, 'cleared': 0, 'acknowledged': 0}
+
+    def init_app(self, app):
+        with app.app_context():
+            self.engine = db.engine
+        self._sync()
+
+    def observe(self, turbine_id, values):
+        """Avalia as regras dos campos em values para uma turbina; retorna as mudanças"""
+        return self.observe_many({turbine_id: values})
+
+    def observe_many(self, values_by_turbine):
+        """Avalia {turbine_id: {campo: valor}}; retorna os registros alterados
+
+        Sem mudanças (o caso comum), só lê a revisão do banco. Com mudanças,
+        grava numa transação própria e só depois do commit as aplica em
+        memória.
+        """
+        now = int(time.time())
+        self._sync()
+        levels, changes = self._plan(values_by_turbine, now)
+        if not levels and not changes:
+            return []
+
+        with self._transaction() as connection:
+            # Recalcular com o estado sincronizado dentro da transação
+            levels, changes = self._plan(values_by_turbine, now, staged=self._staged, count=False)
+            self._stage(connection, levels, changes)
+        return [dict(record) for _, record in changes]
+
+    def stage_many(self, values_by_turbine, connection):
+        """Como observe_many, mas grava na transação do chamador (conexão DB-API)
+
+        A transação já deve ter o lock de escrita do banco (begin_write).
+        Retorna finish(committed), que o chamador deve chamar depois do
+        commit (True) ou do rollback (False): o estado em memória só muda com
+        True. Até lá, outras avaliações esperam por _write_lock.
+        """
+        self._write_lock.acquire()
+        created = self._staged is None
+        try:
+            self._begin_stage(connection)
+            levels, changes = self._plan(values_by_turbine, int(time.time()), staged=self._staged)
+            self._stage(connection, levels, changes)
+        except Exception:
+            if created:
+                self._staged = None
+            self._write_lock.release()
+            raise
+
+        def finish(committed):
+            try:
+                self._end_stage(committed)
+            finally:
+                self._write_lock.release()
+        return finish
+
+    def observe_rows(self, connection, rows):
+        """Listener de flush da ingestão: avalia a amostra mais recente de cada turbina"""
+        latest = {}
+        for row in rows:
+            current = latest.get(row[0])
+            if current is None or row[1] >= current[1]:
+                latest[row[0]] = row
+        fields = [(i, name) for i, name in enumerate(COLUMNS) if name in self._rules_by_field]
+        return self.stage_many(
+            {turbine_id: {name: row[i] for i, name in fields} for turbine_id, row in latest.items()},
+            connection
+        )
+
+    def acknowledge(self, alert_id):
+        """Marca um alerta ativo como reconhecido; retorna o alerta ou None"""
+        with self._transaction() as connection:
+            with self._lock:
+                record = self._active.get(alert_id)
+                if record is None:
+                    return None
+                record = dict(record)
+            if record['status'] == 'open':
+                now = int(time.time())
+                record.update(status='acknowledged', acknowledged_at=now, updated_at=now)
+                self._stage(connection, {}, [('acknowledge', record)])
+        return self.describe(record)
+
+    def clear(self, alert_id):
+        """Encerra um alerta manualmente; retorna o alerta ou None
+
+        O nível da condição é mantido, então o alerta só reabre se a
+        condição voltar ao normal e ocorrer de novo, ou se ficar mais grave.
+        """
+        with self._transaction() as connection:
+            with self._lock:
+                record = self._active.get(alert_id)
+                if record is None:
+                    return None
+                record = dict(record)
+            now = int(time.time())
+            record.update(status='cleared', cleared_at=now, updated_at=now)
+            self._stage(connection, {}, [('clear', record)])
+        return self.describe(record)
+
+    def active(self, turbine_id=None, status=None):
+        """Alertas ativos (cópias), opcionalmente filtrados"""
+        self._sync()
+        with self._lock:
+            records = [
+                dict(record) for record in self._active.values()
+                if (turbine_id is None or record['turbine_id'] == turbine_id)
+                and (status is None or record['status'] == status)
+            ]
+        records.sort(key=lambda r: r['opened_at'], reverse=True)
+        return [self.describe(record) for record in records]
+
+    def summary(self, turbine_id=None, status=None):
+        """Resposta de /alerts: alertas ativos e contadores"""
+        alerts = self.active(turbine_id=turbine_id, status=status)
+        return {
+            'alerts': alerts,
+            'total_alerts': len(alerts),
+            'critical_alerts': len([a for a in alerts if a['type'] == 'critical']),
+            'open_alerts': len([a for a in alerts if a['status'] == 'open']),
+            'acknowledged_alerts': len([a for a in alerts if a['status'] == 'acknowledged'])
+        }
+
+    def stats(self):
+        self._sync()
+        with self._lock:
+            return {**self._stats, 'active': len(self._active), 'revision': self._revision}
+
+    def describe(self, record):
+        """Registro do alerta com os campos de apresentação usados pelo frontend"""
+        return {
+            **record,
+            **self.rules[record['rule']].describe(record),
+            'read': record['status'] != 'open',
+            'timestamp': _format_ts(record['updated_at']),
+            'opened_at': _format_ts(record['opened_at']),
+            'updated_at': _format_ts(record['updated_at']),
+            'acknowledged_at': _format_ts(record['acknowledged_at']),
+            'cleared_at': _format_ts(record['cleared_at'])
+        }
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Transação própria: lock de escrita do banco e depois _write_lock
+
+        A ordem é a mesma do flush da ingestão, que já tem o lock do banco
+        quando chama stage_many; assim nenhum thread espera o banco segurando
+        _write_lock. Sem banco (engine não ligado), só o índice em memória muda.
+        """
+        connection = self.engine.raw_connection() if self.engine is not None else None
+        try:
+            if connection is not None:
+                begin_write(connection)
+            with self._write_lock:
+                self._begin_stage(connection)
+                try:
+                    yield connection
+                    if connection is not None:
+                        connection.commit()
+                except BaseException:
+                    if connection is not None:
+                        connection.rollback()
+                    self._end_stage(False)
+                    raise
+                self._end_stage(True)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _begin_stage(self, connection):
+        """Sincroniza o índice na transação e começa a acumular as mudanças dela"""
+        if self._staged is None:
+            self._sync(connection)
+            self._staged = {'revision': self._revision, 'final': self._revision, 'levels': {}, 'changes': []}
+
+    def _stage(self, connection, levels, changes):
+        """Grava mudanças na transação em curso e as acumula para depois do commit"""
+        if not levels and not changes:
+            return
+        revision = self._persist([record for _, record in changes], levels, connection)
+        self._staged['levels'].update(levels)
+        self._staged['changes'].extend(changes)
+        self._staged['final'] = revision
+
+    def _end_stage(self, committed):
+        staged, self._staged = self._staged, None
+        if staged is not None and committed:
+            self._apply_changes(staged)
+
+    def _sync(self, connection=None):
+        """Recarrega o índice do banco se a revisão mudou (gravação de outro processo)
+
+        Sem connection, lê numa transação de leitura própria, para a revisão e
+        os registros virem do mesmo commit.
+        """
+        own = connection is None
+        if own:
+            if self.engine is None:
+                return
+            connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                if own:
+                    cursor.execute('BEGIN')
+                revision = _read_revision(cursor)
+                if revision == self._revision:
+                    return
+                active = cursor.execute(SELECT_ACTIVE_SQL).fetchall()
+                levels = cursor.execute(SELECT_LEVELS_SQL).fetchall()
+            finally:
+                cursor.close()
+        finally:
+            if own:
+                connection.rollback()
+                connection.close()
+
+        with self._lock:
+            # Uma leitura mais antiga que o índice atual não o substitui
+            if self._revision is not None and revision < self._revision:
+                return
+            self._active = {}
+            self._by_key = {}
+            self._levels = {(turbine_id, rule): severity for turbine_id, rule, severity in levels}
+            for row in active:
+                record = dict(zip(ALERT_COLUMNS, row))
+                self._index(record)
+                # Alertas gravados antes de alert_levels existir
+                self._levels.setdefault((record['turbine_id'], record['rule']), record['severity'])
+            self._revision = revision
+
+    def _plan(self, values_by_turbine, now, staged=None, count=True):
+        """Mudanças pedidas pelas regras, sem alterar o estado
+
+        Parte do índice em memória mais as mudanças já gravadas na transação
+        em curso (staged). Retorna (levels, changes): o novo nível de cada
+        (turbina, regra) avaliada que mudou (None = condição normal) e uma
+        lista de (tipo, registro) com cópias novas dos alertas abertos,
+        atualizados ou encerrados.
+        """
+        levels = {}
+        changes = []
+        with self._lock:
+            for turbine_id, values in values_by_turbine.items():
+                for field, value in values.items():
+                    if value is None:
+                        continue
+                    for rule in self._rules_by_field.get(field, ()):
+                        if count:
+                            self._stats['evaluations'] += 1
+                        self._plan_rule(rule, turbine_id, float(value), now, levels, changes, staged)
+        return levels, changes
+
+    def _plan_rule(self, rule, turbine_id, value, now, levels, changes, staged):
+        key = (turbine_id, rule.name)
+        if staged is not None and key in staged['levels']:
+            current = staged['levels'][key]
+        else:
+            current = self._levels.get(key)
+        severity = rule.evaluate(value, current)
+        if severity == current:
+            return
+        levels[key] = severity
+
+        record = self._active_record(key, staged)
+
+        if severity is None:
+            if record is not None:
+                changes.append(('clear', {**record, 'status': 'cleared', 'cleared_at': now, 'updated_at': now}))
+            return
+
+        if record is None:
+            if current is not None and not rule.is_escalation(current, severity):
+                # Alerta encerrado manualmente e a condição ficou menos grave: não reabrir
+                return
+            changes.append(('open', {
+                'id': uuid.uuid4().hex,
+                'turbine_id': turbine_id,
+                'rule': rule.name,
+                'severity': severity,
+                'status': 'open',
+                'value': round(value, 3),
+                'opened_at': now,
+                'updated_at': now,
+                'acknowledged_at': None,
+                'cleared_at': None
+            }))
+            return
+
+        record = dict(record)
+        if rule.is_escalation(record['severity'], severity):
+            # Piorou: volta a exigir reconhecimento
+            record.update(status='open', acknowledged_at=None)
+        record.update(severity=severity, value=round(value, 3), updated_at=now)
+        changes.append(('update', record))
+
+    def _active_record(self, key, staged):
+        """Alerta ativo de (turbina, regra), considerando as mudanças ainda sem commit"""
+        if staged is not None:
+            for kind, record in reversed(staged['changes']):
+                if (record['turbine_id'], record['rule']) == key:
+                    return None if kind == 'clear' else record
+        alert_id = self._by_key.get(key)
+        return self._active.get(alert_id) if alert_id is not None else None
+
+    def _apply_changes(self, staged):
+        """Aplica no índice em memória mudanças já gravadas e confirmadas"""
+        with self._lock:
+            # Se outro thread já recarregou o índice de uma revisão posterior,
+            # ele já inclui estas mudanças
+            if self._revision == staged['revision']:
+                for key, severity in staged['levels'].items():
+                    if severity is None:
+                        self._levels.pop(key, None)
+                    else:
+                        self._levels[key] = severity
+                for kind, record in staged['changes']:
+                    if kind == 'clear':
+                        self._active.pop(record['id'], None)
+                        self._by_key.pop((record['turbine_id'], record['rule']), None)
+                    else:
+                        self._index(record)
+                self._revision = staged['final']
+            for kind, _ in staged['changes']:
+                self._stats[{'open': 'opened', 'update': 'updated', 'clear': 'cleared',
+                             'acknowledge': 'acknowledged'}[kind]] += 1
+
+    def _index(self, record):
+        self._active[record['id']] = record
+        self._by_key[(record['turbine_id'], record['rule'])] = record['id']
+
+    def _persist(self, records, levels, connection):
+        """Grava alertas e níveis e incrementa a revisão, sem commit; retorna a nova revisão"""
+        if connection is None:
+            return self._revision
+        cursor = connection.cursor()
+        try:
+            if records:
+                cursor.executemany(UPSERT_ALERT_SQL, [tuple(record[column] for column in ALERT_COLUMNS)
+                                                      for record in records])
+            raised = [(turbine_id, rule, severity) for (turbine_id, rule), severity in levels.items() if severity]
+            normal = [key for key, severity in levels.items() if severity is None]
+            if raised:
+                cursor.executemany(UPSERT_LEVEL_SQL, raised)
+            if normal:
+                cursor.executemany(DELETE_LEVEL_SQL, normal)
+            cursor.execute(BUMP_REVISION_SQL)
+            return _read_revision(cursor)
+        finally:
+            cursor.close()
+
+
+def _read_revision(cursor):
+    row = cursor.execute(SELECT_REVISION_SQL).fetchone()
+    return row[0] if row is not None else 0
+
+
+def _format_ts(ts):
+    return datetime.datetime.fromtimestamp(ts).isoformat() if ts is not None else None
+
+
+# Instância global do motor de alertas (ligada ao banco em main.py)
+alert_engine = AlertEngine()
+telemetry_ingest.add_flush_listener(alert_engine.observe_rows)
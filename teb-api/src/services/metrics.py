@@ -0,0 +1,393 @@
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import got_request_exception, request
+from werkzeug.wsgi import ClosingIterator
+
+# Limites (segundos) dos baldes dos histogramas de latência
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Diretório compartilhado pelos processos (workers do gunicorn); vazio = métricas só do processo
+METRICS_DIR = os.environ.get('TEB_METRICS_DIR') or None
+# Intervalo (segundos) entre as gravações das métricas de cada processo no diretório
+METRICS_DUMP_INTERVAL = float(os.environ.get('TEB_METRICS_DUMP_INTERVAL', '5'))
+
+
+class Histogram:
+    """Histograma de baldes fixos (contagens não cumulativas; o último balde é +Inf)"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Span:
+    """Cronômetro de um trecho nomeado (use com 'with metrics.span(nome):')"""
+
+    __slots__ = ('registry', 'name', 'started')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe_span(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    """Métricas em memória do processo, exportadas no formato texto do Prometheus
+
+    init_app() registra hooks que medem cada pedido: um histograma de
+    latência e um contador de respostas por (método, rota, status), e o
+    número de pedidos em andamento por rota. A rota é o padrão da URL
+    (ex.: /api/turbines/<turbine_id>/history), então a quantidade de séries
+    não cresce com os ids. span(nome) mede trechos internos (ex.: etapas da
+    inferência) e add_collector(collect) acrescenta métricas lidas na hora
+    da exportação (collect() devolve [(nome, tipo, ajuda, [(labels, valor)])]).
+    Cada atualização é um incremento sob um único lock, para manter o custo
+    por pedido em poucos microssegundos.
+
+    Com directory (TEB_METRICS_DIR), cada processo grava as próprias
+    métricas em <directory>/<pid>.json a cada dump_interval segundos, na
+    exportação e ao sair, e render() junta os arquivos de todos: contadores
+    e histogramas são somados (inclusive os de workers já encerrados) e os
+    gauges saem com o label worker, só dos processos vivos.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, directory=METRICS_DIR, dump_interval=METRICS_DUMP_INTERVAL):
+        self.buckets = buckets
+        self.directory = directory
+        self.dump_interval = dump_interval
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._responses = {}     # (método, rota, status) -> quantidade
+        self._latency = {}       # (método, rota) -> Histogram
+        self._in_flight = {}     # (método, rota) -> pedidos em andamento
+        self._exceptions = {}    # (método, rota, exceção) -> quantidade
+        self._spans = {}         # nome -> Histogram
+        self._collectors = []
+
+    def init_app(self, app):
+        # A medição fica num middleware WSGI, que lê o environ direto em vez de
+        # passar pelos proxies de contexto do Flask; só a rota vem de um hook
+        app.wsgi_app = _MetricsMiddleware(app.wsgi_app, self)
+        app.before_request(self._start_request)
+        got_request_exception.connect(self._record_exception, app)
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            atexit.register(self._dump_at_exit)
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._after_fork)
+
+    def add_collector(self, collect):
+        self._collectors.append(collect)
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def observe_span(self, name, seconds):
+        with self._lock:
+            histogram = self._spans.get(name)
+            if histogram is None:
+                histogram = self._spans[name] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe_request(self, method, route, status, seconds):
+        with self._lock:
+            key = (method, route)
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            key = (method, route, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def snapshot(self):
+        """Cópia das métricas de pedidos (usada nos testes de carga e em /metrics)"""
+        with self._lock:
+            return {
+                'responses': dict(self._responses),
+                'in_flight': dict(self._in_flight),
+                'exceptions': dict(self._exceptions),
+                'latency': {key: (list(h.counts), h.sum, h.count) for key, h in self._latency.items()},
+                'spans': {name: (list(h.counts), h.sum, h.count) for name, h in self._spans.items()}
+            }
+
+    def render(self):
+        """Métricas no formato de exposição em texto do Prometheus (0.0.4)"""
+        data = self._aggregate() if self.directory is not None else self._local()
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        header('teb_http_requests_total', 'counter', 'Respostas HTTP por método, rota e status.')
+        for (method, route, status), value in sorted(data['responses'].items()):
+            lines.append(f'teb_http_requests_total{_labels(method=method, route=route, status=status)} {value}')
+
+        header('teb_http_request_errors_total', 'counter', 'Respostas HTTP 5xx por método e rota.')
+        errors = {}
+        for (method, route, status), value in data['responses'].items():
+            if status >= 500:
+                errors[(method, route)] = errors.get((method, route), 0) + value
+        for (method, route), value in sorted(errors.items()):
+            lines.append(f'teb_http_request_errors_total{_labels(method=method, route=route)} {value}')
+
+        header('teb_http_request_exceptions_total', 'counter', 'Exceções não tratadas por rota e tipo.')
+        for (method, route, exception), value in sorted(data['exceptions'].items()):
+            lines.append(f'teb_http_request_exceptions_total{_labels(method=method, route=route, exception=exception)} {value}')
+
+        header('teb_http_requests_in_flight', 'gauge', 'Pedidos em andamento por método e rota.')
+        for labels, value in data['in_flight']:
+            lines.append(f'teb_http_requests_in_flight{_labels(**labels)} {value}')
+
+        header('teb_http_request_duration_seconds', 'histogram', 'Latência dos pedidos HTTP até o envio dos cabeçalhos.')
+        for (method, route), histogram in sorted(data['latency'].items()):
+            _render_histogram(lines, 'teb_http_request_duration_seconds', self.buckets, histogram, method=method, route=route)
+
+        header('teb_span_duration_seconds', 'histogram', 'Duração de trechos internos nomeados (ex.: etapas da inferência).')
+        for name, histogram in sorted(data['spans'].items()):
+            _render_histogram(lines, 'teb_span_duration_seconds', self.buckets, histogram, span=name)
+
+        header('teb_process_uptime_seconds', 'gauge', 'Tempo desde o início do processo.')
+        for labels, value in data['uptime']:
+            lines.append(f'teb_process_uptime_seconds{_labels(**labels)} {value:.3f}')
+
+        for name, kind, help_text, samples in data['collected']:
+            header(name, kind, help_text)
+            for labels, value in samples:
+                if value is not None:
+                    lines.append(f'{name}{_labels(**labels)} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def _collect(self):
+        collected = []
+        for collect in self._collectors:
+            collected.extend(collect())
+        return collected
+
+    def _local(self):
+        """Métricas só deste processo, no formato usado por render()"""
+        data = self.snapshot()
+        data['in_flight'] = [({'method': method, 'route': route}, value)
+                             for (method, route), value in sorted(data['in_flight'].items())]
+        data['uptime'] = [({}, time.time() - self.started_at)]
+        data['collected'] = self._collect()
+        return data
+
+    def _dump(self):
+        """Grava as métricas deste processo em <directory>/<pid>.json (troca atômica do arquivo)"""
+        data = self.snapshot()
+        document = {
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'responses': [[*key, value] for key, value in data['responses'].items()],
+            'in_flight': [[*key, value] for key, value in data['in_flight'].items()],
+            'exceptions': [[*key, value] for key, value in data['exceptions'].items()],
+            'latency': [[*key, *histogram] for key, histogram in data['latency'].items()],
+            'spans': [[name, *histogram] for name, histogram in data['spans'].items()],
+            'collected': self._collect()
+        }
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(document, f, default=float)
+        os.replace(f'{path}.tmp', path)
+
+    def _aggregate(self):
+        """Junta as métricas gravadas por todos os processos no diretório (incluindo este)"""
+        self._dump()
+        data = {'responses': {}, 'exceptions': {}, 'latency': {}, 'spans': {}, 'in_flight': [], 'uptime': []}
+        families = {}
+        now = time.time()
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.json'))):
+            try:
+                with open(path) as f:
+                    document = json.load(f)
+            except (OSError, ValueError):
+                continue
+            worker = str(document['pid'])
+            live = _pid_alive(document['pid'])
+            for *key, value in document['responses']:
+                data['responses'][tuple(key)] = data['responses'].get(tuple(key), 0) + value
+            for *key, value in document['exceptions']:
+                data['exceptions'][tuple(key)] = data['exceptions'].get(tuple(key), 0) + value
+            for method, route, counts, total, count in document['latency']:
+                _merge_histogram(data['latency'], (method, route), counts, total, count)
+            for name, counts, total, count in document['spans']:
+                _merge_histogram(data['spans'], name, counts, total, count)
+            if live:
+                data['in_flight'].extend(({'method': method, 'route': route, 'worker': worker}, value)
+                                         for method, route, value in document['in_flight'])
+                data['uptime'].append(({'worker': worker}, now - document['started_at']))
+            for name, kind, help_text, samples in document['collected']:
+                family = families.setdefault(name, (kind, help_text, {}))[2]
+                if kind != 'counter' and not live:
+                    continue
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    if kind != 'counter':
+                        labels = {**labels, 'worker': worker}
+                    key = tuple(sorted(labels.items()))
+                    previous = family.get(key)
+                    family[key] = (labels, value if previous is None else previous[1] + value)
+        data['in_flight'].sort(key=lambda sample: sorted(sample[0].items()))
+        data['collected'] = [(name, kind, help_text, [family[key] for key in sorted(family)])
+                             for name, (kind, help_text, family) in families.items()]
+        return data
+
+    def _after_fork(self):
+        # Cada worker conta só os próprios pedidos, grava o próprio arquivo e
+        # cria o thread de gravação no primeiro pedido
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._responses = {}
+        self._latency = {}
+        self._in_flight = {}
+        self._exceptions = {}
+        self._spans = {}
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='metrics-dump', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self._dump()
+            except Exception as e:
+                print(f"Falha ao gravar métricas: {e}")
+            time.sleep(self.dump_interval)
+
+    def _dump_at_exit(self):
+        # Só processos que atenderam pedidos (os workers) deixam arquivo
+        if self._thread is not None:
+            try:
+                self._dump()
+            except Exception as e:
+                print(f"Falha ao gravar métricas: {e}")
+
+    def _start_request(self):
+        req = request._get_current_object()
+        rule = req.url_rule
+        key = (req.method, rule.rule if rule is not None else 'unmatched')
+        req.environ['teb.metrics.key'] = key
+        if self.directory is not None and self._thread is None:
+            self._ensure_thread()
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def _finish_request(self, environ):
+        key = environ.get('teb.metrics.key')
+        if key is not None:
+            with self._lock:
+                self._in_flight[key] -= 1
+
+    def _record_exception(self, sender, exception, **extra):
+        key = request.environ.get('teb.metrics.key', (request.method, 'unmatched'))
+        key = (*key, type(exception).__name__)
+        with self._lock:
+            self._exceptions[key] = self._exceptions.get(key, 0) + 1
+
+
+class _MetricsMiddleware:
+    """Mede latência (até o envio dos cabeçalhos) e status de cada pedido"""
+
+    def __init__(self, wsgi_app, registry):
+        self.wsgi_app = wsgi_app
+        self.registry = registry
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        status = []
+
+        def capture_status(status_line, headers, exc_info=None):
+            status.append(status_line)
+            return start_response(status_line, headers, exc_info)
+
+        try:
+            app_iter = self.wsgi_app(environ, capture_status)
+        except BaseException:
+            self.registry._finish_request(environ)
+            raise
+        method, route = environ.get('teb.metrics.key') or (environ.get('REQUEST_METHOD'), 'unmatched')
+        code = int(status[-1][:3]) if status else 500
+        self.registry.observe_request(method, route, code, time.perf_counter() - started)
+        # Em respostas em streaming o pedido continua em andamento até o fim do envio
+        return ClosingIterator(app_iter, lambda: self.registry._finish_request(environ))
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _merge_histogram(histograms, key, counts, total, count):
+    current = histograms.get(key)
+    if current is None:
+        histograms[key] = (list(counts), total, count)
+    else:
+        histograms[key] = ([a + b for a, b in zip(current[0], counts)], current[1] + total, current[2] + count)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _render_histogram(lines, name, bounds, histogram, **labels):
+    counts, total, count = histogram
+    cumulative = 0
+    for bound, bucket_count in zip(bounds, counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{_labels(**labels, le=repr(bound))} {cumulative}')
+    lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {count}')
+    lines.append(f'{name}_sum{_labels(**labels)} {total!r}')
+    lines.append(f'{name}_count{_labels(**labels)} {count}')
+
+
+# Instância global das métricas (hooks registrados em main.py)
+metrics = MetricsRegistry()
@@ -0,0 +1,239 @@
+import atexit
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+# Intervalo entre snapshots da frota e entre comentários de keep-alive (segundos)
+FEED_INTERVAL = float(os.environ.get('TEB_REALTIME_INTERVAL', '5'))
+HEARTBEAT_INTERVAL = float(os.environ.get('TEB_REALTIME_HEARTBEAT', '15'))
+# Mensagens pendentes por cliente antes de considerá-lo lento
+SUBSCRIBER_QUEUE_SIZE = int(os.environ.get('TEB_REALTIME_QUEUE_SIZE', '16'))
+
+# Campos que mudam a cada snapshot e não contam como alteração
+VOLATILE_FIELDS = frozenset(('id', 'timestamp', 'last_update', 'prediction_date'))
+
+
+class RealtimeFeed:
+    """Snapshot da frota calculado uma vez por tick e enviado a todos os clientes
+
+    build() retorna um dict de seções (ex.: 'realtime', 'alerts',
+    'predictions'). collections indica, por seção, o campo com a lista de
+    itens e a chave de cada item: {'realtime': ('turbines', 'id')}. A cada
+    tick o feed monta o snapshot, calcula a diferença para o anterior, codifica
+    a mensagem uma única vez e a coloca na fila de cada cliente conectado;
+    o custo por tick não depende da quantidade de clientes.
+
+    Mensagens (Server-Sent Events):
+    - snapshot: estado completo, enviado na conexão e quando um cliente lento
+      perde mensagens
+    - delta: por seção, itens alterados ('changed'), chaves removidas
+      ('removed') e os demais campos da seção, se mudaram; uma seção que
+      passa a ser ou deixa de ser None vem como {'reset': <seção>}
+    """
+
+    def __init__(self, build, collections, interval=FEED_INTERVAL, heartbeat=HEARTBEAT_INTERVAL,
+                 queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.build = build
+        self.collections = collections
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.app = None
+        self._state = None
+        self._seq = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._tick_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopped = False
+        self._stats = {
+            'ticks': 0,
+            'deltas_sent': 0,
+            'snapshots_sent': 0,
+            'resyncs': 0,
+            'failed_ticks': 0,
+            'last_tick_ms': None,
+            'last_error': None
+        }
+
+    def init_app(self, app):
+        self.app = app
+        atexit.register(self.stop)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def subscribe(self):
+        """Registra um cliente; retorna a fila com as mensagens já codificadas"""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        self._ensure_thread()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self):
+        """Gerador de eventos SSE para um cliente: snapshot inicial e deltas"""
+        subscriber = self.subscribe()
+        try:
+            if self._state is None:
+                try:
+                    self.tick()
+                except Exception as e:
+                    print(f"Falha ao montar snapshot da frota: {e}")
+            yield self.snapshot_message()
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+    def snapshot_message(self):
+        with self._lock:
+            self._stats['snapshots_sent'] += 1
+            return self._encode('snapshot', self._seq, self._state)
+
+    def tick(self):
+        """Monta um novo snapshot e envia a diferença aos clientes; retorna o delta"""
+        with self._tick_lock:
+            started = time.perf_counter()
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        state = self.build()
+                else:
+                    state = self.build()
+            except Exception as e:
+                with self._lock:
+                    self._stats['failed_ticks'] += 1
+                    self._stats['last_error'] = str(e)
+                raise
+
+            previous = self._state
+            delta = self._diff(previous, state) if previous is not None else None
+            with self._lock:
+                self._state = state
+                self._stats['ticks'] += 1
+                self._stats['last_tick_ms'] = round((time.perf_counter() - started) * 1000, 2)
+                if not delta:
+                    return delta
+                self._seq += 1
+                message = self._encode('delta', self._seq, delta)
+                subscribers = list(self._subscribers)
+
+            for subscriber in subscribers:
+                self._publish(subscriber, message)
+            return delta
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'subscribers': len(self._subscribers),
+                'seq': self._seq,
+                'interval': self.interval
+            }
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+    def _publish(self, subscriber, message):
+        try:
+            subscriber.put_nowait(message)
+            with self._lock:
+                self._stats['deltas_sent'] += 1
+        except queue.Full:
+            # Cliente lento: descartar o que está pendente e reenviar o estado completo
+            while True:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    break
+            subscriber.put_nowait(self.snapshot_message())
+            with self._lock:
+                self._stats['resyncs'] += 1
+
+    def _diff(self, previous, current):
+        delta = {}
+        for name, section in current.items():
+            before = previous.get(name)
+            if section is None or before is None:
+                if section is not before:
+                    delta[name] = {'reset': section}
+                continue
+
+            changes = {}
+            if name in self.collections:
+                items_field, key = self.collections[name]
+                old_items = {item[key]: item for item in before.get(items_field, [])}
+                new_items = {item[key]: item for item in section.get(items_field, [])}
+                changed = [
+                    item for item_key, item in new_items.items()
+                    if item_key not in old_items or _fingerprint(old_items[item_key]) != _fingerprint(item)
+                ]
+                removed = [item_key for item_key in old_items if item_key not in new_items]
+                if changed:
+                    changes['changed'] = changed
+                if removed:
+                    changes['removed'] = removed
+            else:
+                items_field = None
+
+            for field, value in section.items():
+                if field == items_field or field in VOLATILE_FIELDS:
+                    continue
+                if before.get(field) != value:
+                    changes[field] = value
+            if changes:
+                delta[name] = changes
+        if delta:
+            delta['timestamp'] = datetime.datetime.now().isoformat()
+        return delta
+
+    @staticmethod
+    def _encode(event, seq, data):
+        payload = json.dumps({'seq': seq, **(data or {})}, separators=(',', ':'), default=str)
+        return f'event: {event}\nid: {seq}\ndata: {payload}\n\n'
+
+    def _after_fork(self):
+        # Cada worker (gunicorn --preload) tem os próprios clientes e thread de ticks
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._tick_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._loop, name='realtime-feed', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            if self._stopped:
+                return
+            with self._lock:
+                idle = not self._subscribers
+            if idle:
+                continue
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Falha ao montar snapshot da frota: {e}")
+
+
+def _fingerprint(item):
+    return {field: value for field, value in item.items() if field not in VOLATILE_FIELDS}
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+
+# Validade dos snapshots da frota em segundos
+SNAPSHOT_TTL = float(os.environ.get('TEB_SNAPSHOT_TTL', '5'))
+
+
+class _Flight:
+    """Montagem em andamento de uma chave; quem chega depois espera o resultado"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SnapshotCache:
+    """Cache por janela de tempo com montagem única (single-flight)
+
+    get(*key) devolve o valor montado por build(*key) na janela atual de ttl
+    segundos (o tempo é dividido em janelas fixas, então todos os pedidos da
+    mesma janela veem o mesmo snapshot). Se o valor expirou, só o primeiro
+    pedido chama build(); os pedidos concorrentes esperam por ele em vez de
+    montar o mesmo snapshot de novo. Se build() falha, o erro é repassado a
+    todos os que esperavam e nada é guardado.
+    """
+
+    def __init__(self, build, ttl=SNAPSHOT_TTL):
+        self.build = build
+        self.ttl = ttl
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'errors': 0,
+            'last_build_ms': None
+        }
+
+    def get(self, *key):
+        window = self._window()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == window:
+                self._stats['hits'] += 1
+                return entry[1]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        started = time.perf_counter()
+        try:
+            flight.value = self.build(*key)
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None:
+                    # Guardar na janela em que a montagem começou e descartar as expiradas
+                    self._entries = {k: v for k, v in self._entries.items() if v[0] >= window}
+                    self._entries[key] = (window, flight.value)
+                    self._stats['last_build_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses'] + self._stats['coalesced']
+            return {
+                **self._stats,
+                'hit_ratio': round((self._stats['hits'] + self._stats['coalesced']) / lookups, 4) if lookups else None,
+                'entries': len(self._entries),
+                'ttl': self.ttl
+            }
+
+    def _window(self):
+        if self.ttl <= 0:
+            return time.time()  # Sem cache: cada pedido é uma janela nova
+        return int(time.time() // self.ttl)
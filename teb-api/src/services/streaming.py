@@ -0,0 +1,136 @@
+import bisect
+import os
+from urllib.parse import urlencode
+
+from flask import Response, current_app, request, stream_with_context
+
+from src.models.user import db
+
+# Tamanho máximo de página aceito em ?limit=
+MAX_PAGE_SIZE = int(os.environ.get('TEB_MAX_PAGE_SIZE', '1000'))
+# Itens serializados por bloco enviado ao cliente (e lidos por vez do cursor do banco)
+STREAM_CHUNK_ROWS = int(os.environ.get('TEB_STREAM_CHUNK_ROWS', '500'))
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+class ListQuery:
+    """Parâmetros das listagens: limit, after, fields e format
+
+    limit e after fazem paginação por chave (keyset): after é a chave do
+    último item da página anterior, devolvida em next_cursor. Sem limit a
+    lista inteira é enviada, ainda assim em streaming. fields é uma lista
+    separada por vírgulas dos campos de cada item; format=ndjson (ou Accept:
+    application/x-ndjson) envia um item por linha em vez de JSON.
+    """
+
+    def __init__(self, limit=None, after=None, fields=None, fmt='json'):
+        self.limit = limit
+        self.after = after
+        self.fields = fields
+        self.format = fmt
+
+    @classmethod
+    def from_request(cls):
+        """Lê os parâmetros do pedido atual; levanta ValueError se forem inválidos"""
+        limit = request.args.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                raise ValueError('limit deve ser um número inteiro') from None
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f'limit deve estar entre 1 e {MAX_PAGE_SIZE}')
+
+        fields = request.args.get('fields')
+        if fields is not None:
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+            if not fields:
+                raise ValueError('fields não pode ser vazio')
+
+        fmt = request.args.get('format')
+        if fmt is None:
+            fmt = 'ndjson' if NDJSON_MIMETYPE in request.headers.get('Accept', '') else 'json'
+        if fmt not in ('json', 'ndjson'):
+            raise ValueError("format deve ser 'json' ou 'ndjson'")
+
+        return cls(limit=limit, after=request.args.get('after') or None, fields=fields, fmt=fmt)
+
+    def project(self, item):
+        if self.fields is None:
+            return item
+        return {field: item[field] for field in self.fields if field in item}
+
+
+def keyset_slice(keys, after, limit):
+    """Página de uma lista de chaves ordenadas: (range de posições, next_cursor)"""
+    start = bisect.bisect_right(keys, after) if after is not None else 0
+    stop = len(keys) if limit is None else min(len(keys), start + limit)
+    next_cursor = keys[stop - 1] if stop < len(keys) and stop > start else None
+    return range(start, stop), next_cursor
+
+
+def keyset_last_key(statement, limit):
+    """Última chave da página, se há itens depois dela (senão None)
+
+    statement é um SELECT só da coluna chave, já filtrado (> after) e
+    ordenado; a consulta percorre só o índice da chave e lê no máximo duas
+    linhas, então o cursor é conhecido antes de ler os itens da página.
+    """
+    keys = db.session.execute(statement.offset(limit - 1).limit(2)).scalars().all()
+    return keys[0] if len(keys) == 2 else None
+
+
+def stream_list(items, list_query, key=None, envelope=None, count_field=None, next_cursor=None):
+    """Resposta em streaming de uma lista produzida por um iterador
+
+    items é consumido uma única vez e enviado em blocos de STREAM_CHUNK_ROWS
+    itens, então a memória usada não depende do tamanho da lista. Em JSON,
+    com key a lista vai no campo key de um objeto com os campos de envelope
+    (e count_field com a quantidade de itens, escrito ao final); sem key, a
+    resposta é um array. next_cursor vai no envelope e nos cabeçalhos
+    X-Next-Cursor e Link.
+    """
+    dumps = current_app.json.dumps
+    ndjson = list_query.format == 'ndjson'
+
+    def chunks():
+        if ndjson:
+            head, separator, tail = '', '\n', ''
+        elif key is None:
+            head, separator, tail = '[', ',', ']'
+        else:
+            fields = {**(envelope or {}), 'next_cursor': next_cursor}
+            head = '{' + ''.join(f'{dumps(k)}:{dumps(v)},' for k, v in fields.items()) + f'{dumps(key)}:['
+            separator, tail = ',', ']'
+
+        count = 0
+        batch = [head]
+        for item in items:
+            if count and not ndjson:
+                batch.append(separator)
+            batch.append(dumps(list_query.project(item)))
+            if ndjson:
+                batch.append(separator)
+            count += 1
+            if count % STREAM_CHUNK_ROWS == 0:
+                yield ''.join(batch)
+                batch = []
+
+        batch.append(tail)
+        if key is not None and not ndjson:
+            if count_field is not None:
+                batch.append(f',{dumps(count_field)}:{count}')
+            batch.append('}')
+        yield ''.join(batch)
+
+    response = Response(
+        stream_with_context(chunks()),
+        mimetype=NDJSON_MIMETYPE if ndjson else 'application/json'
+    )
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args['after'] = next_cursor
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
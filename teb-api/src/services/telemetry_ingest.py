@@ -0,0 +1,332 @@
+import atexit
+import io
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import event
+
+from src.models.user import db
+from src.models.telemetry import TELEMETRY_METRICS
+from src.services.telemetry_store import telemetry_store, parse_timestamp, begin_write
+
+# Limites do buffer de ingestão (podem ser ajustados por variáveis de ambiente)
+MAX_BUFFER_ROWS = int(os.environ.get('TEB_INGEST_MAX_BUFFER', '200000'))
+FLUSH_ROWS = int(os.environ.get('TEB_INGEST_FLUSH_ROWS', '20000'))
+FLUSH_INTERVAL = float(os.environ.get('TEB_INGEST_FLUSH_INTERVAL', '1.0'))
+
+
+class BufferFullError(Exception):
+    """O buffer de ingestão está cheio; o cliente deve tentar de novo mais tarde"""
+
+    def __init__(self, retry_after):
+        super().__init__('Buffer de ingestão cheio')
+        self.retry_after = retry_after
+
+
+def enable_sqlite_wal(engine):
+    """Ativa WAL e synchronous=NORMAL em cada conexão SQLite do engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA busy_timeout=5000')
+        cursor.close()
+
+
+def parse_payload(body, content_type):
+    """Converte o corpo de POST /api/telemetry em tuplas na ordem de COLUMNS
+
+    Formatos aceitos:
+    - application/json: lista de amostras, {"samples": [...]} ou colunar
+      {"turbine_id": [...], "ts": [...], "<métrica>": [...]}
+    - application/x-ndjson: uma amostra JSON por linha
+    - application/x-npy: array NumPy estruturado (.npy) com campos nomeados
+    """
+    content_type = (content_type or '').split(';')[0].strip().lower()
+
+    if content_type in ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines'):
+        records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        return _rows_from_records(records)
+
+    if content_type in ('application/x-npy', 'application/octet-stream'):
+        array = np.load(io.BytesIO(body), allow_pickle=False)
+        if array.dtype.names is None:
+            raise ValueError('Payload binário deve ser um array estruturado com campos nomeados')
+        return _rows_from_columns({name: array[name] for name in array.dtype.names}, len(array))
+
+    data = json.loads(body)
+    if isinstance(data, dict) and 'samples' in data:
+        data = data['samples']
+    if isinstance(data, dict):
+        if 'turbine_id' not in data:
+            raise ValueError('Campo turbine_id ausente')
+        n_rows = len(data['turbine_id'])
+        return _rows_from_columns(data, n_rows)
+    if not isinstance(data, list):
+        raise ValueError('Payload JSON deve ser uma lista de amostras ou um objeto colunar')
+    return _rows_from_records(data)
+
+
+def _rows_from_records(records):
+    now = int(time.time())
+    rows = []
+    for record in records:
+        try:
+            turbine_id = str(record['turbine_id'])
+        except KeyError:
+            raise ValueError('Campo turbine_id ausente') from None
+        ts = parse_timestamp(record.get('ts', record.get('timestamp')), default=now)
+        rows.append((turbine_id, ts, *(_to_float(record.get(m)) for m in TELEMETRY_METRICS)))
+    return rows
+
+
+def _rows_from_columns(columns, n_rows):
+    if 'turbine_id' not in columns:
+        raise ValueError('Campo turbine_id ausente')
+    now = int(time.time())
+
+    turbine_ids = [_to_text(t) for t in columns['turbine_id']]
+    ts_column = columns.get('ts', columns.get('timestamp'))
+    ts = [now] * n_rows if ts_column is None else [parse_timestamp(_to_builtin(t), default=now) for t in ts_column]
+    metric_columns = [
+        [None] * n_rows if columns.get(m) is None else [_to_float(v) for v in columns[m]]
+        for m in TELEMETRY_METRICS
+    ]
+
+    for column in [turbine_ids, ts, *metric_columns]:
+        if len(column) != n_rows:
+            raise ValueError('Todas as colunas devem ter o mesmo tamanho')
+    return list(zip(turbine_ids, ts, *metric_columns))
+
+
+def _to_float(value):
+    if value is None:
+        return None
+    value = float(value)
+    return None if value != value else value  # NaN vira NULL
+
+
+def _to_text(value):
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _to_builtin(value):
+    return value.item() if hasattr(value, 'item') else value
+
+
+class TelemetryIngestBuffer:
+    """Buffer em memória que grava telemetria no banco em transações grandes
+
+    submit() só acrescenta as linhas ao buffer; um thread em segundo plano
+    grava tudo numa única transação quando o buffer passa de flush_rows
+    linhas ou a cada flush_interval segundos. Se o buffer passar de
+    max_rows, submit() levanta BufferFullError (backpressure). Cada flush
+    grava as amostras, os rollups e a última amostra de cada turbina na
+    mesma transação, aberta já com o lock de escrita: com vários processos,
+    os flushes são serializados pelo banco.
+    """
+
+    def __init__(self, max_rows=MAX_BUFFER_ROWS, flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL):
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.engine = None
+        self._rows = []
+        self._flush_listeners = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+        self._stats = {
+            'accepted': 0,
+            'rejected': 0,
+            'flushed': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'last_flush_rows': 0,
+            'last_flush_ms': None,
+            'last_error': None,
+            'listener_errors': 0,
+            'last_listener_error': None
+        }
+
+    def init_app(self, app):
+        with app.app_context():
+            self.engine = db.engine
+        enable_sqlite_wal(self.engine)
+        atexit.register(self.stop)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def add_flush_listener(self, listener):
+        """Registra listener(connection, rows), chamado dentro da transação de cada flush
+
+        O listener só grava pela connection, num savepoint próprio: se ele
+        levantar uma exceção, as gravações dele são desfeitas e o flush segue
+        sem ele. Mudanças em memória ficam para finish(committed), que o
+        listener pode retornar: é chamado depois do commit (True) ou do
+        rollback (False) do flush.
+        """
+        self._flush_listeners.append(listener)
+
+    def submit(self, rows):
+        """Acrescenta linhas (tuplas na ordem de COLUMNS) ao buffer"""
+        if not rows:
+            return 0
+        with self._lock:
+            if len(self._rows) + len(rows) > self.max_rows:
+                self._stats['rejected'] += len(rows)
+                raise BufferFullError(retry_after=max(1, int(round(self.flush_interval))))
+
+            self._rows.extend(rows)
+            self._stats['accepted'] += len(rows)
+
+            if len(self._rows) >= self.flush_rows:
+                self._wakeup.notify()
+
+        self._ensure_thread()
+        return len(rows)
+
+    def latest(self, turbine_id):
+        """Última amostra gravada de uma turbina (dict), ou None
+
+        Lida do banco, então vale para todos os processos; amostras ainda no
+        buffer aparecem depois do próximo flush.
+        """
+        return self.latest_many([turbine_id]).get(turbine_id)
+
+    def latest_many(self, turbine_ids):
+        """Última amostra gravada de cada turbina: {turbine_id: dict}, só as que têm amostra"""
+        return telemetry_store.latest(turbine_ids)
+
+    def flush(self):
+        """Grava o conteúdo atual do buffer; retorna a quantidade de linhas gravadas"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+
+            started = time.perf_counter()
+            finishers = []
+            try:
+                connection = self.engine.raw_connection()
+                try:
+                    begin_write(connection)
+                    telemetry_store.write_rows(connection, rows)
+                    telemetry_store.write_latest(connection, rows)
+                    for listener in self._flush_listeners:
+                        finish = self._run_listener(listener, connection, rows)
+                        if finish is not None:
+                            finishers.append(finish)
+                    connection.commit()
+                except Exception:
+                    connection.rollback()
+                    self._finish(finishers, False)
+                    raise
+                finally:
+                    connection.close()
+            except Exception as e:
+                with self._lock:
+                    # Nada foi gravado: devolver as linhas ao buffer para a próxima tentativa
+                    self._rows[:0] = rows
+                    self._stats['failed_flushes'] += 1
+                    self._stats['last_error'] = str(e)
+                raise
+
+            # As linhas já estão no banco: falhas daqui em diante não as devolvem ao buffer
+            self._finish(finishers, True)
+            with self._lock:
+                self._stats['flushed'] += len(rows)
+                self._stats['flushes'] += 1
+                self._stats['last_flush_rows'] = len(rows)
+                self._stats['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            return len(rows)
+
+    def _run_listener(self, listener, connection, rows):
+        cursor = connection.cursor()
+        cursor.execute('SAVEPOINT flush_listener')
+        try:
+            finish = listener(connection, rows)
+        except Exception as e:
+            cursor.execute('ROLLBACK TO SAVEPOINT flush_listener')
+            cursor.execute('RELEASE SAVEPOINT flush_listener')
+            self._listener_failed(listener, e)
+            return None
+        cursor.execute('RELEASE SAVEPOINT flush_listener')
+        return finish
+
+    def _finish(self, finishers, committed):
+        for finish in finishers:
+            try:
+                finish(committed)
+            except Exception as e:
+                self._listener_failed(finish, e)
+
+    def _listener_failed(self, listener, error):
+        with self._lock:
+            self._stats['listener_errors'] += 1
+            self._stats['last_listener_error'] = str(error)
+        print(f"Falha no listener de flush {getattr(listener, '__qualname__', listener)}: {error}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'buffered': len(self._rows),
+                'max_rows': self.max_rows,
+                'flush_rows': self.flush_rows,
+                'flush_interval': self.flush_interval
+            }
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify()
+        if self.engine is not None:
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Falha ao gravar telemetria pendente: {e}")
+
+    def _after_fork(self):
+        # Threads não sobrevivem ao fork: cada worker (gunicorn --preload) começa
+        # com buffer e locks próprios e cria o thread de gravação no primeiro submit()
+        self._rows = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._loop, name='telemetry-flush', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                if len(self._rows) < self.flush_rows and not self._stopped:
+                    self._wakeup.wait(self.flush_interval)
+                if self._stopped:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Falha ao gravar telemetria: {e}")
+                time.sleep(self.flush_interval)
+
+
+# Instância global do buffer de ingestão (ligada ao banco em main.py)
+telemetry_ingest = TelemetryIngestBuffer()
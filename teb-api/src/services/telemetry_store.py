@@ -0,0 +1,523 @@
+import datetime
+import json
+import os
+import re
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+from src.models.user import db
+from src.models.telemetry import TELEMETRY_METRICS, ROLLUP_RESOLUTIONS
+
+# Resoluções aceitas em ?resolution= (além de um número de segundos)
+_RESOLUTION_RE = re.compile(r'^(\d+)\s*(s|m|min|h|d)$')
+_RESOLUTION_UNITS = {'s': 1, 'm': 60, 'min': 60, 'h': 3600, 'd': 86400}
+
+# Ordem das colunas nas tuplas de telemetria usadas em escrita em lote
+COLUMNS = ('turbine_id', 'ts') + TELEMETRY_METRICS
+# Uma amostra já gravada (mesmo turbine_id e ts) é mantida: reenvios não mudam a tabela
+INSERT_SQL = (
+    f"INSERT OR IGNORE INTO telemetry ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+)
+
+# Guarda a amostra só se for mais nova que a atual da turbina (UPSERT, SQLite >= 3.24)
+UPSERT_LATEST_SQL = (
+    f"INSERT INTO telemetry_latest ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)}) "
+    "ON CONFLICT (turbine_id) DO UPDATE SET "
+    + ', '.join(f'{column} = excluded.{column}' for column in COLUMNS[1:])
+    + " WHERE excluded.ts >= telemetry_latest.ts"
+)
+# Máximo de parâmetros por consulta IN (...) em latest()
+LATEST_CHUNK = 500
+
+# Amostras mantidas no diário de lotes (os lotes mais antigos são descartados)
+JOURNAL_MAX_ROWS = int(os.environ.get('TEB_TELEMETRY_JOURNAL_ROWS', '200000'))
+# Descarta os lotes a partir do mais novo que ultrapassa o limite (contando do fim), menos o atual
+PRUNE_JOURNAL_SQL = (
+    "DELETE FROM telemetry_journal WHERE seq < ? AND seq <= ("
+    "SELECT seq FROM (SELECT seq, SUM(n_rows) OVER (ORDER BY seq DESC) AS newer FROM telemetry_journal) "
+    "WHERE newer > ? ORDER BY seq DESC LIMIT 1)"
+)
+
+_ROLLUP_STATS = ('sum', 'count', 'min', 'max')
+_ROLLUP_COLUMNS = ('resolution', 'turbine_id', 'bucket_ts', 'samples') + tuple(
+    f'{metric}_{stat}' for metric in TELEMETRY_METRICS for stat in _ROLLUP_STATS
+)
+
+
+def _merge_rollup(metric):
+    low, high = f'{metric}_min', f'{metric}_max'
+    return (
+        f'{metric}_sum = {metric}_sum + excluded.{metric}_sum, '
+        f'{metric}_count = {metric}_count + excluded.{metric}_count, '
+        # MIN/MAX do SQLite com vários argumentos retornam NULL se algum for NULL
+        f'{low} = MIN(COALESCE({low}, excluded.{low}), COALESCE(excluded.{low}, {low})), '
+        f'{high} = MAX(COALESCE({high}, excluded.{high}), COALESCE(excluded.{high}, {high}))'
+    )
+
+
+# Soma os baldes novos aos existentes (UPSERT, SQLite >= 3.24)
+UPSERT_ROLLUP_SQL = (
+    f"INSERT INTO telemetry_rollup ({', '.join(_ROLLUP_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _ROLLUP_COLUMNS)}) "
+    "ON CONFLICT (resolution, turbine_id, bucket_ts) DO UPDATE SET samples = samples + excluded.samples, "
+    + ', '.join(_merge_rollup(metric) for metric in TELEMETRY_METRICS)
+)
+
+
+def parse_timestamp(value, default=None):
+    """Converte epoch (segundos) ou data ISO 8601 em segundos desde a época"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, (int, float)):
+        return int(value)
+    value = str(value).strip()
+    try:
+        return int(float(value))
+    except ValueError:
+        pass
+    try:
+        return int(datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    except ValueError:
+        raise ValueError(f"Data inválida: {value}") from None
+
+
+def begin_write(connection):
+    """Abre a transação de uma conexão DB-API já com o lock de escrita (BEGIN IMMEDIATE)
+
+    No SQLite há um escritor por vez entre todos os processos. Tomando o lock
+    antes da primeira leitura, o que a transação lê (ex.: amostras já
+    gravadas, estado dos alertas) é o último commit de qualquer processo e
+    continua valendo até o commit dela.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+    finally:
+        cursor.close()
+
+
+def parse_resolution(value):
+    """Converte 'raw', '30s', '5m', '1h', '1d' ou um número de segundos em segundos (0 = bruto)"""
+    if value is None or value in ('', 'raw'):
+        return 0
+    value = str(value).strip().lower()
+    if value.isdigit():
+        return int(value)
+    match = _RESOLUTION_RE.match(value)
+    if not match:
+        raise ValueError(f"Resolução inválida: {value}")
+    return int(match.group(1)) * _RESOLUTION_UNITS[match.group(2)]
+
+
+class TelemetryStore:
+    """Leitura e escrita em massa da tabela de telemetria"""
+
+    def __init__(self, database):
+        self.db = database
+
+    def bulk_insert(self, rows):
+        """Insere amostras numa única transação; retorna a quantidade de amostras novas"""
+        rows = [self._normalize(row) for row in rows]
+        if not rows:
+            return 0
+        connection = self.db.engine.raw_connection()
+        try:
+            begin_write(connection)
+            inserted = self.write_rows(connection, rows)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+        return inserted
+
+    def write_rows(self, connection, rows):
+        """Grava tuplas (na ordem de COLUMNS) e atualiza os rollups, sem commit
+
+        connection é uma conexão DB-API; o chamador controla a transação,
+        então amostras e rollups ficam sempre consistentes entre si. Amostras
+        já gravadas (mesmo turbine_id e ts, ex.: um lote reenviado) e
+        repetidas dentro do lote são ignoradas, na tabela bruta e nos
+        rollups. Retorna a quantidade de amostras novas.
+        """
+        cursor = connection.cursor()
+        try:
+            rows = self._new_rows(cursor, rows)
+            if rows:
+                cursor.executemany(INSERT_SQL, rows)
+                cursor.executemany(UPSERT_ROLLUP_SQL, self._rollup_rows(rows))
+        finally:
+            cursor.close()
+        return len(rows)
+
+    def write_latest(self, connection, rows):
+        """Guarda em telemetry_latest a amostra mais recente de cada turbina de rows, sem commit"""
+        latest = {}
+        for row in rows:
+            current = latest.get(row[0])
+            if current is None or row[1] >= current[1]:
+                latest[row[0]] = row
+        cursor = connection.cursor()
+        try:
+            cursor.executemany(UPSERT_LATEST_SQL, list(latest.values()))
+        finally:
+            cursor.close()
+
+    def append_journal(self, connection, rows, max_rows=JOURNAL_MAX_ROWS):
+        """Acrescenta um lote ao diário, sem commit; retorna o seq do lote
+
+        Descarta os lotes mais antigos para o diário ficar com no máximo
+        max_rows amostras (o lote novo é sempre mantido).
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                'INSERT INTO telemetry_journal (created_at, n_rows, payload) VALUES (?, ?, ?)',
+                (int(time.time()), len(rows), json.dumps([list(row) for row in rows]))
+            )
+            seq = cursor.lastrowid
+            cursor.execute(PRUNE_JOURNAL_SQL, (seq, max_rows))
+        finally:
+            cursor.close()
+        return seq
+
+    def read_journal(self, connection, after, before=None):
+        """Lotes do diário com after < seq (< before): (seq do primeiro retido, [(seq, linhas)])
+
+        O primeiro seq retido permite ao chamador saber se perdeu lotes já
+        descartados. As linhas voltam como tuplas na ordem de COLUMNS.
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT MIN(seq) FROM telemetry_journal')
+            oldest = cursor.fetchone()[0]
+            query = 'SELECT seq, payload FROM telemetry_journal WHERE seq > ?'
+            params = [after]
+            if before is not None:
+                query += ' AND seq < ?'
+                params.append(before)
+            cursor.execute(query + ' ORDER BY seq', params)
+            batches = [(seq, [tuple(row) for row in json.loads(payload)]) for seq, payload in cursor.fetchall()]
+        finally:
+            cursor.close()
+        return oldest, batches
+
+    def latest(self, turbine_ids):
+        """Última amostra recebida de cada turbina: {turbine_id: dict}, só as que têm amostra"""
+        turbine_ids = list(turbine_ids)
+        result = {}
+        for start in range(0, len(turbine_ids), LATEST_CHUNK):
+            chunk = turbine_ids[start:start + LATEST_CHUNK]
+            params = {f'id{i}': turbine_id for i, turbine_id in enumerate(chunk)}
+            rows = self.db.session.execute(text(
+                f"SELECT {', '.join(COLUMNS)} FROM telemetry_latest "
+                f"WHERE turbine_id IN ({', '.join(f':{name}' for name in params)})"
+            ), params).mappings()
+            for row in rows:
+                result[row['turbine_id']] = dict(row)
+        return result
+
+    def rebuild_rollups(self):
+        """Recalcula todos os rollups a partir da tabela bruta"""
+        metric_columns = ', '.join(
+            f'SUM(COALESCE({m}, 0)), COUNT({m}), MIN({m}), MAX({m})' for m in TELEMETRY_METRICS
+        )
+        with self.db.engine.begin() as connection:
+            connection.execute(text('DELETE FROM telemetry_rollup'))
+            for resolution in ROLLUP_RESOLUTIONS:
+                connection.execute(text(
+                    f"INSERT INTO telemetry_rollup ({', '.join(_ROLLUP_COLUMNS)}) "
+                    f'SELECT :resolution, turbine_id, (ts / :resolution) * :resolution AS bucket_ts, '
+                    f'COUNT(*), {metric_columns} FROM telemetry GROUP BY turbine_id, bucket_ts'
+                ), {'resolution': resolution})
+            return connection.execute(text('SELECT COUNT(*) FROM telemetry_rollup')).scalar()
+
+    def source_name(self, resolution):
+        """Nome da fonte lida por query_range/kpis para a resolução ('raw' ou 'rollup_<s>s')"""
+        return _Source(self.rollup_for(resolution)).name
+
+    @staticmethod
+    def rollup_for(resolution):
+        """Maior rollup que cabe em baldes de resolution segundos (None = tabela bruta)"""
+        candidates = [r for r in ROLLUP_RESOLUTIONS if resolution > 0 and r <= resolution and resolution % r == 0]
+        return max(candidates) if candidates else None
+
+    def query_range(self, turbine_id, start_ts, end_ts, resolution=0, metrics=TELEMETRY_METRICS):
+        """Amostras de uma turbina em [start_ts, end_ts] (lista; ver iter_range)"""
+        return list(self.iter_range(turbine_id, start_ts, end_ts, resolution, metrics))
+
+    def page_range(self, turbine_id, start_ts, end_ts, resolution=0, after=None, limit=None):
+        """Intervalo de uma página de iter_range e o cursor da próxima: (início, fim, next_cursor)
+
+        after é o ts do último ponto da página anterior. Na tabela bruta a
+        página tem limit amostras, com o fim achado pela chave primária sem
+        ler as métricas; agregada, cobre limit baldes de tempo (baldes sem
+        amostras não aparecem, então a página pode vir com menos pontos).
+        """
+        if after is not None:
+            start_ts = max(start_ts, after + max(resolution, 1))
+        if limit is None or start_ts > end_ts:
+            return start_ts, end_ts, None
+
+        if resolution > 0:
+            last_bucket = start_ts - start_ts % resolution + (limit - 1) * resolution
+            if last_bucket + resolution > end_ts:
+                return start_ts, end_ts, None
+            return start_ts, last_bucket + resolution - 1, last_bucket
+
+        keys = self.db.session.execute(text(
+            'SELECT ts FROM telemetry WHERE turbine_id = :turbine_id AND ts BETWEEN :start AND :end '
+            'ORDER BY ts LIMIT 2 OFFSET :offset'
+        ), {'turbine_id': turbine_id, 'start': start_ts, 'end': end_ts, 'offset': limit - 1}).scalars().all()
+        if len(keys) < 2:
+            return start_ts, end_ts, None
+        return start_ts, keys[0], keys[0]
+
+    def iter_range(self, turbine_id, start_ts, end_ts, resolution=0, metrics=TELEMETRY_METRICS, chunk_rows=500):
+        """Gera as amostras de uma turbina em [start_ts, end_ts] lendo o cursor do banco
+
+        Com resolution > 0, agrega em baldes de resolution segundos (média,
+        mínimo e máximo por métrica e quantidade de amostras), lendo o maior
+        rollup que divide a resolução; nesse caso os limites do intervalo são
+        arredondados para baldes inteiros do rollup. Sem rollup compatível, a
+        consulta usa a chave primária (turbine_id, ts) da tabela bruta.
+        """
+        metrics = [m for m in metrics if m in TELEMETRY_METRICS]
+        params = {'turbine_id': turbine_id, 'start': start_ts, 'end': end_ts}
+
+        if resolution > 0:
+            source, columns = self._aggregate_columns(resolution, metrics, stats=('avg', 'min', 'max'))
+            sql = (
+                f'SELECT ({source.ts} / :bucket) * :bucket AS period_ts, {columns} '
+                f'FROM {source.table} WHERE {source.where} AND turbine_id = :turbine_id '
+                'GROUP BY period_ts ORDER BY period_ts'
+            )
+            params.update(bucket=resolution, **source.params(start_ts))
+            result = self.db.session.execute(text(sql), params, execution_options={'yield_per': chunk_rows})
+            for row in result:
+                yield self._to_point(row, metrics, stats=('', '_min', '_max'))
+            return
+
+        columns = ', '.join(metrics)
+        sql = (
+            f'SELECT ts AS bucket_ts, 1 AS samples, {columns} '
+            'FROM telemetry WHERE turbine_id = :turbine_id AND ts BETWEEN :start AND :end '
+            'ORDER BY ts'
+        )
+        result = self.db.session.execute(text(sql), params, execution_options={'yield_per': chunk_rows})
+        for row in result:
+            yield self._to_point(row, metrics)
+
+    def kpis(self, start_ts, end_ts, resolution=86400):
+        """KPIs de disponibilidade, falhas, MTTR e MTBF por turbina em [start_ts, end_ts]
+
+        Lê o mesmo rollup de query_range para a resolução pedida e devolve
+        também a tendência da frota em baldes de resolution segundos.
+        """
+        metrics = ('availability', 'failure_events', 'downtime_hours', 'power_output')
+        source, columns = self._aggregate_columns(resolution, metrics, stats=('avg', 'sum'))
+        params = {'start': start_ts, 'end': end_ts, 'bucket': resolution, **source.params(start_ts)}
+
+        per_turbine = self.db.session.execute(text(
+            f'SELECT turbine_id, MIN({source.ts}), MAX({source.ts}) + {source.width}, {columns} '
+            f'FROM {source.table} WHERE {source.where} GROUP BY turbine_id ORDER BY turbine_id'
+        ), params)
+        trend = self.db.session.execute(text(
+            f'SELECT ({source.ts} / :bucket) * :bucket AS period_ts, {columns} '
+            f'FROM {source.table} WHERE {source.where} GROUP BY period_ts ORDER BY period_ts'
+        ), params)
+
+        turbines = []
+        for row in per_turbine:
+            first_ts, last_ts, samples = row[1:4]
+            availability, _, _, failures, _, downtime, power, _ = row[4:]
+            failures = int(round(failures or 0))
+            downtime = downtime or 0.0
+            # MTBF sobre o período efetivamente coberto pela telemetria da turbina
+            uptime = max(0.0, (last_ts - first_ts) / 3600 - downtime)
+            turbines.append({
+                'turbine_id': row[0],
+                'samples': samples,
+                'availability': self._round(availability),
+                'failures': failures,
+                'downtime_hours': round(downtime, 2),
+                'mttr': round(downtime / failures, 2) if failures else None,
+                'mtbf': round(uptime / failures, 2) if failures else None,
+                'power_output': self._round(power)
+            })
+
+        return {
+            'source': source.name,
+            'turbines': turbines,
+            'fleet': {
+                'total_failures': sum(t['failures'] for t in turbines),
+                'total_downtime_hours': round(sum(t['downtime_hours'] for t in turbines), 2),
+                'avg_availability': self._round(
+                    sum(t['availability'] for t in turbines if t['availability'] is not None) / len(turbines)
+                    if turbines else None
+                )
+            },
+            'trend': [
+                {
+                    'timestamp': datetime.datetime.fromtimestamp(row[0]).isoformat(),
+                    'ts': row[0],
+                    'samples': row[1],
+                    'availability': self._round(row[2]),
+                    'failures': int(round(row[5] or 0)),
+                    'downtime_hours': round(row[7] or 0.0, 2)
+                }
+                for row in trend
+            ]
+        }
+
+    def _aggregate_columns(self, resolution, metrics, stats):
+        """Fonte (rollup ou tabela bruta) e colunas SELECT agregadas por métrica
+
+        As colunas são samples seguida, para cada métrica, de uma coluna por
+        estatística em stats ('avg', 'sum', 'min', 'max').
+        """
+        source = _Source(self.rollup_for(resolution))
+        expressions = {
+            'avg': lambda m: f'{source.sum(m)} / NULLIF({source.count(m)}, 0)',
+            'sum': source.sum,
+            'min': lambda m: f'MIN({source.column(m, "min")})',
+            'max': lambda m: f'MAX({source.column(m, "max")})'
+        }
+        columns = [source.samples] + [expressions[stat](m) for m in metrics for stat in stats]
+        return source, ', '.join(columns)
+
+    @staticmethod
+    def _round(value, digits=3):
+        return round(value, digits) if value is not None else None
+
+    @staticmethod
+    def _normalize(row):
+        if isinstance(row, tuple):
+            return row
+        return (
+            str(row['turbine_id']),
+            parse_timestamp(row.get('ts', row.get('timestamp'))),
+            *(float(row[m]) if row.get(m) is not None else None for m in TELEMETRY_METRICS)
+        )
+
+    @staticmethod
+    def _new_rows(cursor, rows):
+        """Linhas de rows cujo (turbine_id, ts) ainda não está na tabela nem antes no lote"""
+        unique = {}
+        bounds = {}
+        for row in rows:
+            key = (row[0], row[1])
+            if key in unique:
+                continue
+            unique[key] = row
+            low, high = bounds.get(row[0], (row[1], row[1]))
+            bounds[row[0]] = (min(low, row[1]), max(high, row[1]))
+
+        # Uma busca no índice (turbine_id, ts) por turbina, só no intervalo do lote
+        for turbine_id, (low, high) in bounds.items():
+            cursor.execute(
+                'SELECT ts FROM telemetry WHERE turbine_id = ? AND ts BETWEEN ? AND ?',
+                (turbine_id, low, high)
+            )
+            for (ts,) in cursor.fetchall():
+                unique.pop((turbine_id, ts), None)
+        return list(unique.values())
+
+    @staticmethod
+    def _rollup_rows(rows):
+        """Agrega tuplas brutas em linhas de rollup (na ordem de _ROLLUP_COLUMNS)"""
+        frame = pd.DataFrame.from_records(rows, columns=COLUMNS, coerce_float=True)
+        metrics = frame[list(TELEMETRY_METRICS)].astype(float)
+        aggregations = ['sum', 'count', 'min', 'max']
+
+        result = []
+        for resolution in ROLLUP_RESOLUTIONS:
+            keys = [frame['turbine_id'], (frame['ts'] // resolution) * resolution]
+            grouped = metrics.groupby(keys, sort=False)
+            stats = grouped.agg(aggregations)
+            samples = grouped.size()
+            # Reordenar para (métrica, estatística) como em _ROLLUP_COLUMNS e trocar NaN por NULL
+            values = stats[[(m, a) for m in TELEMETRY_METRICS for a in aggregations]].astype(object)
+            values = values.where(values.notna(), None)
+            for (turbine_id, bucket_ts), n, row in zip(stats.index, samples.to_numpy(), values.itertuples(index=False)):
+                result.append((resolution, turbine_id, int(bucket_ts), int(n), *row))
+        return result
+
+    @staticmethod
+    def _to_point(row, metrics, stats=('',)):
+        point = {
+            'timestamp': datetime.datetime.fromtimestamp(row[0]).isoformat(),
+            'ts': row[0],
+            'samples': row[1]
+        }
+        values = iter(row[2:])
+        for metric in metrics:
+            for suffix in stats:
+                value = next(values)
+                point[metric + suffix] = round(value, 3) if value is not None else None
+        return point
+
+
+def seed_demo_telemetry(days=30, freq='10min', n_turbines=None, seed=42):
+    """Popula a tabela com histórico sintético (mesmo gerador do treinamento)"""
+    from src.ml_models.predictive_model import predictive_model
+
+    end = datetime.datetime.now().replace(second=0, microsecond=0)
+    start = end - datetime.timedelta(days=days)
+
+    start_ts = int(start.timestamp())
+    total = 0
+    for chunk in predictive_model.iter_training_data(
+            n_turbines=n_turbines, start=start, end=end, freq=freq, seed=seed, chunk_rows=200_000):
+        chunk = chunk.assign(
+            turbine_id=chunk['turbine_id'].astype(str),
+            ts=start_ts + (chunk['date'] - pd.Timestamp(start)) // pd.Timedelta(seconds=1),
+            failure_events=chunk['has_failure'].astype(float)
+        )
+        total += telemetry_store.bulk_insert(list(chunk[list(COLUMNS)].itertuples(index=False, name=None)))
+    return total
+
+
+class _Source:
+    """Tabela lida por uma consulta agregada: um rollup ou a telemetria bruta"""
+
+    def __init__(self, rollup):
+        self.rollup = rollup
+        if rollup is None:
+            self.name = 'raw'
+            self.table = 'telemetry'
+            self.ts = 'ts'
+            self.samples = 'COUNT(*) AS samples'
+            self.width = 0
+            self.where = 'ts BETWEEN :start AND :end'
+        else:
+            self.name = f'rollup_{rollup}s'
+            self.table = 'telemetry_rollup'
+            self.ts = 'bucket_ts'
+            self.samples = 'SUM(samples) AS samples'
+            self.width = rollup
+            self.where = 'resolution = :rollup AND bucket_ts BETWEEN :rollup_start AND :end'
+
+    def params(self, start_ts):
+        if self.rollup is None:
+            return {}
+        # Incluir o balde do rollup que contém start_ts
+        return {'rollup': self.rollup, 'rollup_start': start_ts - start_ts % self.rollup}
+
+    def sum(self, metric):
+        return f'SUM({metric})' if self.rollup is None else f'SUM({metric}_sum)'
+
+    def count(self, metric):
+        return f'COUNT({metric})' if self.rollup is None else f'SUM({metric}_count)'
+
+    def column(self, metric, stat):
+        return metric if self.rollup is None else f'{metric}_{stat}'
+
+
+# Instância global do repositório de telemetria
+telemetry_store = TelemetryStore(db)
@@ -0,0 +1,228 @@
+import os
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import select, text
+
+from src.models.user import db
+from src.models.turbine import Turbine, DEFAULT_TURBINES, CRITICALITY_LEVELS
+from src.services.streaming import STREAM_CHUNK_ROWS, keyset_last_key, keyset_slice
+
+# Intervalo mínimo (segundos) entre verificações de mudanças feitas por outros processos
+REGISTRY_CHECK_INTERVAL = float(os.environ.get('TEB_REGISTRY_CHECK_INTERVAL', '10'))
+
+# Campos numéricos guardados como arrays no índice
+NUMERIC_FIELDS = {
+    'base_failures': np.int64,
+    'base_failure_rate': np.float64,
+    'base_availability': np.float64,
+    'base_mttr': np.float64
+}
+EDITABLE_FIELDS = ('name', 'farm', 'criticality', *NUMERIC_FIELDS, 'active')
+
+SELECT_ACTIVE_SQL = (
+    f"SELECT id, name, farm, criticality, {', '.join(NUMERIC_FIELDS)} "
+    "FROM turbines WHERE active = 1 ORDER BY id"
+)
+SIGNATURE_SQL = 'SELECT COUNT(*), COALESCE(SUM(revision), 0) FROM turbines'
+
+
+class TurbineIndex:
+    """Frota ativa em arrays paralelos (uma posição por turbina) com busca id → posição
+
+    Imutável: uma alteração no cadastro gera um índice novo, trocado
+    atomicamente no registro, então quem está iterando um índice nunca vê
+    a frota pela metade. Os campos numéricos são arrays NumPy somente
+    leitura, prontos para cálculos vetorizados sobre a frota inteira.
+    """
+
+    def __init__(self, records, signature=None):
+        records = sorted(records, key=lambda r: r['id'])
+        self.signature = signature
+        self.ids = [r['id'] for r in records]
+        self.names = [r.get('name') or r['id'] for r in records]
+        self.farms = [r.get('farm') or 'TEB' for r in records]
+        self.criticality = [r.get('criticality') or 'baixa' for r in records]
+        for field, dtype in NUMERIC_FIELDS.items():
+            values = np.array([r[field] for r in records], dtype=dtype)
+            values.flags.writeable = False
+            setattr(self, field, values)
+        self._rows = {turbine_id: i for i, turbine_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, turbine_id):
+        return turbine_id in self._rows
+
+    def row(self, turbine_id):
+        """Posição da turbina nos arrays, ou None se não está na frota ativa"""
+        return self._rows.get(turbine_id)
+
+    def get(self, turbine_id):
+        """Registro (dict) de uma turbina, ou None"""
+        i = self._rows.get(turbine_id)
+        return self.record(i) if i is not None else None
+
+    def record(self, i):
+        return {
+            'id': self.ids[i],
+            'name': self.names[i],
+            'farm': self.farms[i],
+            'criticality': self.criticality[i],
+            **{field: getattr(self, field)[i].item() for field in NUMERIC_FIELDS}
+        }
+
+    def rows(self, farm=None):
+        """Posições da frota inteira ou de um parque"""
+        if farm is None:
+            return range(len(self.ids))
+        return [i for i, f in enumerate(self.farms) if f == farm]
+
+
+class TurbineRegistry:
+    """Cadastro de turbinas no banco com um índice em memória da frota ativa
+
+    O índice é carregado uma vez em init_app() e recarregado quando o
+    cadastro muda por este processo (upsert/deactivate) ou, verificado no
+    máximo a cada check_interval segundos, por outro processo. Listeners
+    registrados com add_change_listener(listener(index)) são chamados a cada
+    novo índice. Antes de init_app() o índice contém DEFAULT_TURBINES, o que
+    permite usar o gerador de dados sem aplicação Flask.
+    """
+
+    def __init__(self, defaults=DEFAULT_TURBINES, check_interval=REGISTRY_CHECK_INTERVAL):
+        self.defaults = defaults
+        self.check_interval = check_interval
+        self.engine = None
+        self._index = TurbineIndex(defaults)
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def init_app(self, app):
+        with app.app_context():
+            self.engine = db.engine
+            if Turbine.query.count() == 0:
+                now = int(time.time())
+                db.session.add_all(Turbine(**record, updated_at=now) for record in self.defaults)
+                db.session.commit()
+        self.refresh()
+
+    def add_change_listener(self, listener):
+        """Registra listener(index), chamado depois de cada troca de índice"""
+        self._listeners.append(listener)
+
+    def index(self):
+        """Índice atual da frota ativa (verifica mudanças externas se já passou o intervalo)"""
+        if self.engine is not None and time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh(force=False)
+        return self._index
+
+    def refresh(self, force=True):
+        """Recarrega o índice do banco; sem force, só se a assinatura do cadastro mudou"""
+        if self.engine is None:
+            return self._index
+        with self._lock:
+            with self.engine.connect() as connection:
+                signature = tuple(connection.execute(text(SIGNATURE_SQL)).one())
+                self._checked_at = time.monotonic()
+                if not force and signature == self._index.signature:
+                    return self._index
+                rows = connection.execute(text(SELECT_ACTIVE_SQL)).mappings().all()
+            index = self._index = TurbineIndex([dict(row) for row in rows], signature=signature)
+        for listener in self._listeners:
+            listener(index)
+        return index
+
+    def get(self, turbine_id):
+        """Cadastro completo de uma turbina (inclusive desativada), ou None"""
+        turbine = db.session.get(Turbine, turbine_id)
+        return turbine.to_dict() if turbine is not None else None
+
+    def page(self, farm=None, include_inactive=False, after=None, limit=None):
+        """Página do cadastro em ordem de id: (iterador de registros, next_cursor)
+
+        A frota ativa sai do índice em memória; com include_inactive a
+        consulta vai ao banco e é lida em streaming.
+        """
+        if not include_inactive:
+            index = self.index()
+            rows = index.rows(farm)
+            positions, next_cursor = keyset_slice([index.ids[i] for i in rows], after, limit)
+            return (index.record(rows[i]) for i in positions), next_cursor
+
+        statement = select(Turbine).order_by(Turbine.id)
+        keys = select(Turbine.id).order_by(Turbine.id)
+        if farm is not None:
+            statement = statement.where(Turbine.farm == farm)
+            keys = keys.where(Turbine.farm == farm)
+        if after is not None:
+            statement = statement.where(Turbine.id > after)
+            keys = keys.where(Turbine.id > after)
+        next_cursor = None
+        if limit is not None:
+            next_cursor = keyset_last_key(keys, limit)
+            statement = statement.limit(limit)
+        turbines = db.session.execute(statement, execution_options={'yield_per': STREAM_CHUNK_ROWS}).scalars()
+        return (turbine.to_dict() for turbine in turbines), next_cursor
+
+    def upsert(self, turbine_id, fields):
+        """Cria ou altera uma turbina; retorna (registro, criada)
+
+        Levanta ValueError para campos desconhecidos ou valores inválidos.
+        """
+        values = _validate(fields)
+        turbine = db.session.get(Turbine, turbine_id)
+        created = turbine is None
+        if created:
+            turbine = Turbine(id=turbine_id, revision=0)
+            db.session.add(turbine)
+        for field, value in values.items():
+            setattr(turbine, field, value)
+        turbine.revision = (turbine.revision or 0) + 1
+        turbine.updated_at = int(time.time())
+        db.session.commit()
+        self.refresh()
+        return turbine.to_dict(), created
+
+    def deactivate(self, turbine_id):
+        """Tira uma turbina da frota ativa; retorna o registro ou None"""
+        turbine = db.session.get(Turbine, turbine_id)
+        if turbine is None:
+            return None
+        if turbine.active:
+            turbine.active = False
+            turbine.revision += 1
+            turbine.updated_at = int(time.time())
+            db.session.commit()
+            self.refresh()
+        return turbine.to_dict()
+
+
+def _validate(fields):
+    unknown = set(fields) - set(EDITABLE_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconhecidos: {', '.join(sorted(unknown))}")
+
+    values = dict(fields)
+    if 'criticality' in values and values['criticality'] not in CRITICALITY_LEVELS:
+        raise ValueError(f"criticality deve ser um de: {', '.join(CRITICALITY_LEVELS)}")
+    for field in ('name', 'farm'):
+        if field in values and not isinstance(values[field], str):
+            raise ValueError(f'{field} deve ser texto')
+    for field, dtype in NUMERIC_FIELDS.items():
+        if field not in values:
+            continue
+        try:
+            values[field] = int(values[field]) if dtype is np.int64 else float(values[field])
+        except (TypeError, ValueError):
+            raise ValueError(f'{field} deve ser numérico') from None
+    if 'active' in values:
+        values['active'] = bool(values['active'])
+    return values
+
+
+# Instância global do cadastro de turbinas (ligada ao banco em main.py)
+turbine_registry = TurbineRegistry()
@@ -0,0 +1,65 @@
+"""Fixtures dos testes: a aplicação ligada a um banco e a um registro de modelos temporários
+
+As variáveis de ambiente são definidas antes de importar src.main, porque
+banco, registro e serviços são configurados na importação.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix='teb-tests-')
+atexit.register(shutil.rmtree, _TMP_DIR, True)
+os.environ['TEB_DATABASE_URL'] = f"sqlite:///{os.path.join(_TMP_DIR, 'app.db')}"
+os.environ['TEB_MODEL_REGISTRY'] = os.path.join(_TMP_DIR, 'registry')
+os.environ.pop('TEB_METRICS_DIR', None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import app as flask_app  # noqa: E402
+from src.ml_models.predictive_model import TurbinePredictiveModel, predictive_model  # noqa: E402
+
+# Janela curta de treino: o suficiente para os testes, em poucos segundos
+TRAIN_OPTIONS = {'start': '2025-01-01', 'end': '2025-03-31'}
+
+
+@pytest.fixture(scope='session')
+def app():
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def trained_model():
+    """Modelo treinado uma vez, publicado no registro temporário e em uso pela aplicação"""
+    model = TurbinePredictiveModel()
+    model.train_models(**TRAIN_OPTIONS)
+    model.save_model()
+    model.warm_up()
+    predictive_model.swap_in(model)
+    return predictive_model
+
+
+@pytest.fixture
+def new_turbine_id():
+    """Gera ids de turbina ainda não usados, para um teste não ver o estado de outro"""
+    return lambda: f'T{uuid.uuid4().hex[:12].upper()}'
+
+
+def sample(turbine_id, ts, **values):
+    """Amostra de telemetria (tupla na ordem de COLUMNS) com valores típicos de operação"""
+    from src.services.telemetry_store import COLUMNS
+    defaults = {
+        'wind_speed': 9.0, 'temperature': 25.0, 'humidity': 60.0, 'operating_hours': 5000.0,
+        'power_output': 1800.0, 'vibration_level': 0.5, 'days_since_maintenance': 30.0,
+        'availability': 97.0, 'failure_events': 0.0, 'downtime_hours': 0.0
+    }
+    defaults.update(values)
+    return (turbine_id, int(ts)) + tuple(defaults[name] for name in COLUMNS[2:])
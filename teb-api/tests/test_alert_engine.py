@@ -0,0 +1,120 @@
+import pytest
+
+from src.models.user import db
+from src.routes import ml_predictions
+from src.services.alert_engine import AlertEngine, alert_engine
+from src.services.telemetry_store import begin_write
+
+
+def _severities(turbine_id, rule='availability'):
+    return [(a['severity'], a['status']) for a in alert_engine.active(turbine_id) if a['rule'] == rule]
+
+
+def test_availability_hysteresis(new_turbine_id):
+    turbine_id = new_turbine_id()
+    alert_engine.observe(turbine_id, {'availability': 94.0})
+    assert _severities(turbine_id) == [('warning', 'open')]
+
+    # Oscilando em torno do limite (95) dentro da margem: o mesmo alerta continua aberto
+    for value in (95.5, 94.8, 95.9, 94.9):
+        alert_engine.observe(turbine_id, {'availability': value})
+        assert _severities(turbine_id) == [('warning', 'open')]
+
+    alert_engine.observe(turbine_id, {'availability': 96.5})
+    assert _severities(turbine_id) == []
+
+
+def test_escalation_updates_the_same_alert(new_turbine_id):
+    turbine_id = new_turbine_id()
+    alert_engine.observe(turbine_id, {'availability': 94.0})
+    [warning] = alert_engine.active(turbine_id)
+    alert_engine.observe(turbine_id, {'availability': 40.0})
+    [critical] = alert_engine.active(turbine_id)
+
+    assert critical['id'] == warning['id']
+    assert critical['severity'] == 'critical'
+    # Voltar para a faixa de aviso só sai do crítico depois da margem
+    alert_engine.observe(turbine_id, {'availability': 50.5})
+    assert _severities(turbine_id) == [('critical', 'open')]
+    alert_engine.observe(turbine_id, {'availability': 80.0})
+    assert _severities(turbine_id) == [('warning', 'open')]
+
+
+def test_cleared_alert_reopens_only_on_escalation(new_turbine_id):
+    turbine_id = new_turbine_id()
+    alert_engine.observe(turbine_id, {'availability': 94.0})
+    [alert] = alert_engine.active(turbine_id)
+    assert alert_engine.acknowledge(alert['id'])['status'] == 'acknowledged'
+    assert alert_engine.clear(alert['id'])['status'] == 'cleared'
+
+    alert_engine.observe(turbine_id, {'availability': 94.0})
+    assert _severities(turbine_id) == []
+    alert_engine.observe(turbine_id, {'availability': 40.0})
+    assert _severities(turbine_id) == [('critical', 'open')]
+
+
+def test_workers_share_alert_state(app, new_turbine_id):
+    # Dois motores fazem o papel de dois workers: cada um parte do estado gravado pelo outro
+    turbine_id = new_turbine_id()
+    first, second = AlertEngine(), AlertEngine()
+    first.init_app(app)
+    second.init_app(app)
+
+    first.observe(turbine_id, {'availability': 94.0})
+    [opened] = second.active(turbine_id)
+    second.observe(turbine_id, {'availability': 40.0})
+    [escalated] = first.active(turbine_id)
+    assert escalated['id'] == opened['id']
+    assert escalated['severity'] == 'critical'
+
+    first.acknowledge(opened['id'])
+    assert second.active(turbine_id)[0]['status'] == 'acknowledged'
+    second.observe(turbine_id, {'availability': 99.0})
+    assert first.active(turbine_id) == []
+    assert alert_engine.active(turbine_id) == []
+
+
+def test_unknown_alert_id(client):
+    assert alert_engine.clear('missing') is None
+    assert client.post('/api/alerts/missing/clear').status_code == 404
+
+
+@pytest.mark.parametrize('committed', [False, True])
+def test_staged_changes_apply_only_after_commit(app, new_turbine_id, committed):
+    # Regressão (7e6729f): o listener do flush só muda o índice em memória depois do commit
+    turbine_id = new_turbine_id()
+    with app.app_context():
+        connection = db.engine.raw_connection()
+    try:
+        begin_write(connection)
+        finish = alert_engine.stage_many({turbine_id: {'availability': 10.0}}, connection)
+        if committed:
+            connection.commit()
+        else:
+            connection.rollback()
+        finish(committed)
+    finally:
+        connection.close()
+
+    assert _severities(turbine_id) == ([('critical', 'open')] if committed else [])
+    # Outro worker lê o mesmo estado do banco
+    other = AlertEngine()
+    other.init_app(app)
+    assert [a['severity'] for a in other.active(turbine_id)] == (['critical'] if committed else [])
+
+
+def test_every_route_sends_the_adjusted_failure_probability(client, trained_model, monkeypatch):
+    # Regressão (3c0bf66): /ml/predict/<id> e /ml/predict/all mandam o mesmo valor ajustado
+    monkeypatch.setattr(ml_predictions, 'SNAPSHOT_TTL', 1e9)
+    sent = {}
+    monkeypatch.setattr(alert_engine, 'observe', lambda turbine_id, values: sent.setdefault('single', {}).update(
+        {turbine_id: values['failure_probability']}))
+    monkeypatch.setattr(alert_engine, 'observe_many', lambda values: sent.setdefault('fleet', {}).update(
+        {turbine_id: v['failure_probability'] for turbine_id, v in values.items()}))
+
+    fleet = client.get('/api/ml/predict/all').get_json()['predictions']
+    for prediction in fleet:
+        single = client.get(f"/api/ml/predict/{prediction['turbine_id']}").get_json()['prediction']
+        assert round(sent['single'][prediction['turbine_id']], 3) == single['failure_probability']
+        assert sent['fleet'][prediction['turbine_id']] == prediction['failure_probability']
+        assert single['failure_probability'] == prediction['failure_probability']
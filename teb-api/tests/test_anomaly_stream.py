@@ -0,0 +1,192 @@
+import time
+import types
+
+import numpy as np
+
+from conftest import sample
+from src.ml_models.anomaly_stream import StreamingAnomalyDetector, anomaly_stream
+from src.ml_models.features import BASE_FEATURES, DEFAULT_TURBINE_AGE
+from src.models.user import db
+from src.services.telemetry_ingest import telemetry_ingest
+from src.services.telemetry_store import begin_write, telemetry_store
+
+# Sem modelo treinado só z-score e EWMA sinalizam, o que deixa os eventos previsíveis
+UNTRAINED = types.SimpleNamespace(is_trained=False)
+
+
+def _detector(app, events=None):
+    detector = StreamingAnomalyDetector(UNTRAINED, min_samples=3, trigger_samples=1, clear_samples=2)
+    if events is not None:
+        # Como o listener do alert_engine, só aplica os eventos depois do commit
+        detector.add_event_listener(
+            lambda connection, batch: lambda committed: events.extend(batch) if committed else None
+        )
+    detector.init_app(app)
+    return detector
+
+
+def _flush(app, detector, rows, commit=True):
+    """Simula um flush da ingestão: observe_rows na transação, commit ou rollback e finish"""
+    with app.app_context():
+        connection = db.engine.raw_connection()
+    try:
+        begin_write(connection)
+        finish = detector.observe_rows(connection, rows)
+        if commit:
+            connection.commit()
+        else:
+            connection.rollback()
+        finish(commit)
+    finally:
+        connection.close()
+
+
+def _batches(turbine_id, vibrations, start=None):
+    start = start or int(time.time()) - 3600
+    return [[sample(turbine_id, start + i, vibration_level=value)] for i, value in enumerate(vibrations)]
+
+
+def test_vibration_spike_enters_and_leaves_anomaly(app, new_turbine_id):
+    turbine_id = new_turbine_id()
+    events = []
+    detector = _detector(app, events)
+    batches = _batches(turbine_id, [0.5] * 5 + [5.0, 0.5, 0.5])
+    for rows in batches[:6]:
+        _flush(app, detector, rows)
+
+    state = detector.state(turbine_id)
+    assert state['anomalous']
+    assert 'vibration_level_zscore' in state['detectors']
+    assert [e['state'] for e in events] == ['anomalous']
+    assert detector.summary(turbine_id)['anomalous'][0]['turbine_id'] == turbine_id
+
+    # Sai da anomalia só depois de clear_samples amostras normais seguidas
+    _flush(app, detector, batches[6])
+    assert detector.state(turbine_id)['anomalous']
+    _flush(app, detector, batches[7])
+    assert not detector.state(turbine_id)['anomalous']
+    assert [e['state'] for e in events] == ['anomalous', 'normal']
+
+
+def test_other_workers_replay_the_journal(app, new_turbine_id):
+    # Dois detectores fazem o papel de dois workers do gunicorn sobre o mesmo banco
+    turbine_id = new_turbine_id()
+    writer_events, reader_events = [], []
+    writer = _detector(app, writer_events)
+    reader = _detector(app, reader_events)
+    reader_samples = reader.stats()['samples']
+
+    for rows in _batches(turbine_id, [0.5] * 5 + [5.0]):
+        _flush(app, writer, rows)
+
+    assert reader.state(turbine_id) == writer.state(turbine_id)
+    assert reader.state(turbine_id)['anomalous']
+    # Só o worker que gravou o lote repassa os eventos e conta as amostras
+    assert len(writer_events) == 1 and reader_events == []
+    assert reader.stats()['samples'] == reader_samples
+    assert reader.stats()['replayed_batches'] >= 6
+
+    # Um worker iniciado depois reconstrói o mesmo estado
+    assert _detector(app).state(turbine_id) == writer.state(turbine_id)
+
+
+def test_rolled_back_flush_leaves_no_trace(app, new_turbine_id):
+    # Regressão (2fb6d15): um flush desfeito volta ao buffer e não pode contar duas vezes
+    turbine_id = new_turbine_id()
+    events = []
+    detector = _detector(app, events)
+    batches = _batches(turbine_id, [0.5] * 5 + [5.0])
+    for rows in batches[:-1]:
+        _flush(app, detector, rows)
+    before = detector.state(turbine_id)
+    samples = detector.stats()['samples']
+
+    _flush(app, detector, batches[-1], commit=False)
+    assert detector.state(turbine_id) == before
+    assert detector.stats()['samples'] == samples
+    assert events == []
+
+    # Reenviado, o lote conta uma vez e gera o evento
+    _flush(app, detector, batches[-1])
+    assert detector.state(turbine_id)['anomalous']
+    assert detector.state(turbine_id)['samples'] == before['samples'] + 1
+    assert len(events) == 1
+    # O lote desfeito também não ficou no diário
+    assert _detector(app).state(turbine_id) == detector.state(turbine_id)
+
+
+def test_rolled_back_new_turbine_is_forgotten(app, new_turbine_id):
+    turbine_id = new_turbine_id()
+    detector = _detector(app)
+    turbines = detector.stats()['turbines']
+    _flush(app, detector, _batches(turbine_id, [0.5])[0], commit=False)
+    assert detector.state(turbine_id) is None
+    assert detector.stats()['turbines'] == turbines
+
+
+def test_pruned_journal_resets_the_state(app, new_turbine_id):
+    turbine_id, later_id = new_turbine_id(), new_turbine_id()
+    writer = _detector(app)
+    reader = _detector(app)
+    _flush(app, writer, _batches(turbine_id, [0.5])[0])
+    assert reader.state(turbine_id) is not None
+    resets = reader.stats()['resets']
+
+    # Dois lotes novos com um diário de uma linha: o leitor perde o primeiro deles
+    with app.app_context():
+        connection = db.engine.raw_connection()
+    try:
+        for rows in _batches(later_id, [0.5, 0.6]):
+            begin_write(connection)
+            telemetry_store.append_journal(connection, rows, max_rows=1)
+            connection.commit()
+    finally:
+        connection.close()
+
+    assert reader.stats()['resets'] == resets + 1
+    assert reader.state(turbine_id) is None
+    assert reader.state(later_id)['samples'] == 1
+
+
+def test_missing_field_reuses_the_last_value(app, new_turbine_id):
+    turbine_id = new_turbine_id()
+    detector = _detector(app)
+    for rows in _batches(turbine_id, [0.5, 0.5, 0.5, None]):
+        _flush(app, detector, rows)
+    state = detector.state(turbine_id)
+    assert state['samples'] == 4
+    assert not state['anomalous']
+
+
+def test_ingest_flush_feeds_the_detector(app, client, new_turbine_id):
+    turbine_id = new_turbine_id()
+    ts = int(time.time()) - 600
+    payload = [{'turbine_id': turbine_id, 'ts': ts + i, 'wind_speed': 9.0, 'power_output': 1800.0,
+                'vibration_level': 0.5} for i in range(4)]
+    assert client.post('/api/telemetry', json=payload).status_code == 202
+    assert anomaly_stream.state(turbine_id) is None
+
+    telemetry_ingest.flush()
+    assert anomaly_stream.state(turbine_id)['samples'] == 4
+
+
+class _RecordingModel:
+    """Modelo que só guarda as entradas recebidas pelo detector"""
+    is_trained = True
+
+    def __init__(self):
+        self.inputs = []
+
+    def detect_anomalies(self, X):
+        self.inputs.append(X)
+        return {'anomaly_score': np.zeros(len(X))}
+
+
+def test_model_sees_the_default_turbine_age(app, new_turbine_id):
+    # Regressão (f624a3a): a telemetria não traz a idade; o detector usa a mesma das previsões
+    model = _RecordingModel()
+    detector = StreamingAnomalyDetector(model)
+    detector.process(_batches(new_turbine_id(), [0.5])[0])
+    [X] = model.inputs
+    assert X.shape[1] == len(BASE_FEATURES)
+    assert X[0, BASE_FEATURES.index('turbine_age')] == DEFAULT_TURBINE_AGE
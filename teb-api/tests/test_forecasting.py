@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from src.ml_models.forecasting import (
+    QUANTILES, days_to_failure, days_to_threshold, point_days_to_failure, rollout, tree_predictions
+)
+from src.ml_models.features import FEATURE_NAMES
+from src.routes import ml_predictions
+
+
+@pytest.fixture
+def fixed_window(monkeypatch):
+    # Mesmas entradas simuladas em todos os pedidos do teste
+    monkeypatch.setattr(ml_predictions, 'SNAPSHOT_TTL', 1e9)
+
+
+@pytest.mark.parametrize('probability', [0.05, 0.3, 0.5, 0.9])
+def test_point_forecast_matches_a_constant_trajectory(probability):
+    # A forma fechada é a mesma curva de sobrevivência de uma trajetória constante
+    horizon = 365
+    paths = np.full((1, horizon, 1), probability)
+    expected, _ = days_to_failure(paths)
+    np.testing.assert_array_equal(point_days_to_failure(np.array([probability]), horizon_days=horizon), expected)
+
+
+def test_point_forecast_limits():
+    days = point_days_to_failure(np.array([0.0, 0.5, 10.0]), horizon_days=10)
+    assert np.isnan(days[0]).all()
+    # Taxa de 5% ao dia: mediana no dia 14, além do horizonte de 10 dias
+    assert days[1, 0] == 3 and np.isnan(days[1, 1:]).all()
+    np.testing.assert_array_equal(days[2], np.ones(len(QUANTILES)))
+
+
+def test_days_to_threshold_uses_the_first_crossing():
+    paths = np.array([[[0.1, 0.1], [0.8, 0.1], [0.9, 0.1]]])  # (1 turbina, 3 dias, 2 árvores)
+    result = days_to_threshold(paths, lambda p: p >= 0.7, quantiles=(0.0, 1.0))
+    assert result[0, 0] == 1
+    assert np.isnan(result[0, 1])
+
+
+def test_rollout_advances_age_and_maintenance():
+    X = np.zeros((2, len(FEATURE_NAMES)))
+    rolled = rollout(X, 3).reshape(2, 3, -1)
+    np.testing.assert_array_equal(rolled[1, :, FEATURE_NAMES.index('turbine_age')], [0, 1, 2])
+    np.testing.assert_allclose(rolled[0, :, FEATURE_NAMES.index('maintenance_urgency')], np.log1p([0, 1, 2]))
+
+
+def test_tree_predictions_match_each_tree(trained_model):
+    forest = trained_model.failure_model
+    X = np.random.default_rng(1).normal(size=(40, forest.n_features_in_))
+    expected = np.column_stack([tree.predict(X) for tree in forest.estimators_])
+    np.testing.assert_allclose(tree_predictions(forest, X, chunk_rows=16), expected)
+
+
+def test_single_turbine_forecast_matches_the_fleet(client, trained_model, fixed_window):
+    # Regressão (4908873): a turbina sozinha usa o mesmo ajuste por histórico que a frota
+    fleet = {f['turbine_id']: f for f in client.get('/api/ml/forecast?horizon=30').get_json()['forecasts']}
+    for turbine_id, expected in fleet.items():
+        single = client.get(f'/api/ml/forecast/{turbine_id}?horizon=30').get_json()
+        assert single['forecast'] == expected['forecast']
+
+
+def test_trajectory_only_in_forecast_routes(client, trained_model, fixed_window):
+    # Regressão (345c285): as rotas de previsão não calculam a trajetória por árvore
+    prediction = client.get('/api/ml/predict/TEB001').get_json()
+    assert 'trajectory' not in prediction and 'forecast' not in prediction
+    assert set(prediction['prediction']['days_to_failure_interval']) == {'p10', 'p50', 'p90'}
+    assert all('forecast' not in p for p in client.get('/api/ml/predict/all').get_json()['predictions'])
+
+    forecast = client.get('/api/ml/forecast/TEB001?horizon=10&step=3').get_json()
+    assert [point['day'] for point in forecast['trajectory']] == [0, 3, 6, 9]
+    assert forecast['horizon_days'] == 10
+
+
+@pytest.mark.parametrize('query', ['horizon=0', 'horizon=1000', 'failure_threshold=2', 'step=0', 'horizon=x'])
+def test_invalid_forecast_options(client, trained_model, query):
+    assert client.get(f'/api/ml/forecast/TEB001?{query}').status_code == 400
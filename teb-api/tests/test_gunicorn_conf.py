@@ -0,0 +1,47 @@
+import os
+import runpy
+
+import pytest
+
+CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+
+@pytest.fixture
+def load_conf(monkeypatch):
+    """Executa gunicorn.conf.py restaurando as variáveis de ambiente que ele altera"""
+    for variable in ('TEB_METRICS_DIR', 'TEB_WORKERS', 'TEB_MODEL_WATCH_INTERVAL',
+                     'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        monkeypatch.delenv(variable, raising=False)
+
+    def load(**environ):
+        for name, value in environ.items():
+            monkeypatch.setenv(name, value)
+        return runpy.run_path(CONF)
+    return load
+
+
+def test_defaults_to_one_worker_per_cpu(load_conf):
+    conf = load_conf()
+    assert conf['workers'] == (os.cpu_count() or 1)
+    assert conf['preload_app'] and conf['worker_class'] == 'gthread'
+    conf['on_exit'](None)
+
+
+def test_workers_from_environment(load_conf):
+    conf = load_conf(TEB_WORKERS='3')
+    assert conf['workers'] == 3
+    conf['on_exit'](None)
+
+
+def test_temporary_metrics_dir_is_removed_on_exit(load_conf):
+    conf = load_conf()
+    directory = os.environ['TEB_METRICS_DIR']
+    assert os.path.isdir(directory)
+    conf['on_exit'](None)
+    assert not os.path.exists(directory)
+
+
+def test_configured_metrics_dir_is_kept(load_conf, tmp_path):
+    conf = load_conf(TEB_METRICS_DIR=str(tmp_path))
+    conf['on_exit'](None)
+    assert tmp_path.is_dir()
@@ -0,0 +1,68 @@
+import copy
+
+import numpy as np
+import pytest
+
+from src.ml_models.predictive_model import TurbinePredictiveModel, _rescale_forest
+
+
+@pytest.fixture(scope='module')
+def incremental(trained_model):
+    """Uma rodada incremental sobre o modelo da sessão, com limite de árvores abaixo de base + novas"""
+    base_trees = len(trained_model.failure_model.estimators_)
+    model = TurbinePredictiveModel()
+    model.train_incremental(trained_model, new_trees=5, max_trees=base_trees + 2, baseline=False)
+    return model, base_trees
+
+
+def test_forests_are_capped_and_oldest_trees_retired(trained_model, incremental):
+    model, base_trees = incremental
+    training = model.metrics['training']
+
+    assert training['mode'] == 'incremental'
+    assert training['increments'] == 1
+    assert training['base_version'] == trained_model.version
+    for name in ('failure_model', 'availability_model'):
+        assert training['n_estimators'][name] == base_trees + 2
+        assert training['retired_trees'][name] == 3
+        assert len(getattr(model, name).estimators_) == base_trees + 2
+    # A base continua em uso sem alteração
+    assert len(trained_model.failure_model.estimators_) == base_trees
+    assert model.is_trained and 'failure_mae' in model.metrics
+
+
+def test_new_window_follows_the_base_history(trained_model, incremental):
+    model, _ = incremental
+    base_end = trained_model.metrics['training']['data']['end']
+    window = model.metrics['training']['window']
+    assert window['start'] > base_end
+    assert model.metrics['training']['data']['end'] == window['end']
+    assert model.metrics['training']['samples_seen'] > trained_model.scaler.n_samples_seen_.max()
+
+
+def test_rescaled_trees_keep_their_decisions(trained_model):
+    # Os limiares acompanham o scaler novo: mesma previsão para a mesma amostra
+    scaler = trained_model.scaler
+    X = scaler.inverse_transform(np.random.default_rng(0).normal(size=(50, scaler.n_features_in_)))
+    new_scaler = copy.deepcopy(scaler)
+    new_scaler.partial_fit(X * 1.5 + 2.0)
+
+    forest = trained_model.failure_model
+    rescaled = _rescale_forest(forest, scaler, new_scaler)
+    np.testing.assert_allclose(rescaled.predict(new_scaler.transform(X)), forest.predict(scaler.transform(X)))
+    assert rescaled.estimators_[0] is not forest.estimators_[0]
+
+
+def test_baseline_reports_the_delta(trained_model):
+    model = TurbinePredictiveModel()
+    metrics = model.train_incremental(trained_model, new_trees=2, baseline=True)
+    assert set(metrics['delta']) >= {'failure_mae', 'availability_mae', 'fit_wall_time', 'fit_speedup'}
+    assert metrics['delta']['failure_mae'] == pytest.approx(
+        metrics['failure_mae'] - metrics['baseline']['failure_mae'])
+
+
+def test_invalid_requests(trained_model):
+    with pytest.raises(ValueError):
+        TurbinePredictiveModel().train_incremental(TurbinePredictiveModel())
+    with pytest.raises(ValueError):
+        TurbinePredictiveModel().train_incremental(trained_model, new_trees=0)
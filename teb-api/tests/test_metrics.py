@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+
+from src.services.metrics import LATENCY_BUCKETS, MetricsRegistry
+
+
+def _collect():
+    return [
+        ('teb_test_samples_total', 'counter', 'Amostras.', [({'source': 'api'}, 10)]),
+        ('teb_test_buffer_rows', 'gauge', 'Linhas no buffer.', [({}, 3)])
+    ]
+
+
+def _worker_file(directory, pid, responses, buffer_rows):
+    """Arquivo de métricas de outro worker, no formato gravado por _dump()"""
+    counts = [0] * len(LATENCY_BUCKETS)
+    counts[0] = responses
+    document = {
+        'pid': pid,
+        'started_at': 0.0,
+        'responses': [['GET', '/api/turbines', 200, responses]],
+        'in_flight': [['GET', '/api/turbines', 1]],
+        'exceptions': [],
+        'latency': [['GET', '/api/turbines', counts, 0.0001 * responses, responses]],
+        'spans': [],
+        'collected': [
+            ['teb_test_samples_total', 'counter', 'Amostras.', [[{'source': 'api'}, 5]]],
+            ['teb_test_buffer_rows', 'gauge', 'Linhas no buffer.', [[{}, buffer_rows]]]
+        ]
+    }
+    with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+        json.dump(document, f)
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def _value(text, series):
+    for line in text.splitlines():
+        if line.startswith(series + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+def test_render_sums_counters_of_every_worker(tmp_path):
+    registry = MetricsRegistry(directory=str(tmp_path))
+    registry.add_collector(_collect)
+    for _ in range(2):
+        registry.observe_request('GET', '/api/turbines', 200, 0.0001)
+
+    live, dead = os.getppid(), _dead_pid()
+    _worker_file(str(tmp_path), live, responses=3, buffer_rows=7)
+    _worker_file(str(tmp_path), dead, responses=4, buffer_rows=11)
+    text = registry.render()
+
+    # Contadores e histogramas somam inclusive os de workers já encerrados
+    assert _value(text, 'teb_http_requests_total{method="GET",route="/api/turbines",status="200"}') == 9
+    assert _value(text, 'teb_http_request_duration_seconds_count{method="GET",route="/api/turbines"}') == 9
+    assert _value(text, 'teb_test_samples_total{source="api"}') == 20
+
+    # Gauges saem por worker, só dos processos vivos
+    assert _value(text, f'teb_test_buffer_rows{{worker="{os.getpid()}"}}') == 3
+    assert _value(text, f'teb_test_buffer_rows{{worker="{live}"}}') == 7
+    assert f'worker="{dead}"' not in text
+    assert _value(text, f'teb_http_requests_in_flight{{method="GET",route="/api/turbines",worker="{live}"}}') == 1
+
+
+def test_after_fork_counts_only_the_child(tmp_path):
+    registry = MetricsRegistry(directory=str(tmp_path))
+    registry.observe_request('GET', '/api/turbines', 200, 0.0001)
+    registry._after_fork()
+    assert registry.snapshot()['responses'] == {}
+
+
+def test_render_without_directory_is_local():
+    registry = MetricsRegistry(directory=None)
+    registry.add_collector(_collect)
+    registry.observe_request('GET', '/api/turbines', 200, 0.0001)
+    text = registry.render()
+    assert _value(text, 'teb_http_requests_total{method="GET",route="/api/turbines",status="200"}') == 1
+    assert _value(text, 'teb_test_buffer_rows') == 3
+    assert 'worker=' not in text
@@ -0,0 +1,58 @@
+import numpy as np
+
+from src.ml_models.model_registry import ModelRegistry
+
+
+def _publish(registry, value):
+    return registry.publish(
+        {'scaler_mean': np.full(3, value), 'is_trained': True},
+        metrics={'failure_mae': value},
+        feature_names=['a', 'b', 'c'],
+        arrays={'threshold': np.arange(4, dtype=np.float64) * value}
+    )
+
+
+def test_publish_activates_new_version_and_rollback(tmp_path):
+    registry = ModelRegistry(root=str(tmp_path))
+    first = _publish(registry, 1.0)
+    second = _publish(registry, 2.0)
+
+    assert registry.list_versions() == [first['version'], second['version']]
+    assert registry.current_version() == second['version']
+
+    registry.activate(first['version'])
+    bundle, manifest = registry.load()
+    assert manifest['version'] == first['version']
+    assert manifest['metrics'] == {'failure_mae': 1.0}
+    np.testing.assert_array_equal(bundle['scaler_mean'], np.full(3, 1.0))
+
+
+def test_bundle_is_loaded_in_memory_and_only_arrays_are_mapped(tmp_path):
+    # Regressão: o bundle não é carregado com mmap_mode (as árvores do sklearn
+    # copiam os nós de qualquer forma); só os .npy do motor compilado são mapeados
+    registry = ModelRegistry(root=str(tmp_path))
+    _publish(registry, 3.0)
+
+    bundle, _ = registry.load()
+    assert not isinstance(bundle['scaler_mean'], np.memmap)
+
+    arrays = registry.load_arrays()
+    assert isinstance(arrays['threshold'], np.memmap)
+    np.testing.assert_array_equal(arrays['threshold'], np.arange(4) * 3.0)
+
+
+def test_load_without_published_version(tmp_path):
+    registry = ModelRegistry(root=str(tmp_path))
+    assert registry.load() == (None, None)
+    assert registry.load_arrays() is None
+
+
+def test_trained_model_roundtrip(trained_model):
+    from src.ml_models.predictive_model import TurbinePredictiveModel
+
+    loaded = TurbinePredictiveModel()
+    assert loaded.load_model(version=trained_model.version)
+    X = np.random.default_rng(0).normal(size=(16, len(trained_model.feature_names)))
+    np.testing.assert_allclose(
+        loaded.failure_model.predict(X), trained_model.failure_model.predict(X)
+    )
@@ -0,0 +1,123 @@
+import json
+import uuid
+
+import pytest
+
+from conftest import sample
+from src.services.streaming import keyset_slice
+from src.services.telemetry_store import telemetry_store
+
+# Intervalo sem outras amostras da TEB001 (os demais testes usam datas recentes)
+HISTORY_START = 978307200  # 2001-01-01
+
+
+def _walk(client, url, key=None, **params):
+    """Percorre todas as páginas seguindo X-Next-Cursor; retorna os itens e a quantidade de páginas"""
+    items, pages, after = [], 0, None
+    while True:
+        query = {**params, **({'after': after} if after is not None else {})}
+        response = client.get(url, query_string=query)
+        assert response.status_code == 200
+        body = response.get_json()
+        page = body if key is None else body[key]
+        if key is not None:
+            cursor = body['next_cursor']
+            assert (None if cursor is None else str(cursor)) == response.headers.get('X-Next-Cursor')
+        items.extend(page)
+        pages += 1
+        after = response.headers.get('X-Next-Cursor')
+        if after is None:
+            return items, pages
+        assert 'rel="next"' in response.headers['Link']
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 10])
+def test_keyset_slice_pages_cover_the_keys_once(limit):
+    keys = ['a', 'b', 'c', 'd', 'e']
+    seen, after = [], None
+    while True:
+        positions, after = keyset_slice(keys, after, limit)
+        seen.extend(keys[i] for i in positions)
+        if after is None:
+            break
+    assert seen == keys
+
+
+def test_keyset_slice_after_a_missing_key():
+    # A chave do cursor pode ter saído da lista (turbina desativada): a página começa na seguinte
+    positions, next_cursor = keyset_slice(['a', 'c', 'e'], 'b', 1)
+    assert list(positions) == [1]
+    assert next_cursor == 'c'
+
+
+@pytest.fixture(scope='module')
+def history(app):
+    rows = [sample('TEB001', HISTORY_START + 20 * i, wind_speed=float(i)) for i in range(25)]
+    with app.app_context():
+        telemetry_store.bulk_insert(rows)
+    return {'from': HISTORY_START, 'to': HISTORY_START + 3600}
+
+
+@pytest.mark.parametrize('limit', [1, 4, 25, 100])
+def test_raw_history_pages_match_the_full_range(client, history, limit):
+    full, _ = _walk(client, '/api/turbines/TEB001/history', 'history', resolution='raw', **history)
+    assert [p['wind_speed'] for p in full] == [float(i) for i in range(25)]
+
+    paged, pages = _walk(client, '/api/turbines/TEB001/history', 'history', resolution='raw', limit=limit, **history)
+    assert paged == full
+    assert pages == -(-25 // limit)
+
+
+def test_aggregated_history_pages_match_the_full_range(client, history):
+    full, _ = _walk(client, '/api/turbines/TEB001/history', 'history', resolution='1m', **history)
+    paged, pages = _walk(client, '/api/turbines/TEB001/history', 'history', resolution='1m', limit=2, **history)
+    assert paged == full
+    assert sum(p['samples'] for p in paged) == 25
+    assert pages > 1
+
+
+def test_history_rejects_a_bad_cursor(client, history):
+    response = client.get('/api/turbines/TEB001/history', query_string={**history, 'after': 'ontem', 'limit': 5})
+    assert response.status_code == 400
+
+
+def test_users_pages(client):
+    suffix = uuid.uuid4().hex[:8]
+    for i in range(5):
+        assert client.post('/api/users', json={
+            'username': f'user{i}-{suffix}', 'email': f'user{i}-{suffix}@example.com'
+        }).status_code == 201
+
+    full, _ = _walk(client, '/api/users')
+    paged, pages = _walk(client, '/api/users', limit=2)
+    assert paged == full
+    assert [u['id'] for u in paged] == sorted(u['id'] for u in paged)
+    assert pages == -(-len(full) // 2)
+    assert client.get('/api/users', query_string={'after': 'x'}).status_code == 400
+
+
+def test_turbine_pages_and_fields(client):
+    full, _ = _walk(client, '/api/turbines', 'turbines')
+    paged, _ = _walk(client, '/api/turbines', 'turbines', limit=3, fields='id,farm')
+    assert [t['id'] for t in paged] == [t['id'] for t in full]
+    assert all(set(t) == {'id', 'farm'} for t in paged)
+
+
+def test_prediction_pages(client, trained_model):
+    full, _ = _walk(client, '/api/predictions', 'predictions', fields='turbine_id,failure_probability')
+    paged, pages = _walk(client, '/api/predictions', 'predictions', limit=2, fields='turbine_id,failure_probability')
+    assert paged == full
+    assert pages > 1
+
+
+def test_ndjson_sends_one_item_per_line(client):
+    response = client.get('/api/turbines', query_string={'format': 'ndjson', 'limit': 2})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 2
+    assert [json.loads(line)['id'] for line in lines][-1] == response.headers['X-Next-Cursor']
+
+
+@pytest.mark.parametrize('limit', ['0', 'abc', '100000'])
+def test_invalid_limit(client, limit):
+    assert client.get('/api/turbines', query_string={'limit': limit}).status_code == 400
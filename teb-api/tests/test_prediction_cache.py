@@ -0,0 +1,121 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.ml_models.prediction_cache import PredictionCache, prediction_cache
+from src.routes import ml_predictions
+from src.routes.ml_predictions import fleet_inputs, invalidate_predictions
+from src.services.turbine_registry import turbine_registry
+
+
+@pytest.fixture
+def fixed_window(monkeypatch):
+    """Mesma janela de simulação durante todo o teste (as entradas simuladas não mudam)"""
+    monkeypatch.setattr(ml_predictions, 'SNAPSHOT_TTL', 1e9)
+
+
+@pytest.fixture
+def fleet_records(app, trained_model, fixed_window):
+    fleet = turbine_registry.index()
+    with app.app_context():
+        records, _ = fleet_inputs(fleet, np.arange(len(fleet)))
+    return list(fleet.ids), records
+
+
+def _rows(records, rows):
+    return {name: values[rows] for name, values in records.items()}
+
+
+def test_cached_rows_match_the_model(trained_model, fleet_records):
+    turbine_ids, records = fleet_records
+    cache = PredictionCache()
+    first = cache.predict(trained_model, turbine_ids, records)
+    second = cache.predict(trained_model, turbine_ids, records)
+    direct = trained_model.predict_matrix(trained_model.prepare_features(records))
+
+    assert cache.stats()['hits'] == len(turbine_ids)
+    for name in ('failure_probability', 'predicted_availability', 'anomaly_score', 'is_anomaly'):
+        np.testing.assert_array_equal(first[name], second[name])
+        np.testing.assert_allclose(second[name], direct[name])
+    np.testing.assert_allclose(second['failure_trees'], direct['failure_trees'], rtol=1e-6)
+
+
+def test_lru_evicts_least_recently_used(trained_model, fleet_records):
+    turbine_ids, records = fleet_records
+    cache = PredictionCache(max_entries=2)
+    for i in (0, 1):
+        cache.predict(trained_model, [turbine_ids[i]], _rows(records, [i]))
+    # Usar a 0 de novo: a 1 passa a ser a menos recente e sai quando a 2 entra
+    cache.predict(trained_model, [turbine_ids[0]], _rows(records, [0]))
+    cache.predict(trained_model, [turbine_ids[2]], _rows(records, [2]))
+
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions']) == (2, 1)
+    misses = stats['misses']
+    cache.predict(trained_model, [turbine_ids[0]], _rows(records, [0]))
+    assert cache.stats()['misses'] == misses
+    cache.predict(trained_model, [turbine_ids[1]], _rows(records, [1]))
+    assert cache.stats()['misses'] == misses + 1
+
+
+def test_expired_entries_are_misses(trained_model, fleet_records):
+    turbine_ids, records = fleet_records
+    cache = PredictionCache(ttl=0.01)
+    cache.predict(trained_model, turbine_ids[:1], _rows(records, [0]))
+    time.sleep(0.02)
+    cache.predict(trained_model, turbine_ids[:1], _rows(records, [0]))
+    assert cache.stats()['hits'] == 0
+
+
+def test_different_features_never_share_an_entry(trained_model, fleet_records):
+    turbine_ids, records = fleet_records
+    cache = PredictionCache()
+    cache.predict(trained_model, turbine_ids[:1], _rows(records, [0]))
+    changed = _rows(records, [0])
+    changed['vibration_level'] = changed['vibration_level'] + 5.0
+    result = cache.predict(trained_model, turbine_ids[:1], changed)
+
+    assert cache.stats()['hits'] == 0
+    direct = trained_model.predict_matrix(trained_model.prepare_features(changed))
+    np.testing.assert_allclose(result['failure_probability'], direct['failure_probability'])
+
+
+def test_flush_invalidates_only_after_commit(trained_model, fleet_records):
+    # Regressão (2725f58): um flush desfeito não descarta as entradas
+    turbine_ids, records = fleet_records
+    prediction_cache.clear()
+    prediction_cache.predict(trained_model, turbine_ids, records)
+    rows = [(turbine_ids[0], 0)]
+
+    invalidate_predictions(None, rows)(False)
+    assert prediction_cache.stats()['entries'] == len(turbine_ids)
+
+    invalidate_predictions(None, rows)(True)
+    assert prediction_cache.stats()['entries'] == len(turbine_ids) - 1
+
+
+def test_model_swap_clears_the_cache(trained_model, fleet_records):
+    turbine_ids, records = fleet_records
+    prediction_cache.predict(trained_model, turbine_ids, records)
+    trained_model.swap_in(trained_model)
+    assert prediction_cache.stats()['entries'] == 0
+
+
+def test_inputs_are_built_per_row(app, trained_model, fixed_window):
+    # Regressão (2725f58): as entradas de uma turbina não dependem das outras linhas pedidas
+    fleet = turbine_registry.index()
+    with app.app_context():
+        everything, _ = fleet_inputs(fleet, np.arange(len(fleet)))
+        alone = [fleet_inputs(fleet, np.array([row]))[0] for row in range(len(fleet))]
+    for row in range(len(fleet)):
+        for name, values in alone[row].items():
+            assert values[0] == everything[name][row], name
+
+
+def test_single_and_fleet_predictions_agree(client, trained_model, fixed_window):
+    fleet = client.get('/api/ml/predict/all').get_json()['predictions']
+    for expected in fleet[:3]:
+        single = client.get(f"/api/ml/predict/{expected['turbine_id']}").get_json()['prediction']
+        assert single['failure_probability'] == expected['failure_probability']
+        assert single['predicted_availability'] == expected['predicted_availability']
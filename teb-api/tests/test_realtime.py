@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from src.routes import ml_predictions
+from src.ml_models.features import DEFAULT_TURBINE_AGE
+from src.routes.ml_predictions import fleet_inputs, simulation_uniforms
+from src.services.turbine_registry import turbine_registry
+from src.routes.turbine_data import generate_real_time_data
+
+TURBINES = ['TEB001', 'TEB002', 'TEB003']
+
+
+def _uniforms_in_subprocess(stream):
+    """simulation_uniforms calculado em outro processo, como num outro worker"""
+    code = (
+        'import json\n'
+        'from src.routes.ml_predictions import simulation_uniforms\n'
+        f'print(json.dumps(simulation_uniforms({TURBINES!r}, 3, stream={stream}).tolist()))\n'
+    )
+    env = {**os.environ, 'TEB_SNAPSHOT_TTL': '1e9'}
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', code], env=env, cwd=cwd, capture_output=True, text=True,
+                            check=True, timeout=120)
+    return np.array(json.loads(result.stdout.strip().splitlines()[-1]))
+
+
+def test_uniforms_are_the_same_in_every_process(monkeypatch):
+    monkeypatch.setattr(ml_predictions, 'SNAPSHOT_TTL', 1e9)
+    local = simulation_uniforms(TURBINES, 3, stream=1)
+    np.testing.assert_array_equal(_uniforms_in_subprocess(1), local)
+
+
+def test_uniforms_depend_on_turbine_and_stream(monkeypatch):
+    monkeypatch.setattr(ml_predictions, 'SNAPSHOT_TTL', 1e9)
+    fleet = simulation_uniforms(TURBINES, 3)
+    assert ((fleet > 0) & (fleet < 1)).all()
+    # Consultada sozinha, a turbina tem os mesmos valores que na frota
+    np.testing.assert_array_equal(simulation_uniforms(['TEB002'], 3)[0], fleet[1])
+    assert not np.array_equal(simulation_uniforms(TURBINES, 3, stream=1), fleet)
+
+
+def test_realtime_data_is_fixed_within_the_window(app, monkeypatch):
+    monkeypatch.setattr(ml_predictions, 'SNAPSHOT_TTL', 1e9)
+    with app.app_context():
+        first, second = generate_real_time_data(), generate_real_time_data()
+    for turbine in first + second:
+        turbine.pop('last_update')
+    assert first == second
+    assert {t['id'] for t in first} >= set(TURBINES)
+
+
+def test_simulated_inputs_use_the_default_turbine_age(app):
+    # Regressão (f624a3a): a idade das entradas simuladas vem de features.py
+    with app.app_context():
+        fleet = turbine_registry.index()
+        current_data, _ = fleet_inputs(fleet, range(len(fleet)))
+    assert (current_data['turbine_age'] == DEFAULT_TURBINE_AGE).all()
@@ -0,0 +1,82 @@
+import time
+
+from conftest import sample
+from src.routes.ml_predictions import apply_latest_telemetry
+from src.services.telemetry_ingest import telemetry_ingest
+from src.services.telemetry_store import telemetry_store
+
+
+def _raw(app, turbine_id):
+    with app.app_context():
+        return telemetry_store.query_range(turbine_id, 0, 2 ** 31)
+
+
+def _minute_buckets(app, turbine_id):
+    with app.app_context():
+        return telemetry_store.query_range(turbine_id, 0, 2 ** 31, resolution=60)
+
+
+def test_resent_batch_changes_neither_raw_table_nor_rollups(app, new_turbine_id):
+    turbine_id = new_turbine_id()
+    ts = int(time.time()) // 60 * 60 - 3600
+    rows = [sample(turbine_id, ts), sample(turbine_id, ts + 10, wind_speed=11.0)]
+
+    with app.app_context():
+        assert telemetry_store.bulk_insert(rows) == 2
+        # Reenvio com um valor diferente: a amostra gravada é mantida
+        assert telemetry_store.bulk_insert([rows[0][:2] + (99.0,) + rows[0][3:], rows[1]]) == 0
+
+    raw = _raw(app, turbine_id)
+    assert [r['wind_speed'] for r in raw] == [9.0, 11.0]
+    buckets = _minute_buckets(app, turbine_id)
+    assert [(b['samples'], b['wind_speed']) for b in buckets] == [(2, 10.0)]
+
+
+def test_repeated_samples_within_a_batch_count_once(app, new_turbine_id):
+    turbine_id = new_turbine_id()
+    ts = int(time.time()) // 60 * 60 - 7200
+    rows = [sample(turbine_id, ts), sample(turbine_id, ts), sample(turbine_id, ts + 1)]
+
+    with app.app_context():
+        assert telemetry_store.bulk_insert(rows) == 2
+    assert [b['samples'] for b in _minute_buckets(app, turbine_id)] == [2]
+
+
+def test_http_resend_is_deduplicated_on_flush(app, client, new_turbine_id):
+    turbine_id = new_turbine_id()
+    ts = int(time.time()) // 60 * 60 - 600
+    payload = [{'turbine_id': turbine_id, 'ts': ts + i, 'wind_speed': 8.0 + i} for i in range(3)]
+
+    for _ in range(2):
+        response = client.post('/api/telemetry', json=payload)
+        assert response.status_code == 202
+        assert response.get_json()['accepted'] == 3
+        telemetry_ingest.flush()
+
+    assert len(_raw(app, turbine_id)) == 3
+    assert [b['samples'] for b in _minute_buckets(app, turbine_id)] == [3]
+
+
+def test_invalid_payload_is_rejected(client):
+    response = client.post('/api/telemetry', data=b'not json', content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_latest_sample_is_shared_through_the_database(app, client, new_turbine_id):
+    # A última amostra de cada turbina fica em telemetry_latest, lida por qualquer worker;
+    # uma amostra atrasada não substitui a mais nova
+    turbine_id = new_turbine_id()
+    ts = int(time.time()) - 60
+    for offset, wind_speed in ((0, 12.5), (-30, 4.0)):
+        client.post('/api/telemetry', json=[{'turbine_id': turbine_id, 'ts': ts + offset, 'wind_speed': wind_speed}])
+        telemetry_ingest.flush()
+
+    with app.app_context():
+        latest = telemetry_ingest.latest_many([turbine_id, new_turbine_id()])
+    assert list(latest) == [turbine_id]
+    assert (latest[turbine_id]['ts'], latest[turbine_id]['wind_speed']) == (ts, 12.5)
+
+    current = {'wind_speed': [9.0], 'vibration_level': [1.0]}
+    assert apply_latest_telemetry(latest[turbine_id], current, 0) == 'telemetry'
+    assert current['wind_speed'] == [12.5]
+    assert apply_latest_telemetry(None, current, 0) == 'simulated'
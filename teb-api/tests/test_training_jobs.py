@@ -0,0 +1,107 @@
+import datetime
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+
+from conftest import TRAIN_OPTIONS
+from src.ml_models.model_registry import ModelRegistry
+from src.ml_models.predictive_model import TurbinePredictiveModel
+from src.ml_models.training_jobs import INSERT_JOB_SQL, JOB_COLUMNS, TrainingJobManager, _to_row
+
+
+@pytest.fixture
+def manager_factory(app, tmp_path):
+    """Gerenciadores sobre o mesmo banco, cada um como o de um worker diferente"""
+    registry = ModelRegistry(root=str(tmp_path / 'registry'))
+
+    def factory():
+        manager = TrainingJobManager(TurbinePredictiveModel(), registry)
+        manager.init_app(app)
+        return manager
+    return factory
+
+
+@pytest.fixture
+def active_job(manager_factory):
+    """Insere um job em execução de um processo (pid); no fim o job é encerrado"""
+    inserted = []
+
+    def insert(pid):
+        job = {name: None for name in JOB_COLUMNS}
+        job.update(id=uuid.uuid4().hex, status='running', progress=0.5, options={}, phase_timings={},
+                   submitted_at=datetime.datetime.now().isoformat(), coalesced_requests=0, pid=pid)
+        with manager_factory()._transaction() as cursor:
+            cursor.execute(INSERT_JOB_SQL, _to_row(job))
+        inserted.append(job['id'])
+        return job['id']
+
+    yield insert
+    with manager_factory()._transaction() as cursor:
+        for job_id in inserted:
+            cursor.execute("UPDATE training_jobs SET status = 'completed' WHERE id = ? AND status = 'running'",
+                           (job_id,))
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def _wait(manager, job_id):
+    deadline = time.monotonic() + 300
+    while manager.get(job_id)['status'] in ('queued', 'running'):
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+    return manager.get(job_id)
+
+
+def test_requests_from_any_worker_join_the_active_job(manager_factory, active_job):
+    job_id = active_job(os.getpid())
+    first, second = manager_factory(), manager_factory()
+
+    job, coalesced = first.submit()
+    assert coalesced and job['id'] == job_id
+    job, coalesced = second.submit()
+    assert coalesced and job['id'] == job_id
+    assert job['coalesced_requests'] == 2
+    assert 'pid' not in job
+    assert first.get(job_id)['coalesced_requests'] == 2
+
+
+def test_job_of_a_dead_process_is_marked_failed(manager_factory, active_job):
+    job_id = active_job(_dead_pid())
+    job = manager_factory().get(job_id)
+    assert job['status'] == 'failed'
+    assert job['finished_at'] is not None
+    assert 'encerrado' in job['error']
+
+
+def test_training_runs_once_and_is_visible_to_other_workers(manager_factory):
+    owner, other = manager_factory(), manager_factory()
+    job, coalesced = owner.submit(TRAIN_OPTIONS)
+    assert not coalesced
+
+    finished = _wait(other, job['id'])
+    assert finished['status'] == 'completed', finished['error']
+    assert finished['progress'] == 1.0
+    assert finished['model_version'] == owner.registry.current_version()
+    assert owner.target_model.version == finished['model_version']
+    assert 'save_model' in finished['phase_timings']
+
+
+def test_incremental_job_needs_a_trained_base(manager_factory):
+    manager = manager_factory()
+    job, _ = manager.submit({'mode': 'incremental', 'new_trees': 2})
+    finished = _wait(manager, job['id'])
+    assert finished['status'] == 'failed'
+    assert 'treinamento completo' in finished['error']
+    assert manager.registry.current_version() is None
+
+
+def test_unknown_job(manager_factory):
+    assert manager_factory().get('missing') is None
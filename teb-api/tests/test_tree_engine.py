@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from src.ml_models.tree_engine import CompiledEnsemble
+
+
+@pytest.fixture(scope='module')
+def estimators(trained_model):
+    return trained_model.failure_model, trained_model.availability_model, trained_model.anomaly_detector
+
+
+@pytest.fixture(scope='module')
+def compiled(estimators):
+    return CompiledEnsemble.from_estimators(*estimators)
+
+
+def _inputs(n_features, n_rows=256):
+    return np.random.default_rng(7).normal(scale=2.0, size=(n_rows, n_features))
+
+
+def test_compiled_matches_sklearn(estimators, compiled):
+    X = _inputs(compiled.n_features)
+    errors = compiled.max_abs_error(*estimators, X)
+    assert errors['failure_model'] < 1e-9
+    assert errors['availability_model'] < 1e-9
+    assert errors['anomaly_detector'] < 1e-9
+
+
+def test_inputs_on_split_thresholds_follow_sklearn(estimators, compiled):
+    # Amostras exatamente nos limiares: a comparação em float32 tem de bater com o sklearn
+    failure_model = estimators[0]
+    tree = failure_model.estimators_[0].tree_
+    split = tree.feature >= 0
+    X = _inputs(compiled.n_features, n_rows=int(split.sum()))
+    X[np.arange(len(X)), tree.feature[split]] = tree.threshold[split]
+    failure, _, _ = compiled.predict(X)
+    np.testing.assert_allclose(failure, failure_model.predict(X), rtol=0, atol=1e-9)
+
+
+def test_per_tree_outputs_and_anomaly_only_pass(estimators, compiled):
+    X = _inputs(compiled.n_features, n_rows=32)
+    failure_trees, availability, anomaly_score = compiled.predict_trees(X)
+    failure, _, _ = compiled.predict(X)
+
+    assert failure_trees.shape == (len(X), len(estimators[0].estimators_))
+    np.testing.assert_allclose(failure_trees.mean(axis=1), failure)
+    np.testing.assert_allclose(compiled.anomaly_scores(X), anomaly_score)
+    np.testing.assert_allclose(anomaly_score, estimators[2].decision_function(X), atol=1e-9)
+
+
+def test_arrays_roundtrip(compiled):
+    X = _inputs(compiled.n_features, n_rows=8)
+    restored = CompiledEnsemble(compiled.to_arrays())
+    for expected, actual in zip(compiled.predict(X), restored.predict(X)):
+        np.testing.assert_array_equal(expected, actual)